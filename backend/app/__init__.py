@@ -1,8 +1,13 @@
+import os
+import time
+
 from flask import Flask
 from flask_cors import CORS
 
 from config import Config
 from app.db import init_db, close_db
+from app.jobs import get_queue
+from app.latex_engine import get_engine
 from app.blueprints.auth import bp as auth_bp
 from app.blueprints.api_keys import bp as api_keys_bp
 from app.blueprints.profile import bp as profile_bp
@@ -13,24 +18,37 @@ from app.blueprints.blurbs import bp as blurbs_bp
 from app.blueprints.agent import bp as agent_bp
 from app.blueprints.latex import bp as latex_bp
 from app.blueprints.export_import import bp as export_import_bp
+from app.blueprints.workspace import bp as workspace_bp
+from app.blueprints.health import bp as health_bp
 
 
 def create_app(test_config: dict | None = None) -> Flask:
+    # Milliseconds spent in each start-up phase, served from /health/stats
+    startup_ms: dict[str, float] = {}
+    phase_start = time.perf_counter()
+
+    def phase_done(name: str) -> None:
+        nonlocal phase_start
+        now = time.perf_counter()
+        startup_ms[name] = round((now - phase_start) * 1000, 3)
+        phase_start = now
+
     app = Flask(__name__, instance_relative_config=True)
     app.config.from_object(Config)
 
     if test_config is not None:
         app.config.update(test_config)
 
-    CORS(app, resources={r"/*": {"origins": "*"}})
+    CORS(app, resources={r"/*": {"origins": "*"}}, expose_headers=["X-Export-Cursor", "X-Next-Cursor", "Retry-After"])
 
     # Ensure the instance folder exists
-    import os
     os.makedirs(app.instance_path, exist_ok=True)
+    phase_done("config")
 
     # Database
-    init_db(app)
     app.teardown_appcontext(close_db)
+    init_db(app)
+    phase_done("database")
 
     # Blueprints
     app.register_blueprint(auth_bp)
@@ -43,6 +61,23 @@ def create_app(test_config: dict | None = None) -> Flask:
     app.register_blueprint(agent_bp)
     app.register_blueprint(latex_bp)
     app.register_blueprint(export_import_bp)
+    app.register_blueprint(workspace_bp)
+    app.register_blueprint(health_bp)
+    phase_done("blueprints")
+
+    # Resolve the pdflatex binary once rather than on every compile request
+    get_engine(app)
+    phase_done("latex")
+
+    # Job workers also run the periodic housekeeping (sweeps, prunes, stale
+    # job recovery), so start them now rather than on the first enqueue. The
+    # hook restarts them in each worker process forked from a preloaded app.
+    # Tests start them on demand.
+    if not app.testing:
+        queue = get_queue(app)
+        queue.start()
+        app.before_request(queue.start)
+    phase_done("jobs")
 
     # Standard error handlers
     @app.errorhandler(404)
@@ -55,4 +90,5 @@ def create_app(test_config: dict | None = None) -> Flask:
         from flask import jsonify
         return jsonify({"error": {"code": "METHOD_NOT_ALLOWED", "message": str(e)}}), 405
 
+    app.extensions["startup_ms"] = startup_ms
     return app
@@ -0,0 +1,78 @@
+"""SQLite-backed cache of job-description analyses.
+
+Many users paste the same popular job ad, so analyses are shared: the key is
+a hash of the normalised title/company/description plus the prompt version
+and model, never the user. Entries expire after ANALYSIS_CACHE_TTL seconds
+and the least recently used are evicted beyond ANALYSIS_CACHE_MAX_ENTRIES.
+"""
+import hashlib
+import json
+import re
+import sqlite3
+import unicodedata
+
+from flask import current_app
+
+from app.metrics import counters
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _normalise(text: str | None) -> str:
+    text = unicodedata.normalize("NFKC", text or "")
+    return _WHITESPACE.sub(" ", text).strip().casefold()
+
+
+def cache_key(title: str, company: str, description: str, model: str, prompt_version: int) -> str:
+    parts = [str(prompt_version), model, _normalise(title), _normalise(company), _normalise(description)]
+    return hashlib.sha256("\x1f".join(parts).encode()).hexdigest()
+
+
+def _counters():
+    return counters(current_app, "analysisCache", "hits", "misses", "bypassed", "evicted")
+
+
+def lookup(db: sqlite3.Connection, key: str) -> dict | None:
+    """Return the cached analysis for ``key`` if present and not expired."""
+    row = db.execute(
+        "SELECT result_json FROM analysis_cache WHERE key = ? AND created_at > datetime('now', ?)",
+        (key, f"-{int(current_app.config['ANALYSIS_CACHE_TTL'])} seconds"),
+    ).fetchone()
+    if row is None:
+        _counters().incr("misses")
+        return None
+    db.execute(
+        "UPDATE analysis_cache SET hits = hits + 1, last_used_at = datetime('now') WHERE key = ?",
+        (key,),
+    )
+    db.commit()
+    _counters().incr("hits")
+    return json.loads(row["result_json"])
+
+
+def record_bypass() -> None:
+    _counters().incr("bypassed")
+
+
+def store(db: sqlite3.Connection, key: str, model: str, result: dict) -> None:
+    """Cache ``result`` and evict expired and least recently used entries."""
+    db.execute(
+        """INSERT OR REPLACE INTO analysis_cache (key, model, result_json)
+           VALUES (?, ?, ?)""",
+        (key, model, json.dumps(result)),
+    )
+    expired = db.execute(
+        "DELETE FROM analysis_cache WHERE created_at <= datetime('now', ?)",
+        (f"-{int(current_app.config['ANALYSIS_CACHE_TTL'])} seconds",),
+    ).rowcount
+    overflow = db.execute(
+        """DELETE FROM analysis_cache WHERE key IN (
+               SELECT key FROM analysis_cache
+               ORDER BY last_used_at DESC
+               LIMIT -1 OFFSET ?
+           )""",
+        (current_app.config["ANALYSIS_CACHE_MAX_ENTRIES"],),
+    ).rowcount
+    db.commit()
+    if expired + overflow:
+        _counters().incr("evicted", expired + overflow)
@@ -1,16 +1,13 @@
-from datetime import datetime, timedelta, timezone
 from functools import wraps
 
-import jwt
 from flask import current_app, g, jsonify, request
 
+from app import tokens
+
 
 def generate_token(user_id: str) -> str:
-    payload = {
-        "sub": user_id,
-        "exp": datetime.now(timezone.utc) + timedelta(days=7),
-    }
-    return jwt.encode(payload, current_app.config["SECRET_KEY"], algorithm="HS256")
+    """An access token for ``user_id`` (see app/tokens.py)."""
+    return tokens.issue(user_id, tokens.ACCESS)
 
 
 def require_auth(f):
@@ -21,14 +18,11 @@ def require_auth(f):
             return jsonify({"error": "Missing or invalid token"}), 401
         token = auth_header[7:]
         try:
-            payload = jwt.decode(
-                token, current_app.config["SECRET_KEY"], algorithms=["HS256"]
-            )
-            g.user_id = payload["sub"]
-        except jwt.ExpiredSignatureError:
-            return jsonify({"error": "Token expired"}), 401
-        except jwt.InvalidTokenError:
-            return jsonify({"error": "Invalid token"}), 401
+            claims = tokens.get_tokens(current_app).verify(token)
+        except tokens.TokenError as exc:
+            return jsonify({"error": str(exc)}), 401
+        g.user_id = claims.user_id
+        g.token = claims
         return f(*args, **kwargs)
 
     return decorated
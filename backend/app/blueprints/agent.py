@@ -1,19 +1,23 @@
-import base64
 import json
+import sqlite3
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 
-from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives.hashes import SHA256
-from cryptography.hazmat.primitives.kdf.hkdf import HKDF
-from flask import Blueprint, current_app, g, jsonify, request
-from openai import OpenAI
+from flask import Blueprint, Response, current_app, g, jsonify, request, stream_with_context
 
+from app import analysis_cache, ratelimit
 from app.auth_utils import require_auth
+from app.concurrency import KeyedSemaphore
 from app.db import get_db
+from app.keys import get_provider_key
+from app.llm import LLMError, get_registry
 
 bp = Blueprint("agent", __name__)
 
-_HKDF_SALT = b"cv-ai-generator-api-keys"
-_HKDF_INFO = b"api-key-encryption"
+_ANALYSIS_MODEL = "gpt-4o-mini"
+# Bump whenever the analyze-job prompt changes so cached analyses are not reused.
+_ANALYSIS_PROMPT_VERSION = 1
 
 _BLURB_TYPE_DESCRIPTIONS = {
     "summary": "a 2-3 sentence professional summary",
@@ -23,54 +27,27 @@ _BLURB_TYPE_DESCRIPTIONS = {
 }
 
 
-def _fernet() -> Fernet:
-    raw = current_app.config["SECRET_KEY"].encode()
-    derived = HKDF(
-        algorithm=SHA256(),
-        length=32,
-        salt=_HKDF_SALT,
-        info=_HKDF_INFO,
-    ).derive(raw)
-    return Fernet(base64.urlsafe_b64encode(derived))
+def _format_job(row) -> str:
+    return (
+        f"\n\nTarget Job:\nTitle: {row['title']}"
+        f"\nCompany: {row['company']}"
+        f"\nDescription: {row['description']}"
+    )
 
 
-def _get_openai_key(db, user_id: str) -> str | None:
+def _job_text(db, job_description_id: str | None, user_id: str) -> str | None:
+    """Prompt text for one of the user's job descriptions; "" without an id, None if not theirs."""
+    if not job_description_id:
+        return ""
     row = db.execute(
-        "SELECT encrypted_key FROM api_keys WHERE user_id = ? AND provider = 'openai' LIMIT 1",
-        (user_id,),
+        "SELECT title, company, description FROM job_descriptions WHERE id = ? AND user_id = ?",
+        (job_description_id, user_id),
     ).fetchone()
-    if not row:
-        return None
-    return _fernet().decrypt(row["encrypted_key"].encode()).decode()
+    return _format_job(row) if row else None
 
 
-@bp.post("/agent/generate-blurb")
-@require_auth
-def generate_blurb():
-    data = request.get_json(silent=True) or {}
-    blurb_type = data.get("type", "summary")
-    mode = data.get("mode", "full")
-    previous_blurb = data.get("previousBlurb")
-    job_description_id = data.get("jobDescriptionId")
-
-    db = get_db()
-    api_key = _get_openai_key(db, g.user_id)
-    if not api_key:
-        return jsonify({"error": "No OpenAI API key configured. Add one in Settings."}), 400
-
-    job_text = ""
-    if job_description_id:
-        row = db.execute(
-            "SELECT title, company, description FROM job_descriptions WHERE id = ? AND user_id = ?",
-            (job_description_id, g.user_id),
-        ).fetchone()
-        if row:
-            job_text = (
-                f"\n\nTarget Job:\nTitle: {row['title']}"
-                f"\nCompany: {row['company']}"
-                f"\nDescription: {row['description']}"
-            )
-
+def _blurb_request(blurb_type: str, mode: str, previous_blurb: str | None, job_text: str) -> dict:
+    """Chat completion arguments for generating one blurb."""
     type_desc = _BLURB_TYPE_DESCRIPTIONS.get(blurb_type, blurb_type)
 
     if mode == "full":
@@ -86,34 +63,278 @@ def generate_blurb():
             f"Return only the corrected text:\n\n{previous_blurb}"
         )
 
-    client = OpenAI(api_key=api_key)
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
+    return {
+        "model": "gpt-4o-mini",
+        "messages": [
             {
                 "role": "system",
                 "content": "You are a professional CV writing assistant. Be concise and impactful.",
             },
             {"role": "user", "content": prompt},
         ],
-        max_tokens=400,
-        temperature=0.7,
+        "max_tokens": 400,
+        "temperature": 0.7,
+    }
+
+
+def _save_blurb(db, user_id: str, blurb_type: str, content: str, job_description_id: str | None) -> str:
+    blurb_id = str(uuid.uuid4())
+    db.execute(
+        """INSERT INTO blurbs (id, user_id, type, content, job_description_id)
+           VALUES (?, ?, ?, ?, ?)""",
+        (blurb_id, user_id, blurb_type, content, job_description_id),
     )
+    db.commit()
+    return blurb_id
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _wants_stream(data: dict) -> bool:
+    return data.get("stream") is True or (
+        request.accept_mimetypes.best == "text/event-stream"
+    )
+
+
+@bp.post("/agent/generate-blurb")
+@ratelimit.limit("RATE_LIMIT_IP", per=ratelimit.IP)
+@require_auth
+@ratelimit.limit("RATE_LIMIT_AGENT")
+@ratelimit.concurrency("LLM_CONCURRENCY_PER_USER")
+def generate_blurb():
+    data = request.get_json(silent=True) or {}
+    blurb_type = data.get("type", "summary")
+    mode = data.get("mode", "full")
+    previous_blurb = data.get("previousBlurb")
+    job_description_id = data.get("jobDescriptionId")
+    save = bool(data.get("save"))
+
+    if save and blurb_type not in _BLURB_TYPE_DESCRIPTIONS:
+        return jsonify({"error": f"Cannot save a blurb of type '{blurb_type}'"}), 400
+    if job_description_id is not None and not isinstance(job_description_id, str):
+        return jsonify({"error": "jobDescriptionId must be a string"}), 400
+
+    db = get_db()
+    api_key = get_provider_key(db, g.user_id, "openai")
+    if not api_key:
+        return jsonify({"error": "No OpenAI API key configured. Add one in Settings."}), 400
+
+    # Resolved before any paid call, so a blurb is only ever linked to the
+    # user's own job description.
+    job_text = _job_text(db, job_description_id, g.user_id)
+    if job_text is None:
+        return jsonify({"error": "Job description not found"}), 404
+    completion = _blurb_request(blurb_type, mode, previous_blurb, job_text)
+    registry = get_registry(current_app)
+
+    if _wants_stream(data):
+        try:
+            deltas = registry.stream_chat(api_key, **completion)
+        except LLMError as exc:
+            return jsonify({"error": f"AI provider error: {exc}"}), 502
+
+        @stream_with_context
+        def events():
+            # If the client disconnects, the WSGI server closes the response,
+            # which closes `deltas` (and the upstream response) even if no
+            # chunk has arrived yet, and nothing is persisted.
+            parts = []
+            try:
+                for delta in deltas:
+                    parts.append(delta)
+                    yield _sse("delta", {"delta": delta})
+            except LLMError as exc:
+                yield _sse("error", {"error": f"AI provider error: {exc}"})
+                return
+            result = {"generatedBlurb": "".join(parts).strip()}
+            if save:
+                # The headers are already sent; report failure as an event.
+                try:
+                    result["blurbId"] = _save_blurb(
+                        get_db(), g.user_id, blurb_type, result["generatedBlurb"], job_description_id
+                    )
+                except sqlite3.Error:
+                    yield _sse("error", {"error": "Could not save the blurb", **result})
+                    return
+            yield _sse("done", result)
+
+        res = Response(
+            events(),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+        res.call_on_close(deltas.close)
+        return res
+
+    try:
+        response = registry.chat(api_key, **completion)
+    except LLMError as exc:
+        return jsonify({"error": f"AI provider error: {exc}"}), 502
     generated = response.choices[0].message.content.strip()
-    return jsonify({"generatedBlurb": generated}), 200
+    result = {"generatedBlurb": generated}
+    if save:
+        result["blurbId"] = _save_blurb(db, g.user_id, blurb_type, generated, job_description_id)
+    return jsonify(result), 200
+
+
+def _batch_slots() -> KeyedSemaphore:
+    slots = current_app.extensions.get("agent_batch_slots")
+    if slots is None:
+        slots = KeyedSemaphore(current_app.config["AGENT_BATCH_CONCURRENCY"])
+        current_app.extensions["agent_batch_slots"] = slots
+    return slots
+
+
+def _is_str_list(value) -> bool:
+    return isinstance(value, list) and all(isinstance(v, str) for v in value)
+
+
+def _batch_items(data: dict) -> list[dict]:
+    """Explicit ``items``, or every combination of ``types`` x ``jobDescriptionIds``.
+
+    Raises ValueError with a user-facing message for a malformed request, so
+    nothing is sent to the provider.
+    """
+    if "items" in data:
+        items = data["items"]
+        if not isinstance(items, list) or not all(isinstance(i, dict) for i in items):
+            raise ValueError("items must be a list of objects")
+        items = [{"type": "summary", "mode": "full", **i} for i in items]
+    else:
+        types = data.get("types") or list(_BLURB_TYPE_DESCRIPTIONS)
+        job_ids = data.get("jobDescriptionIds") or [None]
+        if not _is_str_list(types):
+            raise ValueError("types must be a list of strings")
+        if job_ids != [None] and not _is_str_list(job_ids):
+            raise ValueError("jobDescriptionIds must be a list of strings")
+        mode = data.get("mode", "full")
+        items = [{"type": t, "mode": mode, "jobDescriptionId": j} for j in job_ids for t in types]
+    for item in items:
+        if not isinstance(item["type"], str) or item["type"] not in _BLURB_TYPE_DESCRIPTIONS:
+            raise ValueError(f"Unknown blurb type: {item['type']!r}")
+        for field in ("mode", "jobDescriptionId", "previousBlurb"):
+            if item.get(field) is not None and not isinstance(item[field], str):
+                raise ValueError(f"{field} must be a string")
+    return items
+
+
+@bp.post("/agent/generate-blurbs/batch")
+@ratelimit.limit("RATE_LIMIT_IP", per=ratelimit.IP)
+@require_auth
+@ratelimit.concurrency("LLM_CONCURRENCY_PER_USER")
+def generate_blurbs_batch():
+    started = time.perf_counter()
+    data = request.get_json(silent=True) or {}
+    save = bool(data.get("save"))
+    try:
+        items = _batch_items(data)
+    except ValueError as exc:
+        return jsonify({"error": str(exc)}), 400
+    max_items = current_app.config["AGENT_BATCH_MAX_ITEMS"]
+    if not items or len(items) > max_items:
+        return jsonify({"error": f"Provide between 1 and {max_items} items"}), 400
+    # Each item is an LLM call, so each costs what one generate-blurb does.
+    refused = ratelimit.charge("RATE_LIMIT_AGENT", g.user_id, cost=len(items))
+    if refused:
+        return refused
+
+    db = get_db()
+    api_key = get_provider_key(db, g.user_id, "openai")
+    if not api_key:
+        return jsonify({"error": "No OpenAI API key configured. Add one in Settings."}), 400
+
+    job_ids = sorted({i["jobDescriptionId"] for i in items if i.get("jobDescriptionId")})
+    job_texts = {}
+    if job_ids:
+        placeholders = ",".join("?" * len(job_ids))
+        rows = db.execute(
+            f"SELECT id, title, company, description FROM job_descriptions "
+            f"WHERE id IN ({placeholders}) AND user_id = ?",
+            (*job_ids, g.user_id),
+        ).fetchall()
+        job_texts = {row["id"]: _format_job(row) for row in rows}
+        # Checked before any paid call: a missing or foreign id would
+        # otherwise fail the save, or link the blurb to someone else's job.
+        if len(job_texts) != len(job_ids):
+            return jsonify({"error": "Job description not found"}), 404
+
+    registry = get_registry(current_app)
+    slots = _batch_slots()
+    user_id = g.user_id
+
+    def run(item: dict) -> dict:
+        item_started = time.perf_counter()
+        result = {
+            "type": item["type"],
+            "jobDescriptionId": item.get("jobDescriptionId"),
+            "generatedBlurb": None,
+            "error": None,
+        }
+        completion = _blurb_request(
+            result["type"],
+            item["mode"],
+            item.get("previousBlurb"),
+            job_texts.get(result["jobDescriptionId"], ""),
+        )
+        try:
+            with slots.hold(user_id):
+                response = registry.chat(api_key, **completion)
+            result["generatedBlurb"] = response.choices[0].message.content.strip()
+        except LLMError as exc:
+            result["error"] = f"AI provider error: {exc}"
+        result["elapsedMs"] = round((time.perf_counter() - item_started) * 1000, 1)
+        return result
+
+    workers = min(len(items), current_app.config["AGENT_BATCH_CONCURRENCY"])
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="blurb-batch") as pool:
+        results = list(pool.map(run, items))
+
+    if save:
+        for result in results:
+            if result["error"] is None:
+                result["blurbId"] = str(uuid.uuid4())
+        db.executemany(
+            """INSERT INTO blurbs (id, user_id, type, content, job_description_id)
+               VALUES (?, ?, ?, ?, ?)""",
+            [
+                (r["blurbId"], user_id, r["type"], r["generatedBlurb"], r["jobDescriptionId"])
+                for r in results
+                if r["error"] is None
+            ],
+        )
+        db.commit()
+
+    return jsonify({
+        "results": results,
+        "elapsedMs": round((time.perf_counter() - started) * 1000, 1),
+    }), 200
+
+
+def _store_analysis(db, job_description_id: str, analysis: dict) -> None:
+    db.execute(
+        "UPDATE job_descriptions SET analysis_json = ? WHERE id = ?",
+        (json.dumps(analysis), job_description_id),
+    )
+    db.commit()
 
 
 @bp.post("/agent/analyze-job")
+@ratelimit.limit("RATE_LIMIT_IP", per=ratelimit.IP)
 @require_auth
+@ratelimit.limit("RATE_LIMIT_AGENT")
+@ratelimit.concurrency("LLM_CONCURRENCY_PER_USER")
 def analyze_job():
     data = request.get_json(silent=True) or {}
     job_description_id = data.get("jobDescriptionId")
+    force = bool(data.get("force"))
 
     if not job_description_id:
         return jsonify({"error": "jobDescriptionId is required"}), 400
 
     db = get_db()
-    api_key = _get_openai_key(db, g.user_id)
+    api_key = get_provider_key(db, g.user_id, "openai")
     if not api_key:
         return jsonify({"error": "No OpenAI API key configured. Add one in Settings."}), 400
 
@@ -124,6 +345,17 @@ def analyze_job():
     if not row:
         return jsonify({"error": "Job description not found"}), 404
 
+    key = analysis_cache.cache_key(
+        row["title"], row["company"], row["description"], _ANALYSIS_MODEL, _ANALYSIS_PROMPT_VERSION
+    )
+    if force:
+        analysis_cache.record_bypass()
+    else:
+        cached = analysis_cache.lookup(db, key)
+        if cached is not None:
+            _store_analysis(db, job_description_id, cached)
+            return jsonify(cached), 200, {"X-Cache": "HIT"}
+
     prompt = (
         f"Analyze this job description and return a JSON object with exactly these keys:\n"
         f'- "keywords": array of important keywords/technologies (max 10)\n'
@@ -133,23 +365,23 @@ def analyze_job():
         f"Return only valid JSON, no markdown or explanation."
     )
 
-    client = OpenAI(api_key=api_key)
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[
-            {"role": "system", "content": "You are a job description analyst. Return only valid JSON."},
-            {"role": "user", "content": prompt},
-        ],
-        max_tokens=300,
-        temperature=0.2,
-        response_format={"type": "json_object"},
-    )
+    try:
+        response = get_registry(current_app).chat(
+            api_key,
+            model=_ANALYSIS_MODEL,
+            messages=[
+                {"role": "system", "content": "You are a job description analyst. Return only valid JSON."},
+                {"role": "user", "content": prompt},
+            ],
+            max_tokens=300,
+            temperature=0.2,
+            response_format={"type": "json_object"},
+        )
+    except LLMError as exc:
+        return jsonify({"error": f"AI provider error: {exc}"}), 502
     analysis = json.loads(response.choices[0].message.content)
 
-    db.execute(
-        "UPDATE job_descriptions SET analysis_json = ? WHERE id = ?",
-        (json.dumps(analysis), job_description_id),
-    )
-    db.commit()
+    analysis_cache.store(db, key, _ANALYSIS_MODEL, analysis)
+    _store_analysis(db, job_description_id, analysis)
+    return jsonify(analysis), 200, {"X-Cache": "MISS"}
 
-    return jsonify(analysis), 200
@@ -1,30 +1,13 @@
-import base64
 import uuid
 
-from cryptography.fernet import Fernet
-from cryptography.hazmat.primitives.hashes import SHA256
-from cryptography.hazmat.primitives.kdf.hkdf import HKDF
-from flask import Blueprint, current_app, g, jsonify, request
+from flask import Blueprint, g, jsonify, request
 
 from app.auth_utils import require_auth
 from app.db import get_db
+from app.keys import encrypt, invalidate_provider_keys
 
 bp = Blueprint("api_keys", __name__)
 
-_HKDF_SALT = b"cv-ai-generator-api-keys"
-_HKDF_INFO = b"api-key-encryption"
-
-
-def _fernet() -> Fernet:
-    raw = current_app.config["SECRET_KEY"].encode()
-    derived = HKDF(
-        algorithm=SHA256(),
-        length=32,
-        salt=_HKDF_SALT,
-        info=_HKDF_INFO,
-    ).derive(raw)
-    return Fernet(base64.urlsafe_b64encode(derived))
-
 
 def _row_to_dict(row) -> dict:
     return {
@@ -57,7 +40,7 @@ def add_key():
     if not name or not provider or not key_value:
         return jsonify({"error": "name, provider and key are required"}), 400
 
-    encrypted = _fernet().encrypt(key_value.encode()).decode()
+    encrypted = encrypt(key_value)
     key_id = str(uuid.uuid4())
     db = get_db()
     db.execute(
@@ -65,6 +48,7 @@ def add_key():
         (key_id, g.user_id, name, provider, encrypted),
     )
     db.commit()
+    invalidate_provider_keys(g.user_id)
     row = db.execute("SELECT * FROM api_keys WHERE id = ?", (key_id,)).fetchone()
     return jsonify(_row_to_dict(row)), 201
 
@@ -87,7 +71,7 @@ def update_key(key_id: str):
         return jsonify({"error": "Not found"}), 404
 
     encrypted = (
-        _fernet().encrypt(key_value.encode()).decode()
+        encrypt(key_value)
         if key_value
         else row["encrypted_key"]
     )
@@ -96,6 +80,7 @@ def update_key(key_id: str):
         (name, encrypted, key_id, g.user_id),
     )
     db.commit()
+    invalidate_provider_keys(g.user_id)
     row = db.execute("SELECT * FROM api_keys WHERE id = ?", (key_id,)).fetchone()
     return jsonify(_row_to_dict(row)), 200
 
@@ -108,4 +93,5 @@ def delete_key(key_id: str):
         "DELETE FROM api_keys WHERE id = ? AND user_id = ?", (key_id, g.user_id)
     )
     db.commit()
+    invalidate_provider_keys(g.user_id)
     return "", 204
@@ -1,16 +1,21 @@
 import secrets
 import uuid
 
-import bcrypt
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, current_app, jsonify, request
 
-from app.auth_utils import generate_token
+from app import ratelimit, tokens
 from app.db import get_db
+from app.passwords import HasherBusy, get_hasher
 
 bp = Blueprint("auth", __name__)
 
 
+def _busy():
+    return ratelimit.too_many("Too many sign-ins at once, please retry shortly")
+
+
 @bp.post("/auth/register")
+@ratelimit.limit("RATE_LIMIT_AUTH", per=ratelimit.IP)
 def register():
     data = request.get_json(silent=True) or {}
     email = data.get("email", "").strip().lower()
@@ -22,7 +27,10 @@ def register():
         return jsonify({"error": "Email already registered"}), 409
 
     password = secrets.token_urlsafe(12)
-    password_hash = bcrypt.hashpw(password.encode(), bcrypt.gensalt()).decode()
+    try:
+        password_hash = get_hasher(current_app).hash(password)
+    except HasherBusy:
+        return _busy()
     user_id = str(uuid.uuid4())
 
     db.execute(
@@ -35,6 +43,7 @@ def register():
 
 
 @bp.post("/auth/login")
+@ratelimit.limit("RATE_LIMIT_AUTH", per=ratelimit.IP)
 def login():
     data = request.get_json(silent=True) or {}
     email = data.get("email", "").strip().lower()
@@ -48,23 +57,67 @@ def login():
         "SELECT id, password_hash FROM users WHERE email = ?", (email,)
     ).fetchone()
 
-    if not user or not bcrypt.checkpw(password.encode(), user["password_hash"].encode()):
+    if not user:
         return jsonify({"error": "Invalid email or password"}), 401
-
-    token = generate_token(user["id"])
-    return jsonify({"token": token, "userId": user["id"]}), 200
+    hasher = get_hasher(current_app)
+    try:
+        if not hasher.verify(password, user["password_hash"]):
+            return jsonify({"error": "Invalid email or password"}), 401
+        # Upgrade hashes made at an older BCRYPT_ROUNDS while we have the password.
+        new_hash = hasher.rehash(password, user["password_hash"])
+    except HasherBusy:
+        return _busy()
+    if new_hash:
+        db.execute("UPDATE users SET password_hash = ? WHERE id = ?", (new_hash, user["id"]))
+        db.commit()
+
+    return jsonify({**tokens.issue_pair(user["id"]), "userId": user["id"]}), 200
+
+
+@bp.post("/auth/refresh")
+def refresh():
+    data = request.get_json(silent=True) or {}
+    refresh_token = data.get("refreshToken")
+    if not refresh_token:
+        return jsonify({"error": "refreshToken is required"}), 400
+    try:
+        pair = tokens.refresh(get_db(), refresh_token)
+    except tokens.TokenError as exc:
+        return jsonify({"error": str(exc)}), 401
+    return jsonify(pair), 200
 
 
 @bp.post("/auth/logout")
 def logout():
+    """Revoke the bearer access token and, if given, the refresh token.
+
+    Tokens that are missing, invalid or already expired are ignored, so
+    logging out always succeeds.
+    """
+    db = get_db()
+    state = tokens.get_tokens(current_app)
+    presented = []
+    auth_header = request.headers.get("Authorization", "")
+    if auth_header.startswith("Bearer "):
+        presented.append((auth_header[7:], tokens.ACCESS))
+    refresh_token = (request.get_json(silent=True) or {}).get("refreshToken")
+    if refresh_token:
+        presented.append((refresh_token, tokens.REFRESH))
+    for token, kind in presented:
+        try:
+            state.revoke(db, tokens.decode(token, kind))
+        except tokens.TokenError:
+            continue
     return jsonify({"message": "Logged out"}), 200
 
 
 @bp.post("/auth/reset-password/request")
+@ratelimit.limit("RATE_LIMIT_AUTH", per=ratelimit.IP)
 def reset_password_request():
     return jsonify({"message": "Password reset not yet implemented"}), 200
 
 
 @bp.post("/auth/reset-password/confirm")
+@ratelimit.limit("RATE_LIMIT_AUTH", per=ratelimit.IP)
 def reset_password_confirm():
     return jsonify({"message": "Password reset not yet implemented"}), 200
@@ -2,37 +2,43 @@ import uuid
 
 from flask import Blueprint, g, jsonify, request
 
+from app import pagination
 from app.auth_utils import require_auth
 from app.db import get_db
+from app.etags import conditional
+from app.pagination import Field, Listing
 
 bp = Blueprint("blurbs", __name__)
 
+LISTING = Listing(
+    table="blurbs",
+    fields={
+        "id": Field("id"),
+        "type": Field("type"),
+        "content": Field("content"),
+        "jobDescriptionId": Field("job_description_id"),
+    },
+    order=("created_at", "id"),
+)
+
 
 def _row_to_dict(row) -> dict:
-    return {
-        "id": row["id"],
-        "type": row["type"],
-        "content": row["content"],
-        "jobDescriptionId": row["job_description_id"],
-    }
+    return LISTING.to_dict(row)
 
 
 @bp.get("/blurbs")
 @require_auth
+@conditional("blurbs")
 def list_blurbs():
-    db = get_db()
+    where, params = "user_id = ?", (g.user_id,)
     job_description_id = request.args.get("jobDescriptionId")
     if job_description_id:
-        rows = db.execute(
-            "SELECT * FROM blurbs WHERE user_id = ? AND job_description_id = ? ORDER BY created_at DESC",
-            (g.user_id, job_description_id),
-        ).fetchall()
-    else:
-        rows = db.execute(
-            "SELECT * FROM blurbs WHERE user_id = ? ORDER BY created_at DESC",
-            (g.user_id,),
-        ).fetchall()
-    return jsonify([_row_to_dict(r) for r in rows]), 200
+        where, params = where + " AND job_description_id = ?", params + (job_description_id,)
+    try:
+        result = pagination.page(get_db(), LISTING, request.args, where, params)
+    except pagination.InvalidPage as exc:
+        return jsonify({"error": str(exc)}), 400
+    return pagination.response(result)
 
 
 @bp.post("/blurbs")
@@ -3,34 +3,43 @@ import uuid
 
 from flask import Blueprint, g, jsonify, request
 
+from app import pagination
 from app.auth_utils import require_auth
 from app.db import get_db
+from app.etags import conditional
+from app.pagination import Field, Listing
 
 bp = Blueprint("experiences", __name__)
 
+LISTING = Listing(
+    table="experiences",
+    fields={
+        "id": Field("id"),
+        "category": Field("category"),
+        "title": Field("title"),
+        "organization": Field("organization"),
+        "startDate": Field("start_date"),
+        "endDate": Field("end_date"),
+        "description": Field("description", lambda v: v or ""),
+        "keywords": Field("keywords", json.loads),
+    },
+    order=("start_date", "id"),
+)
+
 
 def _row_to_dict(row) -> dict:
-    return {
-        "id": row["id"],
-        "category": row["category"],
-        "title": row["title"],
-        "organization": row["organization"],
-        "startDate": row["start_date"],
-        "endDate": row["end_date"],
-        "description": row["description"] or "",
-        "keywords": json.loads(row["keywords"]),
-    }
+    return LISTING.to_dict(row)
 
 
 @bp.get("/experiences")
 @require_auth
+@conditional("experiences")
 def list_experiences():
-    db = get_db()
-    rows = db.execute(
-        "SELECT * FROM experiences WHERE user_id = ? ORDER BY start_date DESC",
-        (g.user_id,),
-    ).fetchall()
-    return jsonify([_row_to_dict(r) for r in rows]), 200
+    try:
+        result = pagination.page(get_db(), LISTING, request.args, "user_id = ?", (g.user_id,))
+    except pagination.InvalidPage as exc:
+        return jsonify({"error": str(exc)}), 400
+    return pagination.response(result)
 
 
 @bp.post("/experiences")
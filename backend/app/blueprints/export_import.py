@@ -1,59 +1,70 @@
-import io
 import json
+import time
 import uuid
-import zipfile
 
-from flask import Blueprint, g, jsonify, request, send_file
+from flask import Blueprint, Response, current_app, g, jsonify, request, send_file
 
+from app import data_import, export_archive, jobs, ratelimit, sync
 from app.auth_utils import require_auth
-from app.blueprints.profile import _ensure_profile, _photos_dir
+from app.blueprints.profile import _photos_dir
 from app.db import get_db
+from app.jobs import get_queue
+from app.zipstream import stream_zip
 
 bp = Blueprint("export_import", __name__)
 
 
-@bp.get("/export")
-@require_auth
-def export_data():
-    db = get_db()
+def _error(code: str, message: str, status: int):
+    return jsonify({"error": {"code": code, "message": message}}), status
+
+
+def _parse_since(value) -> int | None:
+    """``since`` as an int, or None for a full export; raises ValueError."""
+    if value is None:
+        return None
+    if isinstance(value, int) and not isinstance(value, bool) and value >= 0:
+        return value
+    if isinstance(value, str) and value.isdigit():
+        return int(value)
+    raise ValueError(value)
+
 
+def _export_members(db, user_id: str, since: int | None) -> tuple[list, int]:
+    """The archive members of a full or delta export and its cursor.
+
+    Raises sync.CursorExpired for a cursor older than the kept tombstones.
+    """
+    changes = sync.changes(db, user_id, since)
     profile = db.execute(
-        "SELECT * FROM profiles WHERE user_id = ?", (g.user_id,)
+        "SELECT * FROM profiles WHERE user_id = ?", (user_id,)
     ).fetchone()
-    photos = db.execute(
-        "SELECT * FROM photos WHERE user_id = ?", (g.user_id,)
-    ).fetchall()
-    experiences = db.execute(
-        "SELECT * FROM experiences WHERE user_id = ?", (g.user_id,)
-    ).fetchall()
-    projects = db.execute(
-        "SELECT * FROM projects WHERE user_id = ?", (g.user_id,)
-    ).fetchall()
-    job_descs = db.execute(
-        "SELECT * FROM job_descriptions WHERE user_id = ?", (g.user_id,)
-    ).fetchall()
-    blurbs = db.execute(
-        "SELECT * FROM blurbs WHERE user_id = ?", (g.user_id,)
-    ).fetchall()
     api_keys = db.execute(
         "SELECT name, provider, created_at FROM api_keys WHERE user_id = ?",
-        (g.user_id,),
+        (user_id,),
     ).fetchall()
+    photos = changes.rows["photos"]
 
     data = {
         "version": 1,
+        "cursor": changes.cursor,
         "profile": dict(profile) if profile else {},
         "photos": [
-            {"id": r["id"], "filename": r["filename"], "isMain": bool(r["is_main"])}
+            {
+                "id": r["id"],
+                "filename": r["filename"],
+                "isMain": bool(r["is_main"]),
+                "sha256": r["sha256"],
+                "version": r["version"],
+            }
             for r in photos
         ],
         "experiences": [
             {**dict(e), "keywords": json.loads(e["keywords"] or "[]")}
-            for e in experiences
+            for e in changes.rows["experiences"]
         ],
         "projects": [
             {**dict(p), "keywords": json.loads(p["keywords"] or "[]")}
-            for p in projects
+            for p in changes.rows["projects"]
         ],
         "jobDescriptions": [
             {
@@ -62,172 +73,156 @@ def export_data():
                 if j["analysis_json"]
                 else None,
             }
-            for j in job_descs
+            for j in changes.rows["job_descriptions"]
         ],
-        "blurbs": [dict(b) for b in blurbs],
+        "blurbs": [dict(b) for b in changes.rows["blurbs"]],
         # Encrypted keys cannot be transferred — export names only as a reminder
         "apiKeysMetadata": [
             {"name": k["name"], "provider": k["provider"], "createdAt": k["created_at"]}
             for k in api_keys
         ],
     }
+    if since is not None:
+        # A delta: only rows changed after ``since``, plus ids deleted since then.
+        data["since"] = since
+        data["deleted"] = changes.deleted
 
     photos_dir = _photos_dir()
-    buf = io.BytesIO()
-    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
-        zf.writestr("data.json", json.dumps(data, indent=2, default=str))
-        for photo in photos:
-            path = photos_dir / photo["filename"]
-            if path.exists():
-                zf.write(str(path), f"photos/{photo['filename']}")
-
-    buf.seek(0)
-    return send_file(
-        buf,
+    members = [("data.json", json.dumps(data, indent=2, default=str).encode())]
+    members += [(f"photos/{p['filename']}", photos_dir / p["filename"]) for p in photos]
+    return members, changes.cursor
+
+
+@bp.get("/export")
+@require_auth
+def export_data():
+    try:
+        since = _parse_since(request.args.get("since"))
+    except ValueError:
+        return _error("INVALID_CURSOR", "since must be an export cursor", 400)
+    try:
+        members, cursor = _export_members(get_db(), g.user_id, since)
+    except sync.CursorExpired:
+        return _error("CURSOR_EXPIRED", "Cursor is too old; run a full export", 410)
+    return Response(
+        stream_zip(members),
+        mimetype="application/zip",
+        headers={
+            "Content-Disposition": 'attachment; filename="cv-export.zip"',
+            "X-Export-Cursor": str(cursor),
+        },
+    )
+
+
+@jobs.handler("export")
+def _export_job(payload: dict, progress) -> dict:
+    """Write one export archive to EXPORT_DIR; runs on a job worker thread."""
+    try:
+        members, cursor = _export_members(get_db(), payload["userId"], payload.get("since"))
+    except sync.CursorExpired:
+        raise jobs.JobFailed("Cursor is too old; run a full export")
+    progress(10)
+    archive = export_archive.write(
+        current_app, export_archive.export_dir(current_app), payload["archiveId"], members
+    )
+    return {
+        **archive,
+        "archiveId": payload["archiveId"],
+        "cursor": cursor,
+        "expiresAt": time.time() + current_app.config["EXPORT_ARCHIVE_TTL"],
+    }
+
+
+@bp.post("/export/jobs")
+@require_auth
+@ratelimit.limit("RATE_LIMIT_EXPORT", code="RATE_LIMITED")
+def start_export():
+    data = request.get_json(silent=True) or {}
+    try:
+        since = _parse_since(data.get("since", request.args.get("since")))
+    except ValueError:
+        return _error("INVALID_CURSOR", "since must be an export cursor", 400)
+    job_id = get_queue(current_app).enqueue(
+        get_db(), "export", g.user_id,
+        {"userId": g.user_id, "since": since, "archiveId": str(uuid.uuid4())},
+        max_pending=current_app.config["EXPORT_PENDING_PER_USER"],
+    )
+    if job_id is None:
+        return ratelimit.too_many(
+            "Your previous export is still being written, please retry shortly", code="EXPORT_PENDING"
+        )
+    return jsonify({
+        "jobId": job_id,
+        "status": "queued",
+        "statusUrl": f"/export/jobs/{job_id}",
+        "downloadUrl": f"/export/jobs/{job_id}/download",
+    }), 202
+
+
+def _own_export_job(job_id: str):
+    job = get_queue(current_app).get(get_db(), job_id, g.user_id)
+    if job is None or job["kind"] != "export":
+        return None
+    return job
+
+
+@bp.get("/export/jobs/<job_id>")
+@require_auth
+def export_status(job_id: str):
+    job = _own_export_job(job_id)
+    if job is None:
+        return _error("NOT_FOUND", "Job not found", 404)
+    if job["status"] == "done":
+        job["downloadUrl"] = f"/export/jobs/{job_id}/download"
+    return jsonify(job), 200
+
+
+@bp.get("/export/jobs/<job_id>/download")
+@require_auth
+def download_export(job_id: str):
+    job = _own_export_job(job_id)
+    if job is None:
+        return _error("NOT_FOUND", "Job not found", 404)
+    if job["status"] != "done":
+        return _error("NOT_READY", f"Export is {job['status']}", 409)
+    archive_id = job.get("archiveId")
+    if archive_id is None:  # finished before archiveId moved into the result
+        payload = get_db().execute("SELECT payload FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        archive_id = json.loads(payload["payload"])["archiveId"]
+    path = export_archive.path_for(export_archive.export_dir(current_app), archive_id)
+    if not path.exists():
+        return _error("EXPIRED", "Export archive has expired; start a new export", 410)
+    # Range, If-Range and If-None-Match are handled by send_file against this ETag.
+    res = send_file(
+        path,
         mimetype="application/zip",
         as_attachment=True,
         download_name="cv-export.zip",
+        etag=job["sha256"],
+        conditional=True,
     )
+    res.headers["X-Export-Cursor"] = str(job["cursor"])
+    res.headers["Cache-Control"] = "private, no-cache"
+    return res
 
 
 @bp.post("/import")
 @require_auth
 def import_data():
     if "file" not in request.files:
-        return jsonify({"error": {"code": "NO_FILE", "message": "No file provided"}}), 400
+        return _error("NO_FILE", "No file provided", 400)
+    mode = request.values.get("mode", "replace")
+    if mode not in data_import.MODES:
+        return _error("INVALID_MODE", "mode must be replace or merge", 400)
 
-    raw = request.files["file"].read()
-    buf = io.BytesIO(raw)
     try:
-        zf = zipfile.ZipFile(buf, "r")
-    except zipfile.BadZipFile:
-        return (
-            jsonify({"error": {"code": "BAD_ZIP", "message": "Not a valid zip file"}}),
-            400,
+        summary = data_import.import_archive(
+            current_app, get_db(), g.user_id, request.files["file"].stream, _photos_dir(), mode
         )
+    except data_import.ImportRejected as exc:
+        error = {"code": exc.code, "message": exc.message}
+        if exc.details:
+            error["details"] = exc.details
+        return jsonify({"error": error}), 409 if exc.code == "CONFLICT" else 400
 
-    with zf:
-        if "data.json" not in zf.namelist():
-            return (
-                jsonify(
-                    {"error": {"code": "MISSING_DATA", "message": "data.json not found in zip"}}
-                ),
-                400,
-            )
-
-        data = json.loads(zf.read("data.json"))
-        db = get_db()
-
-        # --- Profile ---
-        profile_data = data.get("profile", {})
-        if profile_data:
-            _ensure_profile(db, g.user_id)
-            db.execute(
-                """UPDATE profiles SET
-                    first_name = ?, last_name = ?, email = ?,
-                    phone = ?, location = ?, website = ?,
-                    linkedin = ?, github = ?,
-                    updated_at = datetime('now')
-                WHERE user_id = ?""",
-                (
-                    profile_data.get("first_name") or profile_data.get("firstName"),
-                    profile_data.get("last_name") or profile_data.get("lastName"),
-                    profile_data.get("email"),
-                    profile_data.get("phone"),
-                    profile_data.get("location"),
-                    profile_data.get("website"),
-                    profile_data.get("linkedin"),
-                    profile_data.get("github"),
-                    g.user_id,
-                ),
-            )
-
-        # --- Photos ---
-        photos_dir = _photos_dir()
-        db.execute("DELETE FROM photos WHERE user_id = ?", (g.user_id,))
-        for meta in data.get("photos", []):
-            zip_path = f"photos/{meta['filename']}"
-            if zip_path in zf.namelist():
-                (photos_dir / meta["filename"]).write_bytes(zf.read(zip_path))
-            db.execute(
-                "INSERT OR REPLACE INTO photos (id, user_id, filename, is_main) VALUES (?, ?, ?, ?)",
-                (
-                    meta["id"],
-                    g.user_id,
-                    meta["filename"],
-                    1 if meta.get("isMain") else 0,
-                ),
-            )
-
-        # --- Experiences ---
-        db.execute("DELETE FROM experiences WHERE user_id = ?", (g.user_id,))
-        for exp in data.get("experiences", []):
-            db.execute(
-                """INSERT INTO experiences
-                    (id, user_id, category, title, organization, start_date, end_date, description, keywords)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
-                (
-                    exp.get("id") or str(uuid.uuid4()),
-                    g.user_id,
-                    exp["category"],
-                    exp["title"],
-                    exp["organization"],
-                    exp["start_date"],
-                    exp.get("end_date"),
-                    exp.get("description"),
-                    json.dumps(exp.get("keywords", [])),
-                ),
-            )
-
-        # --- Projects ---
-        db.execute("DELETE FROM projects WHERE user_id = ?", (g.user_id,))
-        for proj in data.get("projects", []):
-            db.execute(
-                "INSERT INTO projects (id, user_id, title, description, keywords) VALUES (?, ?, ?, ?, ?)",
-                (
-                    proj.get("id") or str(uuid.uuid4()),
-                    g.user_id,
-                    proj["title"],
-                    proj.get("description"),
-                    json.dumps(proj.get("keywords", [])),
-                ),
-            )
-
-        # --- Job descriptions (must come before blurbs for FK) ---
-        db.execute("DELETE FROM job_descriptions WHERE user_id = ?", (g.user_id,))
-        for jd in data.get("jobDescriptions", []):
-            db.execute(
-                """INSERT INTO job_descriptions
-                    (id, user_id, title, company, description, analysis_json, created_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?)""",
-                (
-                    jd.get("id") or str(uuid.uuid4()),
-                    g.user_id,
-                    jd["title"],
-                    jd["company"],
-                    jd["description"],
-                    json.dumps(jd["analysisJson"]) if jd.get("analysisJson") else None,
-                    jd.get("created_at") or "datetime('now')",
-                ),
-            )
-
-        # --- Blurbs ---
-        db.execute("DELETE FROM blurbs WHERE user_id = ?", (g.user_id,))
-        for blurb in data.get("blurbs", []):
-            db.execute(
-                """INSERT INTO blurbs
-                    (id, user_id, type, content, job_description_id, created_at)
-                VALUES (?, ?, ?, ?, ?, ?)""",
-                (
-                    blurb.get("id") or str(uuid.uuid4()),
-                    g.user_id,
-                    blurb["type"],
-                    blurb["content"],
-                    blurb.get("job_description_id"),
-                    blurb.get("created_at") or "datetime('now')",
-                ),
-            )
-
-        db.commit()
-
-    return jsonify({"message": "Import successful"}), 200
+    return jsonify({"message": "Import successful", "mode": mode, **summary}), 200
@@ -0,0 +1,42 @@
+import hmac
+
+from flask import Blueprint, current_app, jsonify, request
+
+from app.db import get_db, get_pool
+from app.jobs import get_queue
+from app.keys import cache_stats as api_key_cache_stats
+from app.llm import get_registry
+from app.metrics import snapshot as counter_snapshot
+from app.tex_escape import cache_info as tex_escape_cache_info
+from app.tex_templates import fragment_stats
+from app.tokens import get_tokens
+
+bp = Blueprint("health", __name__)
+
+
+@bp.get("/health")
+def health():
+    return jsonify({"status": "ok"}), 200
+
+
+@bp.get("/health/stats")
+def stats():
+    # Server-wide counters are for operators, not users: only the holder of
+    # HEALTH_STATS_TOKEN may read them, and without one the endpoint is off.
+    token = current_app.config["HEALTH_STATS_TOKEN"]
+    if not token:
+        return jsonify({"error": "Not found"}), 404
+    supplied = request.headers.get("Authorization", "").removeprefix("Bearer ")
+    if not hmac.compare_digest(supplied.encode(), token.encode()):
+        return jsonify({"error": "Missing or invalid token"}), 401
+    return jsonify({
+        "db": get_pool(current_app).stats(),
+        "apiKeyCache": api_key_cache_stats(current_app),
+        "tokenCache": get_tokens(current_app).stats(),
+        "llm": get_registry(current_app).stats(),
+        "texFragments": fragment_stats(current_app),
+        "texEscape": tex_escape_cache_info(),
+        **counter_snapshot(current_app),
+        "jobs": get_queue(current_app).stats(get_db()),
+        "startupMs": current_app.extensions.get("startup_ms", {}),
+    }), 200
@@ -3,31 +3,40 @@ import uuid
 
 from flask import Blueprint, g, jsonify, request
 
+from app import pagination
 from app.auth_utils import require_auth
 from app.db import get_db
+from app.etags import conditional
+from app.pagination import Field, Listing
 
 bp = Blueprint("job_descriptions", __name__)
 
+LISTING = Listing(
+    table="job_descriptions",
+    fields={
+        "id": Field("id"),
+        "title": Field("title"),
+        "company": Field("company"),
+        "description": Field("description"),
+        "analysis": Field("analysis_json", lambda v: json.loads(v) if v else None),
+    },
+    order=("created_at", "id"),
+)
+
 
 def _row_to_dict(row) -> dict:
-    return {
-        "id": row["id"],
-        "title": row["title"],
-        "company": row["company"],
-        "description": row["description"],
-        "analysis": json.loads(row["analysis_json"]) if row["analysis_json"] else None,
-    }
+    return LISTING.to_dict(row)
 
 
 @bp.get("/job-descriptions")
 @require_auth
+@conditional("job_descriptions")
 def list_job_descriptions():
-    db = get_db()
-    rows = db.execute(
-        "SELECT * FROM job_descriptions WHERE user_id = ? ORDER BY created_at DESC",
-        (g.user_id,),
-    ).fetchall()
-    return jsonify([_row_to_dict(r) for r in rows]), 200
+    try:
+        result = pagination.page(get_db(), LISTING, request.args, "user_id = ?", (g.user_id,))
+    except pagination.InvalidPage as exc:
+        return jsonify({"error": str(exc)}), 400
+    return pagination.response(result)
 
 
 @bp.post("/job-descriptions")
@@ -1,168 +1,85 @@
 import json
 import subprocess
-import uuid
+import tempfile
 from pathlib import Path
 
+import click
 from flask import Blueprint, current_app, g, jsonify, request, send_file
 
+from app import jobs, ratelimit, render_cache, tex_templates
 from app.auth_utils import require_auth
 from app.db import get_db
+from app.jobs import get_queue
+from app.latex_engine import get_engine
 
 bp = Blueprint("latex", __name__)
 
-_LATEX_SPECIAL = str.maketrans({
-    "&": r"\&",
-    "%": r"\%",
-    "$": r"\$",
-    "#": r"\#",
-    "_": r"\_",
-    "{": r"\{",
-    "}": r"\}",
-    "~": r"\textasciitilde{}",
-    "^": r"\textasciicircum{}",
-    "\\": r"\textbackslash{}",
-})
 
+def _output_dir() -> Path:
+    d = Path(current_app.config["LATEX_OUTPUT_DIR"])
+    d.mkdir(parents=True, exist_ok=True)
+    return d
 
-def _e(text: str) -> str:
-    """Escape special LaTeX characters."""
-    return (text or "").translate(_LATEX_SPECIAL)
 
+def _build_tex(
+    profile: dict,
+    blurbs: list,
+    experiences: list,
+    projects: list,
+    font_size: int,
+    template_id: str = tex_templates.DEFAULT_TEMPLATE,
+) -> str:
+    return tex_templates.render_document(
+        current_app, template_id, profile, blurbs, experiences, projects, font_size
+    )
 
-def _output_dir() -> Path:
-    d = Path(current_app.instance_path) / "compiled"
-    d.mkdir(exist_ok=True)
-    return d
 
+@jobs.handler("latex")
+def _compile_job(payload: dict, progress) -> dict:
+    """Compile one queued document; runs on a job worker thread.
 
-def _pdflatex_available() -> bool:
-    try:
-        subprocess.run(["pdflatex", "--version"], capture_output=True, timeout=5)
-        return True
-    except (FileNotFoundError, subprocess.TimeoutExpired):
-        return False
-
-
-def _build_tex(profile: dict, blurbs: list, experiences: list, projects: list, font_size: int) -> str:
-    # Header
-    first = _e(profile.get("first_name") or "")
-    last = _e(profile.get("last_name") or "")
-    name = f"{first} {last}".strip() or "Your Name"
-
-    contact_parts = []
-    if profile.get("email"):
-        contact_parts.append(_e(profile["email"]))
-    if profile.get("phone"):
-        contact_parts.append(_e(profile["phone"]))
-    if profile.get("location"):
-        contact_parts.append(_e(profile["location"]))
-    if profile.get("website"):
-        contact_parts.append(rf"\href{{{_e(profile['website'])}}}{{{_e(profile['website'])}}}")
-    if profile.get("linkedin"):
-        contact_parts.append(rf"\href{{{_e(profile['linkedin'])}}}{{{_e(profile['linkedin'])}}}")
-    if profile.get("github"):
-        contact_parts.append(rf"\href{{{_e(profile['github'])}}}{{{_e(profile['github'])}}}")
-    contact_line = r" $\cdot$ ".join(contact_parts)
-
-    # Blurbs
-    blurb_map = {b["type"]: b["content"] for b in blurbs}
-
-    summary_tex = ""
-    if blurb_map.get("summary"):
-        summary_tex = f"\\section{{Summary}}\n{_e(blurb_map['summary'])}\n"
-
-    skills_tex = ""
-    if blurb_map.get("skills"):
-        skills_tex = f"\\section{{Skills}}\n{_e(blurb_map['skills'])}\n"
-
-    motivation_tex = ""
-    if blurb_map.get("motivation"):
-        motivation_tex = f"\\section{{Motivation}}\n{_e(blurb_map['motivation'])}\n"
-
-    closing_tex = ""
-    if blurb_map.get("closing"):
-        closing_tex = f"\\section{{Closing Statement}}\n{_e(blurb_map['closing'])}\n"
-
-    # Experiences
-    exp_tex = ""
-    if experiences:
-        items = []
-        for exp in experiences:
-            start = _e(exp.get("start_date") or "")
-            end = _e(exp.get("end_date") or "Present")
-            desc = _e(exp.get("description") or "")
-            keywords = json.loads(exp.get("keywords") or "[]")
-            kw_line = f"\n\n\\textit{{Keywords: {_e(', '.join(keywords))}}}" if keywords else ""
-            desc_line = f"\n\n{desc}" if desc else ""
-            items.append(
-                f"\\textbf{{{_e(exp['title'])}}} \\hfill {start} -- {end} \\\\\n"
-                f"\\textit{{{_e(exp['organization'])}}}"
-                f"{desc_line}{kw_line}"
-            )
-        exp_tex = "\\section{Experience}\n" + "\n\n\\medskip\n\n".join(items) + "\n"
-
-    # Projects
-    proj_tex = ""
-    if projects:
-        items = []
-        for proj in projects:
-            desc = _e(proj.get("description") or "")
-            keywords = json.loads(proj.get("keywords") or "[]")
-            kw_line = f"\n\n\\textit{{Keywords: {_e(', '.join(keywords))}}}" if keywords else ""
-            desc_line = f"\n\n{desc}" if desc else ""
-            items.append(
-                f"\\textbf{{{_e(proj['title'])}}}"
-                f"{desc_line}{kw_line}"
-            )
-        proj_tex = "\\section{Projects}\n" + "\n\n\\medskip\n\n".join(items) + "\n"
-
-    return rf"""
-\documentclass[{font_size}pt, a4paper]{{article}}
-\usepackage[margin=2cm]{{geometry}}
-\usepackage[T1]{{fontenc}}
-\usepackage{{lmodern}}
-\usepackage[hidelinks]{{hyperref}}
-\usepackage{{titlesec}}
-\usepackage{{parskip}}
-\usepackage{{xcolor}}
-
-\definecolor{{accent}}{{HTML}}{{2563EB}}
-
-\hypersetup{{colorlinks=true, urlcolor=accent}}
-
-\titleformat{{\section}}{{\large\bfseries\color{{accent}}}}{{}}{{0em}}{{}}[\titlerule]
-\titlespacing{{\section}}{{0pt}}{{1.2ex}}{{0.6ex}}
-
-\pagestyle{{empty}}
-
-\begin{{document}}
-
-\begin{{center}}
-  {{\LARGE\bfseries {name}}}\\[0.4em]
-  {contact_line}
-\end{{center}}
-
-\vspace{{0.5em}}
-
-{summary_tex}
-{skills_tex}
-{exp_tex}
-{proj_tex}
-{motivation_tex}
-{closing_tex}
-
-\end{{document}}
-""".strip()
+    pdflatex runs in a private scratch directory, so identical documents
+    compiled concurrently never share aux files; only the finished PDF and
+    its source are moved into the render cache.
+    """
+    out_dir = _output_dir()
+    db = get_db()
+    output_id = payload["outputId"]
+    pdf_url = f"/latex/download/{output_id}.pdf"
+    if render_cache.path_for(out_dir, output_id).exists():
+        # An identical document queued earlier has already been compiled.
+        render_cache.lookup(current_app, db, out_dir, payload["userId"], output_id)
+        return {"pdfUrl": pdf_url}
+
+    with tempfile.TemporaryDirectory(dir=out_dir, prefix=render_cache.SCRATCH_PREFIX) as work_dir:
+        progress(10)
+        try:
+            result = get_engine(current_app).compile(payload["tex"], Path(work_dir))
+        except subprocess.TimeoutExpired:
+            raise jobs.JobFailed("LaTeX compilation timed out")
+
+        pdf_path = Path(work_dir) / "cv.pdf"
+        if not pdf_path.exists():
+            raise jobs.JobFailed("LaTeX compilation failed", result.stdout[-2000:])
+        # The compiled cv.tex may be just the body; keep the whole document.
+        tex_path = Path(work_dir) / "document.tex"
+        tex_path.write_text(payload["tex"], encoding="utf-8")
+        render_cache.store(current_app, db, out_dir, payload["userId"], output_id, pdf_path, tex_path)
+
+    return {"pdfUrl": pdf_url}
 
 
 @bp.post("/latex/compile")
+@ratelimit.limit("RATE_LIMIT_IP", per=ratelimit.IP)
 @require_auth
+@ratelimit.limit("RATE_LIMIT_COMPILE")
 def compile_cv():
-    if not _pdflatex_available():
+    if not get_engine(current_app).available:
         return jsonify({"error": "pdflatex is not installed on this server"}), 501
 
     data = request.get_json(silent=True) or {}
     font_size = int(data.get("fontSize", 11))
+    template_id = data.get("templateId") or data.get("template") or tex_templates.DEFAULT_TEMPLATE
     blurb_ids = data.get("blurbIds", [])
     exp_ids = data.get("experienceIds", [])
     proj_ids = data.get("projectIds", [])
@@ -188,49 +105,81 @@ def compile_cv():
     experiences = fetch_by_ids("experiences", exp_ids)
     projects = fetch_by_ids("projects", proj_ids)
 
-    tex_content = _build_tex(profile, blurbs, experiences, projects, font_size)
-
-    out_dir = _output_dir()
-    job_id = str(uuid.uuid4())
-    tex_path = out_dir / f"{job_id}.tex"
-    tex_path.write_text(tex_content, encoding="utf-8")
-
-    result = subprocess.run(
-        [
-            "pdflatex",
-            "-interaction=nonstopmode",
-            "-output-directory", str(out_dir),
-            str(tex_path),
-        ],
-        capture_output=True,
-        text=True,
-        timeout=30,
+    try:
+        tex_content = _build_tex(profile, blurbs, experiences, projects, font_size, template_id)
+    except tex_templates.UnknownTemplate:
+        return jsonify({"error": f"Unknown template: {template_id}"}), 400
+
+    output_id = render_cache.digest(tex_content)
+    if render_cache.lookup(current_app, db, _output_dir(), g.user_id, output_id):
+        return jsonify({
+            "status": "done",
+            "pdfUrl": f"/latex/download/{output_id}.pdf",
+            "cached": True,
+        }), 200
+
+    job_id = get_queue(current_app).enqueue(
+        db, "latex", g.user_id, {"tex": tex_content, "outputId": output_id, "userId": g.user_id},
+        max_pending=current_app.config["LATEX_PENDING_PER_USER"],
     )
+    if job_id is None:
+        return ratelimit.too_many("Your previous compiles are still running, please retry shortly")
+    return jsonify({
+        "jobId": job_id,
+        "status": "queued",
+        "statusUrl": f"/latex/jobs/{job_id}",
+    }), 202
+
 
-    pdf_path = out_dir / f"{job_id}.pdf"
-    if not pdf_path.exists():
-        return jsonify({"error": "LaTeX compilation failed", "details": result.stdout[-2000:]}), 500
+@bp.get("/latex/templates")
+@require_auth
+def list_templates():
+    return jsonify({
+        "templates": tex_templates.template_ids(current_app),
+        "default": tex_templates.DEFAULT_TEMPLATE,
+    }), 200
 
-    return jsonify({"pdfUrl": f"/latex/download/{job_id}.pdf"}), 200
+
+@bp.get("/latex/jobs/<job_id>")
+@require_auth
+def compile_status(job_id: str):
+    job = get_queue(current_app).get(get_db(), job_id, g.user_id)
+    if job is None or job["kind"] != "latex":
+        return jsonify({"error": "Job not found"}), 404
+    return jsonify(job), 200
+
+
+def _stored_file(filename: str, suffix: str):
+    """Resolve ``<key>.pdf`` to the caller's stored file with ``suffix``."""
+    key, ext = filename.rsplit(".", 1) if "." in filename else (filename, "")
+    if ext != "pdf" or not render_cache.KEY_RE.fullmatch(key):
+        return None, (jsonify({"error": "Invalid filename"}), 400)
+    path = render_cache.open_owned(get_db(), _output_dir(), g.user_id, key, suffix)
+    if path is None:
+        return None, (jsonify({"error": "File not found"}), 404)
+    return path, None
 
 
 @bp.get("/latex/download/<filename>")
 @require_auth
 def download_pdf(filename: str):
-    if not filename.endswith(".pdf") or "/" in filename or ".." in filename:
-        return jsonify({"error": "Invalid filename"}), 400
-    path = _output_dir() / filename
-    if not path.exists():
-        return jsonify({"error": "File not found"}), 404
+    path, error = _stored_file(filename, ".pdf")
+    if error:
+        return error
     return send_file(path, mimetype="application/pdf", as_attachment=True, download_name="cv.pdf")
 
 
 @bp.get("/latex/download-tex/<filename>")
 @require_auth
 def download_tex(filename: str):
-    if not filename.endswith(".pdf") or "/" in filename or ".." in filename:
-        return jsonify({"error": "Invalid filename"}), 400
-    tex_path = _output_dir() / filename.replace(".pdf", ".tex")
-    if not tex_path.exists():
-        return jsonify({"error": "File not found"}), 404
+    tex_path, error = _stored_file(filename, ".tex")
+    if error:
+        return error
     return send_file(tex_path, mimetype="text/plain", as_attachment=True, download_name="cv.tex")
+
+
+@bp.cli.command("sweep")
+def sweep_compiled():
+    """Apply the compiled PDF retention policy now (also runs periodically)."""
+    stats = render_cache.sweep(current_app, get_db(), _output_dir())
+    click.echo(json.dumps(stats))
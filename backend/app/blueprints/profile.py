@@ -1,11 +1,15 @@
+import hashlib
 import uuid
 from pathlib import Path
 
 from flask import Blueprint, current_app, g, jsonify, request, send_from_directory
 from werkzeug.utils import secure_filename
 
+from app import pagination
 from app.auth_utils import require_auth
 from app.db import get_db
+from app.etags import conditional
+from app.pagination import Field, Listing
 
 bp = Blueprint("profile", __name__)
 
@@ -36,7 +40,7 @@ def _ensure_profile(db, user_id: str) -> None:
 
 
 def _photos_dir() -> Path:
-    d = Path(current_app.instance_path) / "uploads" / "photos"
+    d = Path(current_app.config["PHOTOS_DIR"])
     d.mkdir(parents=True, exist_ok=True)
     return d
 
@@ -45,17 +49,33 @@ def _allowed(filename: str) -> bool:
     return "." in filename and filename.rsplit(".", 1)[1].lower() in ALLOWED_EXTENSIONS
 
 
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        while chunk := f.read(64 * 1024):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+PHOTO_LISTING = Listing(
+    table="photos",
+    fields={
+        "id": Field("id"),
+        "filename": Field("filename"),
+        "isMain": Field("is_main", bool),
+        "url": Field("id", lambda v: f"/profile/photos/{v}/file"),
+    },
+    order=("is_main", "id"),
+)
+
+
 def _photo_to_dict(row) -> dict:
-    return {
-        "id": row["id"],
-        "filename": row["filename"],
-        "isMain": bool(row["is_main"]),
-        "url": f"/profile/photos/{row['id']}/file",
-    }
+    return PHOTO_LISTING.to_dict(row)
 
 
 @bp.get("/profile")
 @require_auth
+@conditional("profile")
 def get_profile():
     db = get_db()
     _ensure_profile(db, g.user_id)
@@ -104,13 +124,13 @@ def save_profile():
 
 @bp.get("/profile/photos")
 @require_auth
+@conditional("photos")
 def list_photos():
-    db = get_db()
-    rows = db.execute(
-        "SELECT * FROM photos WHERE user_id = ? ORDER BY is_main DESC",
-        (g.user_id,),
-    ).fetchall()
-    return jsonify([_photo_to_dict(r) for r in rows]), 200
+    try:
+        result = pagination.page(get_db(), PHOTO_LISTING, request.args, "user_id = ?", (g.user_id,))
+    except pagination.InvalidPage as exc:
+        return jsonify({"error": {"code": "INVALID_PAGE", "message": str(exc)}}), 400
+    return pagination.response(result)
 
 
 @bp.post("/profile/photos")
@@ -126,7 +146,8 @@ def upload_photo():
     photo_id = str(uuid.uuid4())
     filename = f"{photo_id}.{ext}"
 
-    file.save(str(_photos_dir() / filename))
+    path = _photos_dir() / filename
+    file.save(str(path))
 
     db = get_db()
     count = db.execute(
@@ -135,8 +156,8 @@ def upload_photo():
     is_main = 1 if count == 0 else 0
 
     db.execute(
-        "INSERT INTO photos (id, user_id, filename, is_main) VALUES (?, ?, ?, ?)",
-        (photo_id, g.user_id, filename, is_main),
+        "INSERT INTO photos (id, user_id, filename, is_main, sha256) VALUES (?, ?, ?, ?, ?)",
+        (photo_id, g.user_id, filename, is_main, _sha256(path)),
     )
     db.commit()
     row = db.execute("SELECT * FROM photos WHERE id = ?", (photo_id,)).fetchone()
@@ -189,4 +210,15 @@ def serve_photo(photo_id: str):
     if not row:
         return jsonify({"error": {"code": "NOT_FOUND", "message": "Photo not found"}}), 404
 
-    return send_from_directory(str(_photos_dir()), row["filename"])
+    # Revalidation (If-None-Match / If-Modified-Since) is answered by
+    # send_file against the stored checksum and the file's mtime.
+    res = send_from_directory(
+        str(_photos_dir()),
+        row["filename"],
+        etag=row["sha256"] or True,
+        max_age=current_app.config["PHOTO_CACHE_MAX_AGE"],
+    )
+    res.cache_control.public = False
+    res.cache_control.private = True
+    res.vary.add("Authorization")
+    return res
@@ -3,29 +3,41 @@ import uuid
 
 from flask import Blueprint, g, jsonify, request
 
+from app import pagination
 from app.auth_utils import require_auth
 from app.db import get_db
+from app.etags import conditional
+from app.pagination import Field, Listing
 
 bp = Blueprint("projects", __name__)
 
+# Projects list in the order they were added (created_at is set by a trigger).
+LISTING = Listing(
+    table="projects",
+    fields={
+        "id": Field("id"),
+        "title": Field("title"),
+        "description": Field("description", lambda v: v or ""),
+        "keywords": Field("keywords", json.loads),
+    },
+    order=("created_at", "id"),
+    descending=False,
+)
+
 
 def _row_to_dict(row) -> dict:
-    return {
-        "id": row["id"],
-        "title": row["title"],
-        "description": row["description"] or "",
-        "keywords": json.loads(row["keywords"]),
-    }
+    return LISTING.to_dict(row)
 
 
 @bp.get("/projects")
 @require_auth
+@conditional("projects")
 def list_projects():
-    db = get_db()
-    rows = db.execute(
-        "SELECT * FROM projects WHERE user_id = ?", (g.user_id,)
-    ).fetchall()
-    return jsonify([_row_to_dict(r) for r in rows]), 200
+    try:
+        result = pagination.page(get_db(), LISTING, request.args, "user_id = ?", (g.user_id,))
+    except pagination.InvalidPage as exc:
+        return jsonify({"error": str(exc)}), 400
+    return pagination.response(result)
 
 
 @bp.post("/projects")
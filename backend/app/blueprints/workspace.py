@@ -0,0 +1,75 @@
+"""GET /workspace: everything the CV builder shows, in one request.
+
+The pages used to fetch /profile, /profile/photos, /experiences, /projects,
+/blurbs and /job-descriptions separately, each paying for authentication,
+a pooled connection and a query. This endpoint reads the sections named in
+``include`` (all of them by default) on one connection inside one read
+transaction, so they form a consistent snapshot: an experience saved while
+the page loads appears in every section or in none. ``cursor`` is the
+change sequence (see app/sync.py) the snapshot was taken at.
+
+Each section has the same shape as the corresponding list endpoint.
+"""
+from flask import Blueprint, g, jsonify, request
+
+from app import pagination, sync
+from app.auth_utils import require_auth
+from app.blueprints import blurbs, experiences, job_descriptions, projects
+from app.blueprints.profile import PHOTO_LISTING, _ensure_profile
+from app.blueprints.profile import _row_to_dict as _profile_to_dict
+from app.db import get_db
+
+bp = Blueprint("workspace", __name__)
+
+LISTINGS = {
+    "photos": PHOTO_LISTING,
+    "experiences": experiences.LISTING,
+    "projects": projects.LISTING,
+    "blurbs": blurbs.LISTING,
+    "jobDescriptions": job_descriptions.LISTING,
+}
+SECTIONS = ("profile", *LISTINGS)
+
+
+def _include(raw: str | None) -> list[str]:
+    if not raw:
+        return list(SECTIONS)
+    names = [n.strip() for n in raw.split(",") if n.strip()]
+    unknown = [n for n in names if n not in SECTIONS]
+    if unknown:
+        raise ValueError(
+            f"unknown section(s) {', '.join(unknown)}; available: {', '.join(SECTIONS)}"
+        )
+    return list(dict.fromkeys(names))
+
+
+@bp.get("/workspace")
+@require_auth
+def get_workspace():
+    try:
+        sections = _include(request.args.get("include"))
+    except ValueError as exc:
+        return jsonify({"error": {"code": "INVALID_INCLUDE", "message": str(exc)}}), 400
+
+    db = get_db()
+    if "profile" in sections:
+        # The only write; done before the snapshot so the read stays read-only.
+        _ensure_profile(db, g.user_id)
+
+    body = {}
+    db.execute("BEGIN")
+    try:
+        body["cursor"] = sync.current_cursor(db)
+        for name in sections:
+            if name == "profile":
+                row = db.execute(
+                    "SELECT * FROM profiles WHERE user_id = ?", (g.user_id,)
+                ).fetchone()
+                body[name] = _profile_to_dict(row)
+            else:
+                body[name] = pagination.page(
+                    db, LISTINGS[name], {}, "user_id = ?", (g.user_id,)
+                ).items
+    finally:
+        db.commit()
+    return jsonify(body), 200
@@ -0,0 +1,48 @@
+import threading
+from contextlib import contextmanager
+from typing import Hashable, Iterator
+
+
+class SlotsExhausted(Exception):
+    """No slot became free within the timeout."""
+
+
+class KeyedSemaphore:
+    """At most ``limit`` concurrent holders per key (e.g. per user).
+
+    Per-key state is created on first acquire and dropped once the last
+    holder releases, so memory stays proportional to active keys only.
+    """
+
+    def __init__(self, limit: int):
+        self.limit = limit
+        self._cond = threading.Condition()
+        self._held: dict[Hashable, int] = {}
+
+    def acquire(self, key: Hashable, timeout: float | None = None) -> None:
+        with self._cond:
+            ok = self._cond.wait_for(lambda: self._held.get(key, 0) < self.limit, timeout)
+            if not ok:
+                raise SlotsExhausted(key)
+            self._held[key] = self._held.get(key, 0) + 1
+
+    def release(self, key: Hashable) -> None:
+        with self._cond:
+            remaining = self._held[key] - 1
+            if remaining:
+                self._held[key] = remaining
+            else:
+                del self._held[key]
+            self._cond.notify_all()
+
+    @contextmanager
+    def hold(self, key: Hashable, timeout: float | None = None) -> Iterator[None]:
+        self.acquire(key, timeout)
+        try:
+            yield
+        finally:
+            self.release(key)
+
+    def in_use(self, key: Hashable) -> int:
+        with self._cond:
+            return self._held.get(key, 0)
@@ -0,0 +1,497 @@
+"""Import a /export archive into one account, all or nothing.
+
+In ``replace`` mode the archive becomes the account's entire data set. In
+``merge`` mode (for delta exports, see app/sync.py) rows are upserted by id,
+only rows whose content differs are written, rows listed under ``deleted``
+are removed, and everything else is left alone; the last import wins.
+
+The pipeline never holds the whole upload in memory:
+
+1. ``spool`` copies the upload into a temporary file (kept in memory up to
+   IMPORT_SPOOL_MEMORY bytes) that ``zipfile`` can seek in.
+2. ``load`` reads data.json and validates every entity before anything is
+   written, turning it into ready-to-insert row tuples.
+3. ``stage_photos`` streams each photo out of the archive into PHOTOS_DIR
+   under a fresh name, so it cannot clash with another account's files. A
+   photo whose checksum matches the stored copy is not extracted again.
+4. ``apply`` writes the rows with one ``executemany`` per table inside a
+   single transaction. On any error the transaction is rolled back and the
+   staged photos are removed, leaving the account as it was.
+
+Photo files replaced by the import are deleted only after the commit.
+"""
+import hashlib
+import json
+import re
+import shutil
+import sqlite3
+import tempfile
+import uuid
+import zipfile
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO
+
+from flask import Flask
+
+from app.metrics import Counters, counters
+from app.sync import TRACKED
+
+CHUNK_SIZE = 64 * 1024
+MODES = ("replace", "merge")
+CATEGORIES = ("work", "education", "hobby")
+BLURB_TYPES = ("summary", "skills", "motivation", "closing")
+PHOTO_EXTENSIONS = frozenset({"jpg", "jpeg", "png", "gif", "webp"})
+# At most this many validation messages are reported back.
+MAX_ERRORS = 20
+
+_PROFILE_FIELDS = ("email", "phone", "location", "website", "linkedin", "github")
+_SHA256 = re.compile(r"[0-9a-f]{64}")
+# Columns written per table, after id and user_id, in the order of Payload rows.
+_COLUMNS = {
+    "photos": ("filename", "is_main", "sha256"),
+    "experiences": (
+        "category", "title", "organization", "start_date", "end_date", "description", "keywords",
+    ),
+    "projects": ("title", "description", "keywords", "created_at"),
+    "job_descriptions": ("title", "company", "description", "analysis_json", "created_at"),
+    "blurbs": ("type", "content", "job_description_id", "created_at"),
+}
+
+
+class ImportRejected(ValueError):
+    """The archive cannot be imported; nothing was written."""
+
+    def __init__(self, code: str, message: str, details: list[str] | None = None):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.details = details or []
+
+
+@dataclass
+class Payload:
+    """Validated rows from data.json, without user_id (added by ``apply``)."""
+
+    profile: tuple | None = None
+    # (id, arcname, extension, is_main, sha256 or None)
+    photos: list[tuple] = field(default_factory=list)
+    experiences: list[tuple] = field(default_factory=list)
+    projects: list[tuple] = field(default_factory=list)
+    job_descriptions: list[tuple] = field(default_factory=list)
+    blurbs: list[tuple] = field(default_factory=list)
+    # table -> ids to delete (merge mode only)
+    deleted: dict[str, list[str]] = field(default_factory=dict)
+
+
+def _counters(app: Flask) -> Counters:
+    return counters(app, "dataImport", "imports", "rejected", "rolledBack", "rows", "photos")
+
+
+def spool(stream: IO[bytes], max_memory: int) -> IO[bytes]:
+    """Copy an upload stream into a seekable temporary file."""
+    spooled = tempfile.SpooledTemporaryFile(max_size=max_memory)
+    shutil.copyfileobj(stream, spooled, CHUNK_SIZE)
+    spooled.seek(0)
+    return spooled
+
+
+class _Validator:
+    def __init__(self):
+        self.errors: list[str] = []
+
+    def fail(self, where: str, message: str) -> None:
+        self.errors.append(f"{where}: {message}")
+
+    def items(self, data: dict, key: str) -> list[tuple[str, dict]]:
+        value = data.get(key, [])
+        if not isinstance(value, list):
+            self.fail(key, "must be a list")
+            return []
+        out = []
+        for i, item in enumerate(value):
+            if isinstance(item, dict):
+                out.append((f"{key}[{i}]", item))
+            else:
+                self.fail(f"{key}[{i}]", "must be an object")
+        return out
+
+    def text(self, where: str, item: dict, name: str, required: bool = True) -> str | None:
+        value = item.get(name)
+        if value is None or (required and value == ""):
+            if required:
+                self.fail(f"{where}.{name}", "is required")
+            return None
+        if not isinstance(value, str):
+            self.fail(f"{where}.{name}", "must be a string")
+            return None
+        return value
+
+    def keywords(self, where: str, item: dict) -> str:
+        value = item.get("keywords") or []
+        if not isinstance(value, list) or not all(isinstance(k, str) for k in value):
+            self.fail(f"{where}.keywords", "must be a list of strings")
+            return "[]"
+        return json.dumps(value)
+
+    def row_id(self, where: str, item: dict, seen: set) -> str:
+        value = item.get("id") or str(uuid.uuid4())
+        if not isinstance(value, str):
+            self.fail(f"{where}.id", "must be a string")
+        elif value in seen:
+            self.fail(f"{where}.id", f"duplicate id {value!r}")
+        else:
+            seen.add(value)
+        return value
+
+
+def validate(data, known_job_ids=frozenset()) -> Payload:
+    """Check the whole of data.json and build its rows, or raise ImportRejected.
+
+    Blurbs may reference job descriptions in the payload or in ``known_job_ids``.
+    """
+    if not isinstance(data, dict):
+        raise ImportRejected("INVALID_DATA", "data.json must contain an object")
+    v = _Validator()
+    payload = Payload()
+
+    profile = data.get("profile") or {}
+    if not isinstance(profile, dict):
+        v.fail("profile", "must be an object")
+    elif profile:
+        names = (
+            profile.get("first_name") or profile.get("firstName"),
+            profile.get("last_name") or profile.get("lastName"),
+        )
+        payload.profile = (*names, *(profile.get(f) for f in _PROFILE_FIELDS))
+        for name, value in zip(("first_name", "last_name", *_PROFILE_FIELDS), payload.profile):
+            if value is not None and not isinstance(value, str):
+                v.fail(f"profile.{name}", "must be a string")
+
+    seen: set = set()
+    for where, photo in v.items(data, "photos"):
+        photo_id = v.row_id(where, photo, seen)
+        filename = v.text(where, photo, "filename")
+        if filename is None:
+            continue
+        ext = filename.rsplit(".", 1)[-1].lower() if "." in filename else ""
+        if ext not in PHOTO_EXTENSIONS:
+            v.fail(f"{where}.filename", "must be a jpg, jpeg, png, gif or webp image")
+            continue
+        checksum = photo.get("sha256")
+        if checksum is not None and not (isinstance(checksum, str) and _SHA256.fullmatch(checksum)):
+            v.fail(f"{where}.sha256", "must be a lowercase hex SHA-256 digest")
+        payload.photos.append(
+            (photo_id, f"photos/{filename}", ext, 1 if photo.get("isMain") else 0, checksum)
+        )
+
+    seen = set()
+    for where, exp in v.items(data, "experiences"):
+        category = exp.get("category")
+        if category not in CATEGORIES:
+            v.fail(f"{where}.category", f"must be one of {', '.join(CATEGORIES)}")
+        payload.experiences.append((
+            v.row_id(where, exp, seen),
+            category,
+            v.text(where, exp, "title"),
+            v.text(where, exp, "organization"),
+            v.text(where, exp, "start_date"),
+            v.text(where, exp, "end_date", required=False),
+            v.text(where, exp, "description", required=False),
+            v.keywords(where, exp),
+        ))
+
+    seen = set()
+    for where, proj in v.items(data, "projects"):
+        payload.projects.append((
+            v.row_id(where, proj, seen),
+            v.text(where, proj, "title"),
+            v.text(where, proj, "description", required=False),
+            v.keywords(where, proj),
+            v.text(where, proj, "created_at", required=False) or None,
+        ))
+
+    seen = set()
+    for where, jd in v.items(data, "jobDescriptions"):
+        analysis = jd.get("analysisJson")
+        payload.job_descriptions.append((
+            v.row_id(where, jd, seen),
+            v.text(where, jd, "title"),
+            v.text(where, jd, "company"),
+            v.text(where, jd, "description"),
+            json.dumps(analysis) if analysis else None,
+            v.text(where, jd, "created_at", required=False) or None,
+        ))
+    job_ids = seen
+
+    seen = set()
+    for where, blurb in v.items(data, "blurbs"):
+        blurb_type = blurb.get("type")
+        if blurb_type not in BLURB_TYPES:
+            v.fail(f"{where}.type", f"must be one of {', '.join(BLURB_TYPES)}")
+        job_id = blurb.get("job_description_id")
+        if job_id is not None and not (
+            isinstance(job_id, str) and (job_id in job_ids or job_id in known_job_ids)
+        ):
+            v.fail(f"{where}.job_description_id", f"unknown job description {job_id!r}")
+        payload.blurbs.append((
+            v.row_id(where, blurb, seen),
+            blurb_type,
+            v.text(where, blurb, "content"),
+            job_id,
+            v.text(where, blurb, "created_at", required=False) or None,
+        ))
+
+    deleted = data.get("deleted") or {}
+    if not isinstance(deleted, dict):
+        v.fail("deleted", "must be an object")
+        deleted = {}
+    for table, ids in deleted.items():
+        if table not in TRACKED:
+            v.fail(f"deleted.{table}", "is not a tracked table")
+        elif not isinstance(ids, list) or not all(isinstance(i, str) for i in ids):
+            v.fail(f"deleted.{table}", "must be a list of ids")
+        else:
+            payload.deleted[table] = ids
+
+    if v.errors:
+        raise ImportRejected(
+            "INVALID_DATA",
+            f"data.json has {len(v.errors)} invalid field(s)",
+            v.errors[:MAX_ERRORS],
+        )
+    return payload
+
+
+def load(zf: zipfile.ZipFile, known_job_ids=frozenset()) -> Payload:
+    try:
+        raw = zf.read("data.json")
+    except KeyError:
+        raise ImportRejected("MISSING_DATA", "data.json not found in zip") from None
+    try:
+        data = json.loads(raw)
+    except ValueError:
+        raise ImportRejected("INVALID_DATA", "data.json is not valid JSON") from None
+    return validate(data, known_job_ids)
+
+
+def _extract(zf: zipfile.ZipFile, info: zipfile.ZipInfo, dest: Path, max_bytes: int) -> str:
+    """Stream one member to ``dest``, enforcing the size limit; return its SHA-256."""
+    if info.file_size > max_bytes:
+        raise ImportRejected("PHOTO_TOO_LARGE", f"{info.filename} is larger than {max_bytes} bytes")
+    digest = hashlib.sha256()
+    copied = 0
+    with zf.open(info) as src, open(dest, "wb") as out:
+        while chunk := src.read(CHUNK_SIZE):
+            copied += len(chunk)
+            if copied > max_bytes:
+                raise ImportRejected("PHOTO_TOO_LARGE", f"{info.filename} is larger than {max_bytes} bytes")
+            digest.update(chunk)
+            out.write(chunk)
+    return digest.hexdigest()
+
+
+def stage_photos(
+    zf: zipfile.ZipFile,
+    payload: Payload,
+    photos_dir: Path,
+    max_bytes: int,
+    existing: dict[str, sqlite3.Row],
+) -> tuple[list[tuple], list[Path]]:
+    """Extract the payload's photos; return their rows and the files written.
+
+    ``existing`` maps the account's photo ids to their current rows. A photo
+    whose declared checksum matches its stored one keeps its file, as does a
+    photo listed in data.json but missing from the archive (a delta export
+    only carries changed files, and a full export leaves out files that were
+    already gone).
+    """
+    members = {info.filename: info for info in zf.infolist()}
+    rows, written = [], []
+    try:
+        for photo_id, arcname, ext, is_main, checksum in payload.photos:
+            current = existing.get(photo_id)
+            info = members.get(arcname)
+            if current is not None and (
+                info is None or (checksum and checksum == current["sha256"])
+            ) and (photos_dir / current["filename"]).exists():
+                rows.append((photo_id, current["filename"], is_main, current["sha256"]))
+                continue
+            filename = f"{uuid.uuid4()}.{ext}"
+            if info is None:
+                rows.append((photo_id, filename, is_main, checksum))
+                continue
+            dest = photos_dir / filename
+            written.append(dest)
+            actual = _extract(zf, info, dest, max_bytes)
+            if checksum and checksum != actual:
+                raise ImportRejected("CHECKSUM_MISMATCH", f"{arcname} does not match its sha256")
+            rows.append((photo_id, filename, is_main, actual))
+    except zipfile.BadZipFile as exc:
+        _remove(written)
+        raise ImportRejected("BAD_ZIP", f"Corrupt archive member: {exc}") from None
+    except BaseException:
+        _remove(written)
+        raise
+    return rows, written
+
+
+def _remove(paths) -> None:
+    for path in paths:
+        path.unlink(missing_ok=True)
+
+
+def _insert_sql(table: str, upsert: bool) -> str:
+    cols = _COLUMNS[table]
+    values = ", ".join("COALESCE(?, datetime('now'))" if c == "created_at" else "?" for c in cols)
+    sql = f"INSERT INTO {table} (id, user_id, {', '.join(cols)}) VALUES (?, ?, {values})"
+    if upsert:
+        # created_at keeps its stored value; rows whose content is unchanged are not written.
+        updated = [c for c in cols if c != "created_at"]
+        sql += (
+            f" ON CONFLICT(id) DO UPDATE SET {', '.join(f'{c} = excluded.{c}' for c in updated)}"
+            f" WHERE {table}.user_id = excluded.user_id AND ("
+            + " OR ".join(f"{table}.{c} IS NOT excluded.{c}" for c in updated)
+            + ")"
+        )
+    return sql
+
+
+def _ids_owned_by_others(db: sqlite3.Connection, table: str, user_id: str, ids: list[str]) -> list[str]:
+    return [
+        r["id"]
+        for r in db.execute(
+            f"SELECT id FROM {table} WHERE user_id != ? AND id IN (SELECT value FROM json_each(?))",
+            (user_id, json.dumps(ids)),
+        )
+    ]
+
+
+def apply(
+    db: sqlite3.Connection, user_id: str, payload: Payload, photo_rows: list[tuple], mode: str
+) -> tuple[dict, set[str]]:
+    """Write the payload in one transaction.
+
+    Returns a summary of rows written and deleted per table, and the photo
+    files no longer referenced once the transaction has committed.
+    """
+    rows = {
+        "photos": photo_rows,
+        "experiences": payload.experiences,
+        "projects": payload.projects,
+        "job_descriptions": payload.job_descriptions,
+        "blurbs": payload.blurbs,
+    }
+    summary = {"changed": {}, "deleted": {}}
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        old_photos = {
+            r["filename"]
+            for r in db.execute("SELECT filename FROM photos WHERE user_id = ?", (user_id,))
+        }
+        if payload.profile is not None:
+            db.execute(
+                "INSERT OR IGNORE INTO profiles (id, user_id) VALUES (?, ?)",
+                (str(uuid.uuid4()), user_id),
+            )
+            db.execute(
+                """UPDATE profiles SET
+                    first_name = ?, last_name = ?, email = ?,
+                    phone = ?, location = ?, website = ?,
+                    linkedin = ?, github = ?,
+                    updated_at = datetime('now')
+                WHERE user_id = ?""",
+                (*payload.profile, user_id),
+            )
+
+        merge = mode == "merge"
+        if merge:
+            for table in TRACKED:
+                taken = _ids_owned_by_others(db, table, user_id, [r[0] for r in rows[table]])
+                if taken:
+                    raise ImportRejected(
+                        "CONFLICT", f"{table} ids belong to another account: {', '.join(taken[:5])}"
+                    )
+        # Deletes first (blurbs before the job descriptions they reference),
+        # so a row deleted and then re-created in the same payload survives.
+        for table in reversed(TRACKED):
+            if merge:
+                cur = db.executemany(
+                    f"DELETE FROM {table} WHERE id = ? AND user_id = ?",
+                    [(row_id, user_id) for row_id in payload.deleted.get(table, [])],
+                )
+            else:
+                cur = db.execute(f"DELETE FROM {table} WHERE user_id = ?", (user_id,))
+            summary["deleted"][table] = max(cur.rowcount, 0)
+        for table in TRACKED:
+            cur = db.executemany(
+                _insert_sql(table, upsert=merge),
+                [(r[0], user_id, *r[1:]) for r in rows[table]],
+            )
+            summary["changed"][table] = max(cur.rowcount, 0)
+
+        new_photos = {
+            r["filename"]
+            for r in db.execute("SELECT filename FROM photos WHERE user_id = ?", (user_id,))
+        }
+        db.commit()
+    except BaseException:
+        db.rollback()
+        raise
+    return summary, old_photos - new_photos
+
+
+def import_archive(
+    app: Flask,
+    db: sqlite3.Connection,
+    user_id: str,
+    upload: IO[bytes],
+    photos_dir: Path,
+    mode: str = "replace",
+) -> dict:
+    """Run the whole pipeline and return apply()'s summary.
+
+    Raises ImportRejected if nothing could be imported.
+    """
+    stats = _counters(app)
+    existing = {
+        r["id"]: r
+        for r in db.execute("SELECT id, filename, sha256 FROM photos WHERE user_id = ?", (user_id,))
+    }
+    known_job_ids = frozenset()
+    if mode == "merge":
+        known_job_ids = frozenset(
+            r["id"] for r in db.execute("SELECT id FROM job_descriptions WHERE user_id = ?", (user_id,))
+        )
+    with spool(upload, app.config["IMPORT_SPOOL_MEMORY"]) as spooled:
+        try:
+            zf = zipfile.ZipFile(spooled)
+        except zipfile.BadZipFile:
+            stats.incr("rejected")
+            raise ImportRejected("BAD_ZIP", "Not a valid zip file") from None
+        with zf:
+            try:
+                payload = load(zf, known_job_ids)
+                photo_rows, written = stage_photos(
+                    zf, payload, photos_dir, app.config["IMPORT_MAX_PHOTO_BYTES"], existing
+                )
+            except ImportRejected:
+                stats.incr("rejected")
+                raise
+    try:
+        summary, unreferenced = apply(db, user_id, payload, photo_rows, mode)
+    except (ImportRejected, sqlite3.IntegrityError) as exc:
+        _remove(written)
+        stats.incr("rolledBack")
+        if isinstance(exc, ImportRejected):
+            raise
+        raise ImportRejected("CONFLICT", f"Import conflicts with existing data: {exc}") from None
+    except BaseException:
+        _remove(written)
+        stats.incr("rolledBack")
+        raise
+    _remove(photos_dir / name for name in unreferenced)
+    stats.incr("imports")
+    stats.incr("rows", sum(summary["changed"].values()) + sum(summary["deleted"].values()))
+    stats.incr("photos", len(written))
+    return summary
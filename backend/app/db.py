@@ -1,33 +1,245 @@
+import os
 import sqlite3
+import threading
 from pathlib import Path
 
 from flask import Flask, g, current_app
 
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+
+
+class ConnectionPool:
+    """A pool of reusable SQLite connections for one database.
+
+    Each request borrows a connection for its lifetime and hands it back on
+    teardown. Up to ``size`` idle connections are kept warm (page cache, mmap,
+    compiled statements); connections borrowed beyond that are closed on
+    release instead of being pooled. Connections may move between worker
+    threads, but are only ever used by one request at a time.
+    """
+
+    def __init__(
+        self,
+        database: str,
+        size: int = 8,
+        journal_mode: str = "WAL",
+        synchronous: str = "NORMAL",
+        mmap_size: int = 0,
+        cache_size: int = -2000,
+        busy_timeout: int = 5000,
+    ):
+        self.database = database
+        self.size = size
+        self._pragmas = [
+            "PRAGMA foreign_keys = ON",
+            f"PRAGMA busy_timeout = {int(busy_timeout)}",
+            f"PRAGMA journal_mode = {journal_mode}",
+            f"PRAGMA synchronous = {synchronous}",
+            f"PRAGMA mmap_size = {int(mmap_size)}",
+            f"PRAGMA cache_size = {int(cache_size)}",
+        ]
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._pid = os.getpid()
+        self._idle: list[sqlite3.Connection] = []
+        self._in_use = 0
+        self._created = 0
+        self._reused = 0
+        self._closed = 0
+        self._health_check_failures = 0
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.database,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            check_same_thread=False,
+        )
+        conn.row_factory = sqlite3.Row
+        for pragma in self._pragmas:
+            conn.execute(pragma)
+        return conn
+
+    @staticmethod
+    def _healthy(conn: sqlite3.Connection) -> bool:
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def acquire(self) -> sqlite3.Connection:
+        """Borrow a connection, reusing the most recently released one."""
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked worker (e.g. gunicorn pre-fork): connections inherited
+                # from the parent must not be used, so start from scratch.
+                self._reset()
+            while self._idle:
+                conn = self._idle.pop()
+                if self._healthy(conn):
+                    self._reused += 1
+                    self._in_use += 1
+                    return conn
+                self._health_check_failures += 1
+                self._discard(conn)
+            self._created += 1
+            self._in_use += 1
+        return self._connect()
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """Return a borrowed connection, rolling back anything left uncommitted."""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            with self._lock:
+                self._in_use -= 1
+                self._health_check_failures += 1
+                self._discard(conn)
+            return
+        with self._lock:
+            self._in_use -= 1
+            if self._pid == os.getpid() and len(self._idle) < self.size:
+                self._idle.append(conn)
+            else:
+                self._discard(conn)
+
+    def _discard(self, conn: sqlite3.Connection) -> None:
+        self._closed += 1
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def close(self) -> None:
+        """Close every idle connection."""
+        with self._lock:
+            while self._idle:
+                self._discard(self._idle.pop())
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "pid": self._pid,
+                "size": self.size,
+                "idle": len(self._idle),
+                "inUse": self._in_use,
+                "created": self._created,
+                "reused": self._reused,
+                "closed": self._closed,
+                "healthCheckFailures": self._health_check_failures,
+            }
+
+
+def get_pool(app: Flask) -> ConnectionPool:
+    """Return the connection pool for ``app``, creating it on first use."""
+    pool = app.extensions.get("db_pool")
+    if pool is None:
+        pool = ConnectionPool(
+            app.config["DATABASE"],
+            size=app.config["DB_POOL_SIZE"],
+            journal_mode=app.config["DB_JOURNAL_MODE"],
+            synchronous=app.config["DB_SYNCHRONOUS"],
+            mmap_size=app.config["DB_MMAP_SIZE"],
+            cache_size=app.config["DB_CACHE_SIZE"],
+            busy_timeout=app.config["DB_BUSY_TIMEOUT"],
+        )
+        app.extensions["db_pool"] = pool
+    return pool
+
 
 def get_db() -> sqlite3.Connection:
     """Return the database connection for the current request context."""
     if "db" not in g:
-        g.db = sqlite3.connect(
-            current_app.config["DATABASE"],
-            detect_types=sqlite3.PARSE_DECLTYPES,
-        )
-        g.db.row_factory = sqlite3.Row
-        g.db.execute("PRAGMA foreign_keys = ON")
+        g.db = get_pool(current_app).acquire()
     return g.db
 
 
 def close_db(e=None) -> None:
-    """Close the database connection at the end of the request."""
+    """Return the request's connection to the pool at the end of the request."""
     db = g.pop("db", None)
     if db is not None:
-        db.close()
+        get_pool(current_app).release(db)
+
+
+def _migrations() -> list[tuple[int, Path]]:
+    """Return (version, path) for every NNNN_name.sql file, in version order."""
+    found = [
+        (int(path.name.split("_", 1)[0]), path)
+        for path in MIGRATIONS_DIR.glob("[0-9]*_*.sql")
+    ]
+    return sorted(found)
+
+
+def _statements(script: str):
+    """Split a SQL script into complete statements (trigger bodies included)."""
+    buf = ""
+    for line in script.splitlines(keepends=True):
+        buf += line
+        if sqlite3.complete_statement(buf):
+            yield buf.strip()
+            buf = ""
+
+
+def migrate(db: sqlite3.Connection) -> list[int]:
+    """Apply pending migrations in one transaction; return the versions applied.
+
+    BEGIN IMMEDIATE takes the write lock before reading the current version,
+    so workers starting at the same time apply each migration exactly once.
+    """
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        current = db.execute(
+            "SELECT COALESCE(MAX(version), 0) FROM schema_version"
+        ).fetchone()[0]
+        applied = []
+        for version, path in _migrations():
+            if version <= current:
+                continue
+            for statement in _statements(path.read_text()):
+                db.execute(statement)
+            db.execute(
+                "INSERT INTO schema_version (version, name) VALUES (?, ?)",
+                (version, path.stem),
+            )
+            applied.append(version)
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    return applied
+
+
+def _stored_version(db: sqlite3.Connection) -> int | None:
+    """Return the applied schema version, or None for a fresh database."""
+    try:
+        return db.execute(
+            "SELECT COALESCE(MAX(version), 0) FROM schema_version"
+        ).fetchone()[0]
+    except sqlite3.OperationalError:
+        return None
+
+
+def latest_version() -> int:
+    migrations = _migrations()
+    return migrations[-1][0] if migrations else 0
 
 
 def init_db(app: Flask) -> None:
-    """Create all tables on first run (CREATE TABLE IF NOT EXISTS)."""
+    """Create all tables on first run, then apply pending migrations.
+
+    With FAST_STARTUP enabled the bootstrap is skipped entirely when the
+    database already records the latest migration, which is the common case
+    for every worker after the first.
+    """
     schema_path = Path(__file__).parent / "schema.sql"
     with app.app_context():
         db = get_db()
+        if app.config["FAST_STARTUP"] and _stored_version(db) == latest_version():
+            return
         with open(schema_path, "r") as f:
             db.executescript(f.read())
         db.commit()
+        migrate(db)
@@ -0,0 +1,65 @@
+"""Conditional GETs for the per-user list endpoints.
+
+Migration 0007 keeps a version per (user, collection) that triggers bump on
+every insert, real update and delete. ``@conditional("experiences")`` reads
+that one row before the view runs and derives a strong ETag from it, the
+user and the query string. When the request's If-None-Match already holds
+that ETag the view is skipped and a 304 is returned, so an unchanged list
+costs a primary-key lookup instead of the list query and its serialisation.
+
+The version is read before the view's query: a write landing in between
+gives a body newer than its ETag, which only means the next request
+revalidates in full. The reverse order could pin a stale body to a new ETag.
+"""
+import hashlib
+import sqlite3
+from functools import wraps
+
+from flask import current_app, g, make_response, request
+
+from app.db import get_db
+from app.metrics import counters
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def collection_version(db: sqlite3.Connection, user_id: str, collection: str) -> int:
+    row = db.execute(
+        "SELECT version FROM collection_versions WHERE user_id = ? AND collection = ?",
+        (user_id, collection),
+    ).fetchone()
+    return row["version"] if row else 0
+
+
+def etag_for(user_id: str, collection: str, version: int, variant: bytes = b"") -> str:
+    digest = hashlib.sha256(f"{user_id}\0{collection}\0{version}\0".encode() + variant)
+    return digest.hexdigest()[:32]
+
+
+def conditional(collection: str):
+    """Serve the view with an ETag for ``collection``; answer 304 when it matches.
+
+    Goes under ``@require_auth``, which sets ``g.user_id``.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapped(*args, **kwargs):
+            stats = counters(current_app, "etags", "notModified", "full")
+            version = collection_version(get_db(), g.user_id, collection)
+            tag = etag_for(g.user_id, collection, version, request.query_string)
+            if request.if_none_match.contains_weak(tag):
+                stats.incr("notModified")
+                res = make_response("", 304)
+            else:
+                res = make_response(view(*args, **kwargs))
+                if res.status_code != 200:
+                    return res
+                stats.incr("full")
+            res.set_etag(tag)
+            res.headers["Cache-Control"] = CACHE_CONTROL
+            res.vary.add("Authorization")
+            return res
+
+        return wrapped
+
+    return decorator
@@ -0,0 +1,83 @@
+"""Export archives written to disk by background jobs.
+
+An export job streams its ZIP (see app/zipstream.py) into a part file of
+its own, ``<id>.zip.<run>.part`` in EXPORT_DIR, hashing it on the way, and
+renames it to ``<id>.zip`` once complete, so a download never sees a partial
+archive and a re-queued job can never interleave writes with an earlier run. The SHA-256 is the
+archive's strong ETag, which lets clients resume an interrupted download
+with ``Range``/``If-Range``. Archives, and parts left by crashed jobs, are
+deleted EXPORT_ARCHIVE_TTL seconds after they were written, and so are the
+finished export jobs that point at them.
+"""
+import hashlib
+import os
+import time
+import uuid
+from pathlib import Path
+from typing import Iterable
+
+from flask import Flask, current_app
+
+from app import jobs
+from app.db import get_db
+from app.metrics import Counters, counters
+from app.zipstream import stream_zip
+
+
+def _counters(app: Flask) -> Counters:
+    return counters(app, "exportArchives", "written", "bytesWritten", "expired")
+
+
+def export_dir(app: Flask) -> Path:
+    d = Path(app.config["EXPORT_DIR"])
+    d.mkdir(parents=True, exist_ok=True)
+    return d
+
+
+def path_for(out_dir: Path, archive_id: str) -> Path:
+    return out_dir / f"{archive_id}.zip"
+
+
+def write(app: Flask, out_dir: Path, archive_id: str, members: Iterable) -> dict:
+    """Write the ZIP of ``members`` as ``archive_id``; return its size and SHA-256."""
+    final = path_for(out_dir, archive_id)
+    part = final.with_name(f"{final.name}.{uuid.uuid4().hex}.part")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with open(part, "wb") as f:
+            for chunk in stream_zip(members):
+                f.write(chunk)
+                digest.update(chunk)
+                size += len(chunk)
+        os.replace(part, final)
+    except BaseException:
+        part.unlink(missing_ok=True)
+        raise
+    stats = _counters(app)
+    stats.incr("written")
+    stats.incr("bytesWritten", size)
+    return {"bytes": size, "sha256": digest.hexdigest()}
+
+
+def sweep(app: Flask, out_dir: Path) -> int:
+    """Delete archives older than EXPORT_ARCHIVE_TTL; return how many went."""
+    cutoff = time.time() - app.config["EXPORT_ARCHIVE_TTL"]
+    removed = 0
+    for path in out_dir.glob("*.zip*"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                removed += 1
+        except FileNotFoundError:
+            continue
+    _counters(app).incr("expired", removed)
+    return removed
+
+
+@jobs.periodic("export-sweep", "EXPORT_SWEEP_INTERVAL")
+def _periodic_sweep() -> None:
+    out_dir = Path(current_app.config["EXPORT_DIR"])
+    if out_dir.is_dir():
+        sweep(current_app, out_dir)
+    jobs.get_queue(current_app).prune(get_db(), current_app.config["EXPORT_ARCHIVE_TTL"], kind="export")
@@ -0,0 +1,356 @@
+"""SQLite-backed background job queue.
+
+Requests enqueue a row in ``jobs`` and return immediately; a bounded set of
+worker threads per process claims queued rows (oldest first) and runs the
+handler registered for the job's kind inside an app context. Because the
+queue lives in the database, any worker process can pick up a job enqueued by
+another, and jobs survive restarts. While a job runs, its process refreshes
+the row's ``heartbeat_at`` every JOB_STALE_AFTER / 4 seconds; rows left
+'running' by a dead worker are re-queued once their heartbeat is older than
+JOB_STALE_AFTER seconds, however long a live job takes.
+
+The same worker threads also run registered periodic tasks (housekeeping
+such as sweeping old compiled PDFs) between jobs, each in every process at
+most once per its configured interval. One of them deletes finished jobs
+JOB_RETENTION_SECONDS after they finished; a finished job's payload is
+cleared at once, since only its result is read after that.
+"""
+import json
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Callable
+
+from flask import Flask, current_app
+
+from app.db import get_db
+from app.metrics import counters
+
+# kind -> handler(payload, progress) returning the job's result dict
+_HANDLERS: dict[str, Callable[[dict, Callable[[int], None]], dict]] = {}
+# name -> (config key holding the interval in seconds, task())
+_PERIODIC: dict[str, tuple[str, Callable[[], None]]] = {}
+
+
+class JobFailed(Exception):
+    """Raised by a handler to fail its job with a user-facing message."""
+
+    def __init__(self, message: str, details: str | None = None):
+        super().__init__(message)
+        self.details = details
+
+
+def handler(kind: str):
+    """Register the function that runs jobs of ``kind``."""
+    def register(fn):
+        _HANDLERS[kind] = fn
+        return fn
+    return register
+
+
+def periodic(name: str, interval_setting: str):
+    """Register a task the job workers run every ``config[interval_setting]`` seconds."""
+    def register(fn):
+        _PERIODIC[name] = (interval_setting, fn)
+        return fn
+    return register
+
+
+def _row_to_dict(row) -> dict:
+    job = {
+        "jobId": row["id"],
+        "kind": row["kind"],
+        "status": row["status"],
+        "progress": row["progress"],
+        "createdAt": row["created_at"],
+        "waitMs": None,
+        "runMs": None,
+    }
+    if row["started_at"] is not None:
+        job["waitMs"] = round((row["started_at"] - row["created_at"]) * 1000, 1)
+        if row["finished_at"] is not None:
+            job["runMs"] = round((row["finished_at"] - row["started_at"]) * 1000, 1)
+    if row["result"]:
+        job.update(json.loads(row["result"]))
+    if row["error"]:
+        job["error"] = row["error"]
+    return job
+
+
+def _in_multiprocessing_child() -> bool:
+    # A child imports __main__ before parent_process() is set, but after
+    # it has been given its own name.
+    return (
+        multiprocessing.parent_process() is not None
+        or multiprocessing.current_process().name != "MainProcess"
+    )
+
+
+class JobQueue:
+    def __init__(self, app: Flask, workers: int, poll_interval: float, stale_after: float):
+        self.app = app
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._threads: list[threading.Thread] = []
+        self._beat: threading.Thread | None = None
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._last_periodic: dict[str, float] = {}
+        # Ids of the jobs this process is running, for the heartbeat.
+        self._running: set[str] = set()
+        self._counters = counters(
+            app, "jobs", "enqueued", "rejected", "completed", "failed", "requeued", "waitMsTotal",
+            "runMsTotal", "periodicRuns", "periodicFailures", "pruned",
+        )
+
+    def enqueue(
+        self, db: sqlite3.Connection, kind: str, user_id: str, payload: dict,
+        max_pending: int | None = None,
+    ) -> str | None:
+        """Queue a job and return its id.
+
+        With ``max_pending``, nothing is queued and None is returned if the
+        user already has that many ``kind`` jobs queued or running. The count
+        and the insert are one statement, so concurrent requests cannot both
+        slip under the cap.
+        """
+        job_id = str(uuid.uuid4())
+        row = (job_id, kind, user_id, json.dumps(payload), time.time())
+        if max_pending is None:
+            db.execute("INSERT INTO jobs (id, kind, user_id, payload, created_at) VALUES (?, ?, ?, ?, ?)", row)
+            inserted = True
+        else:
+            inserted = db.execute(
+                """INSERT INTO jobs (id, kind, user_id, payload, created_at)
+                   SELECT ?, ?, ?, ?, ?
+                   WHERE (SELECT COUNT(*) FROM jobs
+                          WHERE user_id = ? AND kind = ? AND status IN ('queued', 'running')) < ?""",
+                (*row, user_id, kind, max_pending),
+            ).rowcount
+        db.commit()
+        if not inserted:
+            self._counters.incr("rejected")
+            return None
+        self._counters.incr("enqueued")
+        self.start()
+        self._wake.set()
+        return job_id
+
+    def get(self, db: sqlite3.Connection, job_id: str, user_id: str) -> dict | None:
+        row = db.execute(
+            "SELECT * FROM jobs WHERE id = ? AND user_id = ?", (job_id, user_id)
+        ).fetchone()
+        return _row_to_dict(row) if row else None
+
+    def start(self) -> None:
+        """Start this process's worker threads, or restart them after a fork.
+
+        Cheap once they are running, so it can be called on every request.
+        Does nothing in a multiprocessing child, such as a password-hashing
+        worker that imported the app's main module: it must not consume jobs.
+        """
+        if self._pid == os.getpid() and (self._threads or self._stop.is_set()):
+            return
+        if _in_multiprocessing_child():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                # Threads do not survive fork; start fresh ones in this worker.
+                self._pid = os.getpid()
+                self._threads = []
+                self._running = set()
+            if self._threads or self._stop.is_set():
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+            self._beat = threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True)
+            self._beat.start()
+
+    def _heartbeat(self) -> None:
+        while not self._stop.wait(self.stale_after / 4):
+            with self._lock:
+                running = list(self._running)
+            if not running:
+                continue
+            try:
+                with self.app.app_context():
+                    db = get_db()
+                    db.execute(
+                        f"UPDATE jobs SET heartbeat_at = ? "
+                        f"WHERE id IN ({','.join('?' * len(running))}) AND status = 'running'",
+                        (time.time(), *running),
+                    )
+                    db.commit()
+            except sqlite3.Error:
+                self.app.logger.exception("Job heartbeat could not reach the queue")
+
+    def _work(self) -> None:
+        while not self._stop.is_set():
+            self.run_periodic()
+            try:
+                ran = self.run_pending()
+            except sqlite3.Error:
+                self.app.logger.exception("Job worker could not reach the queue")
+                ran = 0
+            if not ran:
+                self._wake.wait(self.poll_interval)
+                self._wake.clear()
+
+    def _claim(self, db: sqlite3.Connection) -> sqlite3.Row | None:
+        now = time.time()
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            requeued = db.execute(
+                "UPDATE jobs SET status = 'queued', started_at = NULL, heartbeat_at = NULL "
+                "WHERE status = 'running' AND COALESCE(heartbeat_at, started_at) < ?",
+                (now - self.stale_after,),
+            ).rowcount
+            row = db.execute(
+                "SELECT * FROM jobs WHERE status = 'queued' ORDER BY created_at LIMIT 1"
+            ).fetchone()
+            if row is not None:
+                db.execute(
+                    "UPDATE jobs SET status = 'running', started_at = ?, heartbeat_at = ? WHERE id = ?",
+                    (now, now, row["id"]),
+                )
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        if requeued:
+            self._counters.incr("requeued", requeued)
+        if row is None:
+            return None
+        return db.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone()
+
+    def run_pending(self) -> int:
+        """Claim and run queued jobs until none are left; return how many ran."""
+        ran = 0
+        while not self._stop.is_set():
+            with self.app.app_context():
+                db = get_db()
+                row = self._claim(db)
+                if row is None:
+                    return ran
+                self._run(db, row)
+            ran += 1
+        return ran
+
+    def run_periodic(self) -> list[str]:
+        """Run every periodic task that is due; return the names of those that ran."""
+        now = time.monotonic()
+        due = []
+        with self._lock:
+            for name, (setting, _) in _PERIODIC.items():
+                last = self._last_periodic.get(name)
+                if last is None or now - last >= self.app.config[setting]:
+                    # Claimed under the lock so only one worker thread runs it.
+                    self._last_periodic[name] = now
+                    due.append(name)
+        for name in due:
+            try:
+                with self.app.app_context():
+                    _PERIODIC[name][1]()
+                self._counters.incr("periodicRuns")
+            except Exception:  # housekeeping must never kill its worker
+                self.app.logger.exception("Periodic task %s failed", name)
+                self._counters.incr("periodicFailures")
+        return due
+
+    def _run(self, db: sqlite3.Connection, row: sqlite3.Row) -> None:
+        def progress(percent: int) -> None:
+            db.execute("UPDATE jobs SET progress = ? WHERE id = ?", (percent, row["id"]))
+            db.commit()
+
+        result, error = None, None
+        with self._lock:
+            self._running.add(row["id"])
+        try:
+            fn = _HANDLERS[row["kind"]]
+            result = fn(json.loads(row["payload"]), progress)
+        except JobFailed as exc:
+            error = str(exc)
+            result = {"details": exc.details} if exc.details else None
+        except Exception as exc:  # a failing job must never kill its worker
+            self.app.logger.exception("Job %s (%s) crashed", row["id"], row["kind"])
+            error = f"Internal error: {exc.__class__.__name__}"
+        finally:
+            with self._lock:
+                self._running.discard(row["id"])
+
+        finished = time.time()
+        db.execute(
+            """UPDATE jobs SET status = ?, progress = 100, payload = '{}', result = ?, error = ?,
+                   finished_at = ?
+               WHERE id = ?""",
+            (
+                "failed" if error else "done",
+                json.dumps(result) if result else None,
+                error,
+                finished,
+                row["id"],
+            ),
+        )
+        db.commit()
+        self._counters.incr("failed" if error else "completed")
+        self._counters.incr("waitMsTotal", int((row["started_at"] - row["created_at"]) * 1000))
+        self._counters.incr("runMsTotal", int((finished - row["started_at"]) * 1000))
+
+    def prune(self, db: sqlite3.Connection, retention: float, kind: str | None = None) -> int:
+        """Delete jobs (of ``kind``, if given) finished over ``retention`` seconds ago; return how many."""
+        sql = "DELETE FROM jobs WHERE status IN ('done', 'failed') AND finished_at < ?"
+        params: tuple = (time.time() - retention,)
+        if kind is not None:
+            sql += " AND kind = ?"
+            params += (kind,)
+        removed = db.execute(sql, params).rowcount
+        db.commit()
+        self._counters.incr("pruned", removed)
+        return removed
+
+    def stats(self, db: sqlite3.Connection) -> dict:
+        depth, oldest = db.execute(
+            "SELECT COUNT(*), MIN(created_at) FROM jobs WHERE status = 'queued'"
+        ).fetchone()
+        running = db.execute("SELECT COUNT(*) FROM jobs WHERE status = 'running'").fetchone()[0]
+        return {
+            "workers": len(self._threads),
+            "depth": depth,
+            "running": running,
+            "oldestQueuedMs": round((time.time() - oldest) * 1000, 1) if oldest else 0,
+            **self._counters.snapshot(),
+        }
+
+    def shutdown(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        for thread in [*self._threads, self._beat]:
+            if thread is not None:
+                thread.join(timeout=5)
+
+
+def get_queue(app: Flask) -> JobQueue:
+    queue = app.extensions.get("job_queue")
+    if queue is None:
+        queue = JobQueue(
+            # Workers outlive the request, so they need the app itself, not current_app.
+            getattr(app, "_get_current_object", lambda: app)(),
+            workers=app.config["JOB_WORKERS"],
+            poll_interval=app.config["JOB_POLL_INTERVAL"],
+            stale_after=app.config["JOB_STALE_AFTER"],
+        )
+        app.extensions["job_queue"] = queue
+    return queue
+
+
+@periodic("job-prune", "JOB_PRUNE_INTERVAL")
+def _periodic_prune() -> None:
+    get_queue(current_app).prune(get_db(), current_app.config["JOB_RETENTION_SECONDS"])
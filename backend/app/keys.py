@@ -0,0 +1,128 @@
+"""Encryption of stored provider API keys and a cache of decrypted keys.
+
+Keys are encrypted with Fernet under a key derived from SECRET_KEY via
+HKDF-SHA256. Any SECRET_KEY_FALLBACKS are still accepted for decryption, so
+SECRET_KEY can be rotated; keys read under a fallback are re-encrypted under
+the current SECRET_KEY. Derivation runs once per secret per process.
+
+Decrypted keys are cached per process along with the user's 'api_keys'
+collection version, which triggers bump on every write to their rows
+(migration 0011). A lookup reads that version, one primary-key row, and
+only uses the cached keys while it is unchanged, so a key changed through
+any process is seen by every other at once.
+"""
+import base64
+import sqlite3
+from functools import lru_cache
+from typing import TYPE_CHECKING
+
+from flask import Flask, current_app
+
+from app.cache import TTLCache
+from app.etags import collection_version
+
+if TYPE_CHECKING:
+    from cryptography.fernet import Fernet, MultiFernet
+
+_HKDF_SALT = b"cv-ai-generator-api-keys"
+_HKDF_INFO = b"api-key-encryption"
+_NO_KEY = ""
+
+
+@lru_cache(maxsize=8)
+def _derive(secret: str) -> "Fernet":
+    from cryptography.fernet import Fernet
+    from cryptography.hazmat.primitives.hashes import SHA256
+    from cryptography.hazmat.primitives.kdf.hkdf import HKDF
+
+    derived = HKDF(
+        algorithm=SHA256(),
+        length=32,
+        salt=_HKDF_SALT,
+        info=_HKDF_INFO,
+    ).derive(secret.encode())
+    return Fernet(base64.urlsafe_b64encode(derived))
+
+
+@lru_cache(maxsize=8)
+def _multi(secrets: tuple[str, ...]) -> "MultiFernet":
+    from cryptography.fernet import MultiFernet
+
+    return MultiFernet([_derive(s) for s in secrets])
+
+
+def _secrets() -> tuple[str, ...]:
+    config = current_app.config
+    return (config["SECRET_KEY"], *(config.get("SECRET_KEY_FALLBACKS") or ()))
+
+
+def encrypt(value: str) -> str:
+    """Encrypt ``value`` under the current SECRET_KEY."""
+    return _derive(current_app.config["SECRET_KEY"]).encrypt(value.encode()).decode()
+
+
+def decrypt(token: str) -> str:
+    """Decrypt ``token`` with the current SECRET_KEY or any of its fallbacks."""
+    return _multi(_secrets()).decrypt(token.encode()).decode()
+
+
+def needs_rotation(token: str) -> bool:
+    """True if ``token`` was not encrypted under the current SECRET_KEY."""
+    from cryptography.fernet import InvalidToken
+
+    try:
+        _derive(current_app.config["SECRET_KEY"]).decrypt(token.encode())
+        return False
+    except InvalidToken:
+        return True
+
+
+def _cache(app: Flask) -> TTLCache:
+    cache = app.extensions.get("provider_key_cache")
+    if cache is None:
+        cache = TTLCache(app.config["API_KEY_CACHE_SIZE"], app.config["API_KEY_CACHE_TTL"])
+        app.extensions["provider_key_cache"] = cache
+    return cache
+
+
+def get_provider_key(db: sqlite3.Connection, user_id: str, provider: str) -> str | None:
+    """Return the user's decrypted key for ``provider``, or None if they have none.
+
+    Results, including the absence of a key, are cached per user for
+    API_KEY_CACHE_TTL seconds, or until the user's keys change.
+    """
+    cache = _cache(current_app)
+    version = collection_version(db, user_id, "api_keys")
+    cached_version, keys = cache.get(user_id) or (version, {})
+    if cached_version != version:
+        keys = {}
+    elif provider in keys:
+        return keys[provider] or None
+
+    row = db.execute(
+        "SELECT id, encrypted_key FROM api_keys WHERE user_id = ? AND provider = ? LIMIT 1",
+        (user_id, provider),
+    ).fetchone()
+    value = _NO_KEY
+    if row:
+        value = decrypt(row["encrypted_key"])
+        if current_app.config.get("SECRET_KEY_FALLBACKS") and needs_rotation(row["encrypted_key"]):
+            db.execute(
+                "UPDATE api_keys SET encrypted_key = ? WHERE id = ?",
+                (encrypt(value), row["id"]),
+            )
+            db.commit()
+    cache.set(user_id, (version, {**keys, provider: value}))
+    return value or None
+
+
+def invalidate_provider_keys(user_id: str) -> None:
+    """Drop this process's cached keys for ``user_id`` after a change to their api_keys rows.
+
+    Other processes notice the change by the collection version.
+    """
+    _cache(current_app).pop(user_id)
+
+
+def cache_stats(app: Flask) -> dict:
+    return _cache(app).stats()
@@ -0,0 +1,154 @@
+"""pdflatex runner with precompiled preambles.
+
+The binary is resolved once when the app starts instead of probing it with
+``pdflatex --version`` on every request. Every CV shares one of a handful of
+preambles (only the class options vary), and loading those packages is
+most of a cold compile, so the first compile of each preamble dumps it to a
+format file (``pdflatex -ini ... \\dump``) in ``<LATEX_OUTPUT_DIR>/formats``
+and later compiles start from that format, typesetting only the body. If a
+preamble cannot be dumped the engine falls back to a plain compile. Using a
+format touches its file, so the compiled sweep can expire formats no longer
+used (old preambles, or ones dumped by an earlier pdflatex build).
+"""
+import hashlib
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from flask import Flask
+
+from app.metrics import counters
+
+BEGIN_DOCUMENT = r"\begin{document}"
+
+
+class LatexEngine:
+    def __init__(
+        self,
+        app: Flask,
+        binary: str = "pdflatex",
+        format_dir: Path | None = None,
+        timeout: float = 30.0,
+        precompile: bool = True,
+    ):
+        self.binary = shutil.which(binary)
+        self.format_dir = format_dir
+        self.timeout = timeout
+        self.precompile = precompile and format_dir is not None
+        self._version: str | None = None
+        self._lock = threading.Lock()
+        self._format_locks: dict[str, threading.Lock] = {}
+        self._failed_formats: set[str] = set()
+        self._counters = counters(
+            app, "latexEngine", "coldCompiles", "formatCompiles", "formatsBuilt",
+            "formatFailures", "compileMsTotal",
+        )
+
+    @property
+    def available(self) -> bool:
+        return self.binary is not None
+
+    def version(self) -> str:
+        """First line of ``pdflatex --version``; run once, then remembered."""
+        if self._version is None:
+            out = subprocess.run(
+                [self.binary, "--version"], capture_output=True, text=True, timeout=10
+            ).stdout
+            self._version = out.splitlines()[0] if out else ""
+        return self._version
+
+    def _format_name(self, preamble: str) -> str:
+        # Formats are only valid for the engine build that dumped them.
+        seed = f"{self.version()}\0{preamble}".encode("utf-8")
+        return "cv-" + hashlib.sha256(seed).hexdigest()[:24]
+
+    def _format_for(self, preamble: str) -> str | None:
+        """Return the format name for ``preamble``, dumping it on first use."""
+        name = self._format_name(preamble)
+        try:
+            os.utime(self.format_dir / f"{name}.fmt")
+            return name
+        except FileNotFoundError:
+            pass
+        with self._lock:
+            if name in self._failed_formats:
+                return None
+            lock = self._format_locks.setdefault(name, threading.Lock())
+        with lock:
+            if (self.format_dir / f"{name}.fmt").exists():
+                return name
+            self.format_dir.mkdir(parents=True, exist_ok=True)
+            with tempfile.TemporaryDirectory(dir=self.format_dir) as work_dir:
+                source = Path(work_dir) / "preamble.tex"
+                source.write_text(preamble + "\n\\dump\n", encoding="utf-8")
+                try:
+                    subprocess.run(
+                        [
+                            self.binary, "-ini", "-interaction=nonstopmode",
+                            f"-jobname={name}", "-output-directory", work_dir,
+                            "&pdflatex", str(source),
+                        ],
+                        capture_output=True,
+                        timeout=self.timeout,
+                    )
+                except subprocess.TimeoutExpired:
+                    pass
+                dumped = Path(work_dir) / f"{name}.fmt"
+                if not dumped.exists():
+                    with self._lock:
+                        self._failed_formats.add(name)
+                    self._counters.incr("formatFailures")
+                    return None
+                os.replace(dumped, self.format_dir / f"{name}.fmt")
+            self._counters.incr("formatsBuilt")
+            return name
+
+    def compile(self, tex: str, work_dir: Path) -> subprocess.CompletedProcess:
+        """Compile ``tex`` into ``work_dir/cv.pdf``.
+
+        Raises subprocess.TimeoutExpired after LATEX_TIMEOUT seconds; a failed
+        compile is reported by the missing PDF and the returned stdout.
+        """
+        preamble, begin, body = tex.partition(BEGIN_DOCUMENT)
+        fmt = self._format_for(preamble) if self.precompile and begin else None
+        source = Path(work_dir) / "cv.tex"
+        args = [self.binary, "-interaction=nonstopmode", "-output-directory", str(work_dir)]
+        env = None
+        if fmt:
+            source.write_text(begin + body, encoding="utf-8")
+            args.append(f"-fmt={fmt}")
+            # A trailing separator keeps kpathsea's default format path too.
+            env = {**os.environ, "TEXFORMATS": f"{self.format_dir}{os.pathsep}"}
+        else:
+            source.write_text(tex, encoding="utf-8")
+
+        started = time.perf_counter()
+        try:
+            return subprocess.run(
+                [*args, str(source)],
+                capture_output=True,
+                text=True,
+                timeout=self.timeout,
+                env=env,
+            )
+        finally:
+            self._counters.incr("formatCompiles" if fmt else "coldCompiles")
+            self._counters.incr("compileMsTotal", int((time.perf_counter() - started) * 1000))
+
+
+def get_engine(app: Flask) -> LatexEngine:
+    engine = app.extensions.get("latex_engine")
+    if engine is None:
+        engine = LatexEngine(
+            app,
+            binary=app.config["PDFLATEX"],
+            format_dir=Path(app.config["LATEX_OUTPUT_DIR"]) / "formats",
+            timeout=app.config["LATEX_TIMEOUT"],
+            precompile=app.config["LATEX_PRECOMPILE_PREAMBLE"],
+        )
+        app.extensions["latex_engine"] = engine
+    return engine
@@ -0,0 +1,212 @@
+"""Pooled OpenAI clients shared across agent requests.
+
+One OpenAI client is kept per API key (LRU, OPENAI_CLIENT_CACHE_SIZE), and
+every client sends its requests through a single shared HTTP client, so TLS
+sessions and keep-alive connections survive from one request to the next.
+The SDK's own retries are disabled in favour of ``chat()``, which retries
+transient failures with full-jitter exponential backoff.
+"""
+import hashlib
+import os
+import random
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Any, Iterator
+
+from flask import Flask
+
+if TYPE_CHECKING:
+    from openai import OpenAI
+
+
+class LLMError(Exception):
+    """The provider call failed after all retries."""
+
+
+class DeltaStream:
+    """The content deltas of a streaming completion, owning its upstream response.
+
+    ``close()`` closes the response, and so cancels the generation, whether
+    or not iteration has started; a generator's ``finally`` would only run
+    once it had. Closing a finished or already closed stream does nothing.
+    """
+
+    def __init__(self, registry: "ClientRegistry", response):
+        self._registry = registry
+        self._response = response
+        self._deltas = self._iterate()
+        self._finished = False
+
+    def __iter__(self) -> "DeltaStream":
+        return self
+
+    def __next__(self) -> str:
+        return next(self._deltas)
+
+    def _iterate(self) -> Iterator[str]:
+        import openai
+
+        try:
+            for chunk in self._response:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except openai.APIError as exc:
+            self._finish("failures")
+            raise LLMError(str(exc)) from exc
+        self._finish("streamsCompleted")
+
+    def _finish(self, counter: str) -> None:
+        with self._registry._lock:
+            if self._finished:
+                return
+            self._finished = True
+            self._registry._counters[counter] += 1
+        self._response.close()
+
+    def close(self) -> None:
+        self._finish("streamsCancelled")
+        self._deltas.close()
+
+
+class ClientRegistry:
+    def __init__(
+        self,
+        maxsize: int = 256,
+        base_url: str | None = None,
+        timeout: float = 30.0,
+        max_retries: int = 2,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+    ):
+        self.maxsize = maxsize
+        self.base_url = base_url
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._lock = threading.Lock()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._pid = os.getpid()
+        self._clients: OrderedDict[str, "OpenAI"] = OrderedDict()
+        self._http_client = None
+        self._seen_connections: weakref.WeakSet = weakref.WeakSet()
+        self._counters = {
+            "clientHits": 0,
+            "clientsCreated": 0,
+            "clientsEvicted": 0,
+            "requests": 0,
+            "retries": 0,
+            "failures": 0,
+            "streamsCompleted": 0,
+            "streamsCancelled": 0,
+            "connectionsNew": 0,
+            "connectionsReused": 0,
+        }
+
+    def _on_response(self, response) -> None:
+        stream = response.extensions.get("network_stream")
+        with self._lock:
+            if stream is None:
+                return
+            if stream in self._seen_connections:
+                self._counters["connectionsReused"] += 1
+            else:
+                self._seen_connections.add(stream)
+                self._counters["connectionsNew"] += 1
+
+    def get(self, api_key: str) -> "OpenAI":
+        """Return the client for ``api_key``, creating it on first use."""
+        from openai import DefaultHttpxClient, OpenAI
+
+        slot = hashlib.sha256(api_key.encode()).hexdigest()
+        with self._lock:
+            if self._pid != os.getpid():
+                self._reset()
+            client = self._clients.get(slot)
+            if client is not None:
+                self._clients.move_to_end(slot)
+                self._counters["clientHits"] += 1
+                return client
+            if self._http_client is None:
+                self._http_client = DefaultHttpxClient(
+                    timeout=self.timeout,
+                    event_hooks={"response": [self._on_response]},
+                )
+            # Evicted clients are simply dropped: closing one would close the
+            # shared HTTP client underneath every other client.
+            client = OpenAI(
+                api_key=api_key,
+                base_url=self.base_url,
+                timeout=self.timeout,
+                max_retries=0,
+                http_client=self._http_client,
+            )
+            self._clients[slot] = client
+            self._counters["clientsCreated"] += 1
+            while len(self._clients) > self.maxsize:
+                self._clients.popitem(last=False)
+                self._counters["clientsEvicted"] += 1
+            return client
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def chat(self, api_key: str, **kwargs: Any):
+        """``chat.completions.create`` with retries on transient provider errors."""
+        import openai
+
+        retryable = (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError)
+        client = self.get(api_key)
+        attempt = 0
+        while True:
+            with self._lock:
+                self._counters["requests"] += 1
+            try:
+                return client.chat.completions.create(**kwargs)
+            except retryable as exc:
+                if attempt >= self.max_retries:
+                    with self._lock:
+                        self._counters["failures"] += 1
+                    raise LLMError(str(exc)) from exc
+                with self._lock:
+                    self._counters["retries"] += 1
+                time.sleep(self._backoff(attempt))
+                attempt += 1
+            except openai.APIError as exc:
+                with self._lock:
+                    self._counters["failures"] += 1
+                raise LLMError(str(exc)) from exc
+
+    def stream_chat(self, api_key: str, **kwargs: Any) -> DeltaStream:
+        """Open a streaming completion and return an iterator of content deltas.
+
+        The request is sent (and retried) before this returns, so connection
+        errors surface as LLMError here rather than mid-stream. The caller
+        must close the returned stream if it stops early, e.g. because the
+        client disconnected; that closes the upstream response and so
+        cancels the generation.
+        """
+        return DeltaStream(self, self.chat(api_key, stream=True, **kwargs))
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"clients": len(self._clients), "maxsize": self.maxsize, **self._counters}
+
+
+def get_registry(app: Flask) -> ClientRegistry:
+    registry = app.extensions.get("llm_clients")
+    if registry is None:
+        registry = ClientRegistry(
+            maxsize=app.config["OPENAI_CLIENT_CACHE_SIZE"],
+            base_url=app.config["OPENAI_BASE_URL"],
+            timeout=app.config["OPENAI_TIMEOUT"],
+            max_retries=app.config["OPENAI_MAX_RETRIES"],
+            backoff_base=app.config["OPENAI_BACKOFF_BASE"],
+            backoff_max=app.config["OPENAI_BACKOFF_MAX"],
+        )
+        app.extensions["llm_clients"] = registry
+    return registry
@@ -0,0 +1,31 @@
+import threading
+
+from flask import Flask
+
+
+class Counters:
+    """Thread-safe named counters for one subsystem."""
+
+    def __init__(self, *names: str):
+        self._lock = threading.Lock()
+        self._values = dict.fromkeys(names, 0)
+
+    def incr(self, name: str, amount: int = 1) -> None:
+        with self._lock:
+            self._values[name] = self._values.get(name, 0) + amount
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return dict(self._values)
+
+
+def counters(app: Flask, subsystem: str, *names: str) -> Counters:
+    """Return the Counters for ``subsystem`` on ``app``, creating them on first use."""
+    registry = app.extensions.setdefault("counters", {})
+    if subsystem not in registry:
+        registry[subsystem] = Counters(*names)
+    return registry[subsystem]
+
+
+def snapshot(app: Flask) -> dict:
+    return {name: c.snapshot() for name, c in app.extensions.get("counters", {}).items()}
@@ -0,0 +1,32 @@
+-- Per-user listing indexes. Every list endpoint filters on user_id and most
+-- sort by a date column, so each index leads with user_id followed by the
+-- sort key the endpoint uses.
+
+CREATE INDEX IF NOT EXISTS idx_experiences_user_start
+    ON experiences (user_id, start_date DESC);
+
+CREATE INDEX IF NOT EXISTS idx_projects_user
+    ON projects (user_id);
+
+CREATE INDEX IF NOT EXISTS idx_job_descriptions_user_created
+    ON job_descriptions (user_id, created_at DESC);
+
+CREATE INDEX IF NOT EXISTS idx_blurbs_user_created
+    ON blurbs (user_id, created_at DESC);
+
+CREATE INDEX IF NOT EXISTS idx_blurbs_user_job_created
+    ON blurbs (user_id, job_description_id, created_at);
+
+-- Deleting a job description nulls out blurbs.job_description_id (ON DELETE SET NULL)
+CREATE INDEX IF NOT EXISTS idx_blurbs_job_description
+    ON blurbs (job_description_id);
+
+CREATE INDEX IF NOT EXISTS idx_photos_user_main
+    ON photos (user_id, is_main DESC);
+
+CREATE INDEX IF NOT EXISTS idx_api_keys_user_created
+    ON api_keys (user_id, created_at DESC);
+
+-- agent._get_openai_key looks keys up by provider
+CREATE INDEX IF NOT EXISTS idx_api_keys_user_provider
+    ON api_keys (user_id, provider);
@@ -0,0 +1,14 @@
+-- Results of /agent/analyze-job shared across users, keyed by a hash of the
+-- normalised job text, prompt version and model (see app/analysis_cache.py).
+
+CREATE TABLE IF NOT EXISTS analysis_cache (
+    key          TEXT PRIMARY KEY,
+    model        TEXT NOT NULL,
+    result_json  TEXT NOT NULL,
+    hits         INTEGER NOT NULL DEFAULT 0,
+    created_at   TEXT NOT NULL DEFAULT (datetime('now')),
+    last_used_at TEXT NOT NULL DEFAULT (datetime('now'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_analysis_cache_last_used
+    ON analysis_cache (last_used_at);
@@ -0,0 +1,25 @@
+-- Background job queue (see app/jobs.py). Timestamps are unix seconds as REAL
+-- rather than datetime() text so queue wait and run times keep sub-second
+-- precision.
+
+CREATE TABLE IF NOT EXISTS jobs (
+    id          TEXT PRIMARY KEY,
+    kind        TEXT NOT NULL,
+    user_id     TEXT NOT NULL,
+    status      TEXT NOT NULL DEFAULT 'queued'
+                CHECK (status IN ('queued', 'running', 'done', 'failed')),
+    progress    INTEGER NOT NULL DEFAULT 0,
+    payload     TEXT NOT NULL,
+    result      TEXT,
+    error       TEXT,
+    created_at  REAL NOT NULL,
+    started_at  REAL,
+    finished_at REAL,
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_jobs_status_created
+    ON jobs (status, created_at);
+
+CREATE INDEX IF NOT EXISTS idx_jobs_user_created
+    ON jobs (user_id, created_at DESC);
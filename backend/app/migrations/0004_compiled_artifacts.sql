@@ -0,0 +1,20 @@
+-- Compiled CVs in LATEX_OUTPUT_DIR and who may download them (see
+-- app/render_cache.py). PDFs are content-addressed, so one file can have
+-- several owners; it is deleted once its last row is swept. Timestamps are
+-- unix seconds as REAL, compared directly against the retention TTL.
+
+CREATE TABLE IF NOT EXISTS compiled_artifacts (
+    key          TEXT NOT NULL,
+    user_id      TEXT NOT NULL,
+    bytes        INTEGER NOT NULL,
+    created_at   REAL NOT NULL,
+    last_used_at REAL NOT NULL,
+    PRIMARY KEY (key, user_id),
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+);
+
+CREATE INDEX IF NOT EXISTS idx_compiled_artifacts_last_used
+    ON compiled_artifacts (last_used_at);
+
+CREATE INDEX IF NOT EXISTS idx_compiled_artifacts_user_last_used
+    ON compiled_artifacts (user_id, last_used_at DESC);
@@ -0,0 +1,196 @@
+-- Change tracking for incremental export/import (see app/sync.py).
+--
+-- Every insert or update of a tracked row takes the next value of one global
+-- sequence as the row's version and stamps updated_at; every delete leaves a
+-- tombstone carrying its own sequence value. A client that remembers the
+-- highest version it has seen (the cursor) can ask for exactly what changed
+-- since. Updates that leave every column as it was do not count as changes.
+-- Rows that predate this migration start at version 1, the initial
+-- cursor value, so a delta from cursor 0 returns everything.
+
+CREATE TABLE IF NOT EXISTS change_counter (
+    id             INTEGER PRIMARY KEY CHECK (id = 1),
+    seq            INTEGER NOT NULL,
+    -- Tombstones up to here have been pruned; older cursors cannot be served.
+    pruned_through INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT OR IGNORE INTO change_counter (id, seq) VALUES (1, 1);
+
+CREATE TABLE IF NOT EXISTS change_tombstones (
+    version    INTEGER PRIMARY KEY,
+    user_id    TEXT NOT NULL,
+    entity     TEXT NOT NULL,
+    row_id     TEXT NOT NULL,
+    deleted_at TEXT NOT NULL DEFAULT (datetime('now'))
+);
+
+CREATE INDEX IF NOT EXISTS idx_change_tombstones_user_version
+    ON change_tombstones (user_id, version);
+
+ALTER TABLE photos ADD COLUMN sha256 TEXT;
+
+-- experiences
+ALTER TABLE experiences ADD COLUMN version INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE experiences ADD COLUMN updated_at TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_experiences_user_version
+    ON experiences (user_id, version);
+
+CREATE TRIGGER IF NOT EXISTS trg_experiences_insert_version AFTER INSERT ON experiences
+BEGIN
+    UPDATE change_counter SET seq = seq + 1;
+    UPDATE experiences SET version = (SELECT seq FROM change_counter), updated_at = datetime('now')
+    WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_experiences_update_version
+AFTER UPDATE OF category, title, organization, start_date, end_date, description, keywords ON experiences
+WHEN OLD.category IS NOT NEW.category
+    OR OLD.title IS NOT NEW.title
+    OR OLD.organization IS NOT NEW.organization
+    OR OLD.start_date IS NOT NEW.start_date
+    OR OLD.end_date IS NOT NEW.end_date
+    OR OLD.description IS NOT NEW.description
+    OR OLD.keywords IS NOT NEW.keywords
+BEGIN
+    UPDATE change_counter SET seq = seq + 1;
+    UPDATE experiences SET version = (SELECT seq FROM change_counter), updated_at = datetime('now')
+    WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_experiences_delete_tombstone AFTER DELETE ON experiences
+BEGIN
+    UPDATE change_counter SET seq = seq + 1;
+    INSERT INTO change_tombstones (version, user_id, entity, row_id)
+    VALUES ((SELECT seq FROM change_counter), OLD.user_id, 'experiences', OLD.id);
+END;
+
+-- projects
+ALTER TABLE projects ADD COLUMN version INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE projects ADD COLUMN updated_at TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_projects_user_version
+    ON projects (user_id, version);
+
+CREATE TRIGGER IF NOT EXISTS trg_projects_insert_version AFTER INSERT ON projects
+BEGIN
+    UPDATE change_counter SET seq = seq + 1;
+    UPDATE projects SET version = (SELECT seq FROM change_counter), updated_at = datetime('now')
+    WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_projects_update_version
+AFTER UPDATE OF title, description, keywords ON projects
+WHEN OLD.title IS NOT NEW.title
+    OR OLD.description IS NOT NEW.description
+    OR OLD.keywords IS NOT NEW.keywords
+BEGIN
+    UPDATE change_counter SET seq = seq + 1;
+    UPDATE projects SET version = (SELECT seq FROM change_counter), updated_at = datetime('now')
+    WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_projects_delete_tombstone AFTER DELETE ON projects
+BEGIN
+    UPDATE change_counter SET seq = seq + 1;
+    INSERT INTO change_tombstones (version, user_id, entity, row_id)
+    VALUES ((SELECT seq FROM change_counter), OLD.user_id, 'projects', OLD.id);
+END;
+
+-- job_descriptions
+ALTER TABLE job_descriptions ADD COLUMN version INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE job_descriptions ADD COLUMN updated_at TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_job_descriptions_user_version
+    ON job_descriptions (user_id, version);
+
+CREATE TRIGGER IF NOT EXISTS trg_job_descriptions_insert_version AFTER INSERT ON job_descriptions
+BEGIN
+    UPDATE change_counter SET seq = seq + 1;
+    UPDATE job_descriptions SET version = (SELECT seq FROM change_counter), updated_at = datetime('now')
+    WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_job_descriptions_update_version
+AFTER UPDATE OF title, company, description, analysis_json ON job_descriptions
+WHEN OLD.title IS NOT NEW.title
+    OR OLD.company IS NOT NEW.company
+    OR OLD.description IS NOT NEW.description
+    OR OLD.analysis_json IS NOT NEW.analysis_json
+BEGIN
+    UPDATE change_counter SET seq = seq + 1;
+    UPDATE job_descriptions SET version = (SELECT seq FROM change_counter), updated_at = datetime('now')
+    WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_job_descriptions_delete_tombstone AFTER DELETE ON job_descriptions
+BEGIN
+    UPDATE change_counter SET seq = seq + 1;
+    INSERT INTO change_tombstones (version, user_id, entity, row_id)
+    VALUES ((SELECT seq FROM change_counter), OLD.user_id, 'job_descriptions', OLD.id);
+END;
+
+-- blurbs
+ALTER TABLE blurbs ADD COLUMN version INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE blurbs ADD COLUMN updated_at TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_blurbs_user_version
+    ON blurbs (user_id, version);
+
+CREATE TRIGGER IF NOT EXISTS trg_blurbs_insert_version AFTER INSERT ON blurbs
+BEGIN
+    UPDATE change_counter SET seq = seq + 1;
+    UPDATE blurbs SET version = (SELECT seq FROM change_counter), updated_at = datetime('now')
+    WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_blurbs_update_version
+AFTER UPDATE OF type, content, job_description_id ON blurbs
+WHEN OLD.type IS NOT NEW.type
+    OR OLD.content IS NOT NEW.content
+    OR OLD.job_description_id IS NOT NEW.job_description_id
+BEGIN
+    UPDATE change_counter SET seq = seq + 1;
+    UPDATE blurbs SET version = (SELECT seq FROM change_counter), updated_at = datetime('now')
+    WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_blurbs_delete_tombstone AFTER DELETE ON blurbs
+BEGIN
+    UPDATE change_counter SET seq = seq + 1;
+    INSERT INTO change_tombstones (version, user_id, entity, row_id)
+    VALUES ((SELECT seq FROM change_counter), OLD.user_id, 'blurbs', OLD.id);
+END;
+
+-- photos
+ALTER TABLE photos ADD COLUMN version INTEGER NOT NULL DEFAULT 1;
+ALTER TABLE photos ADD COLUMN updated_at TEXT;
+
+CREATE INDEX IF NOT EXISTS idx_photos_user_version
+    ON photos (user_id, version);
+
+CREATE TRIGGER IF NOT EXISTS trg_photos_insert_version AFTER INSERT ON photos
+BEGIN
+    UPDATE change_counter SET seq = seq + 1;
+    UPDATE photos SET version = (SELECT seq FROM change_counter), updated_at = datetime('now')
+    WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_photos_update_version
+AFTER UPDATE OF filename, is_main, sha256 ON photos
+WHEN OLD.filename IS NOT NEW.filename
+    OR OLD.is_main IS NOT NEW.is_main
+    OR OLD.sha256 IS NOT NEW.sha256
+BEGIN
+    UPDATE change_counter SET seq = seq + 1;
+    UPDATE photos SET version = (SELECT seq FROM change_counter), updated_at = datetime('now')
+    WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_photos_delete_tombstone AFTER DELETE ON photos
+BEGIN
+    UPDATE change_counter SET seq = seq + 1;
+    INSERT INTO change_tombstones (version, user_id, entity, row_id)
+    VALUES ((SELECT seq FROM change_counter), OLD.user_id, 'photos', OLD.id);
+END;
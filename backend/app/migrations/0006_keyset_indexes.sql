@@ -0,0 +1,24 @@
+-- Keyset pagination (see app/pagination.py). List endpoints order by their
+-- sort key and then id, so pages have a total order; each listing index gains
+-- id as its last column so a page is a single range scan with no sort step.
+-- The indexes they replace are prefixes of these.
+
+DROP INDEX IF EXISTS idx_experiences_user_start;
+CREATE INDEX IF NOT EXISTS idx_experiences_user_start_id
+    ON experiences (user_id, start_date DESC, id DESC);
+
+DROP INDEX IF EXISTS idx_job_descriptions_user_created;
+CREATE INDEX IF NOT EXISTS idx_job_descriptions_user_created_id
+    ON job_descriptions (user_id, created_at DESC, id DESC);
+
+DROP INDEX IF EXISTS idx_blurbs_user_created;
+CREATE INDEX IF NOT EXISTS idx_blurbs_user_created_id
+    ON blurbs (user_id, created_at DESC, id DESC);
+
+DROP INDEX IF EXISTS idx_blurbs_user_job_created;
+CREATE INDEX IF NOT EXISTS idx_blurbs_user_job_created_id
+    ON blurbs (user_id, job_description_id, created_at DESC, id DESC);
+
+DROP INDEX IF EXISTS idx_photos_user_main;
+CREATE INDEX IF NOT EXISTS idx_photos_user_main_id
+    ON photos (user_id, is_main DESC, id DESC);
@@ -0,0 +1,124 @@
+-- Per-user, per-collection versions for conditional GETs (see app/etags.py).
+--
+-- Each write to a user's rows bumps that user's counter for the collection,
+-- so a list endpoint can tell whether its response would differ from the one
+-- a client holds by reading one row, without running the list query.
+-- Tracked tables bump when 0005 stamps a new row version, which happens on
+-- inserts and on updates that change something; deletes bump directly.
+
+CREATE TABLE IF NOT EXISTS collection_versions (
+    user_id    TEXT NOT NULL,
+    collection TEXT NOT NULL,
+    version    INTEGER NOT NULL,
+    updated_at TEXT NOT NULL DEFAULT (datetime('now')),
+    PRIMARY KEY (user_id, collection),
+    FOREIGN KEY (user_id) REFERENCES users(id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+-- photos
+CREATE TRIGGER IF NOT EXISTS trg_photos_version_collection
+AFTER UPDATE OF version ON photos
+BEGIN
+    INSERT INTO collection_versions (user_id, collection, version)
+    VALUES (NEW.user_id, 'photos', 1)
+    ON CONFLICT (user_id, collection)
+    DO UPDATE SET version = version + 1, updated_at = datetime('now');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_photos_delete_collection AFTER DELETE ON photos
+BEGIN
+    INSERT INTO collection_versions (user_id, collection, version)
+    VALUES (OLD.user_id, 'photos', 1)
+    ON CONFLICT (user_id, collection)
+    DO UPDATE SET version = version + 1, updated_at = datetime('now');
+END;
+
+-- experiences
+CREATE TRIGGER IF NOT EXISTS trg_experiences_version_collection
+AFTER UPDATE OF version ON experiences
+BEGIN
+    INSERT INTO collection_versions (user_id, collection, version)
+    VALUES (NEW.user_id, 'experiences', 1)
+    ON CONFLICT (user_id, collection)
+    DO UPDATE SET version = version + 1, updated_at = datetime('now');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_experiences_delete_collection AFTER DELETE ON experiences
+BEGIN
+    INSERT INTO collection_versions (user_id, collection, version)
+    VALUES (OLD.user_id, 'experiences', 1)
+    ON CONFLICT (user_id, collection)
+    DO UPDATE SET version = version + 1, updated_at = datetime('now');
+END;
+
+-- projects
+CREATE TRIGGER IF NOT EXISTS trg_projects_version_collection
+AFTER UPDATE OF version ON projects
+BEGIN
+    INSERT INTO collection_versions (user_id, collection, version)
+    VALUES (NEW.user_id, 'projects', 1)
+    ON CONFLICT (user_id, collection)
+    DO UPDATE SET version = version + 1, updated_at = datetime('now');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_projects_delete_collection AFTER DELETE ON projects
+BEGIN
+    INSERT INTO collection_versions (user_id, collection, version)
+    VALUES (OLD.user_id, 'projects', 1)
+    ON CONFLICT (user_id, collection)
+    DO UPDATE SET version = version + 1, updated_at = datetime('now');
+END;
+
+-- job_descriptions
+CREATE TRIGGER IF NOT EXISTS trg_job_descriptions_version_collection
+AFTER UPDATE OF version ON job_descriptions
+BEGIN
+    INSERT INTO collection_versions (user_id, collection, version)
+    VALUES (NEW.user_id, 'job_descriptions', 1)
+    ON CONFLICT (user_id, collection)
+    DO UPDATE SET version = version + 1, updated_at = datetime('now');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_job_descriptions_delete_collection AFTER DELETE ON job_descriptions
+BEGIN
+    INSERT INTO collection_versions (user_id, collection, version)
+    VALUES (OLD.user_id, 'job_descriptions', 1)
+    ON CONFLICT (user_id, collection)
+    DO UPDATE SET version = version + 1, updated_at = datetime('now');
+END;
+
+-- blurbs
+CREATE TRIGGER IF NOT EXISTS trg_blurbs_version_collection
+AFTER UPDATE OF version ON blurbs
+BEGIN
+    INSERT INTO collection_versions (user_id, collection, version)
+    VALUES (NEW.user_id, 'blurbs', 1)
+    ON CONFLICT (user_id, collection)
+    DO UPDATE SET version = version + 1, updated_at = datetime('now');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_blurbs_delete_collection AFTER DELETE ON blurbs
+BEGIN
+    INSERT INTO collection_versions (user_id, collection, version)
+    VALUES (OLD.user_id, 'blurbs', 1)
+    ON CONFLICT (user_id, collection)
+    DO UPDATE SET version = version + 1, updated_at = datetime('now');
+END;
+
+-- profile (not change-tracked; its triggers bump the counter themselves)
+CREATE TRIGGER IF NOT EXISTS trg_profiles_insert_collection AFTER INSERT ON profiles
+BEGIN
+    INSERT INTO collection_versions (user_id, collection, version)
+    VALUES (NEW.user_id, 'profile', 1)
+    ON CONFLICT (user_id, collection)
+    DO UPDATE SET version = version + 1, updated_at = datetime('now');
+END;
+
+-- Any update: the response carries updated_at, which every save sets.
+CREATE TRIGGER IF NOT EXISTS trg_profiles_update_collection AFTER UPDATE ON profiles
+BEGIN
+    INSERT INTO collection_versions (user_id, collection, version)
+    VALUES (NEW.user_id, 'profile', 1)
+    ON CONFLICT (user_id, collection)
+    DO UPDATE SET version = version + 1, updated_at = datetime('now');
+END;
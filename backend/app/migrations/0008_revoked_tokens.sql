@@ -0,0 +1,14 @@
+-- Revoked access and refresh tokens (see app/tokens.py), by JWT id. Rows are
+-- kept until the token would have expired anyway. seq only grows, so each
+-- process can fetch the revocations made by the others since it last looked.
+
+CREATE TABLE IF NOT EXISTS revoked_tokens (
+    seq        INTEGER PRIMARY KEY AUTOINCREMENT,
+    jti        TEXT NOT NULL UNIQUE,
+    user_id    TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    revoked_at REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_revoked_tokens_expires
+    ON revoked_tokens (expires_at);
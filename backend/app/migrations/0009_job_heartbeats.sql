@@ -0,0 +1,6 @@
+-- Running jobs are touched every JOB_STALE_AFTER / 4 seconds by the process
+-- running them (see app/jobs.py). A job is re-queued only once its heartbeat,
+-- not its start, is older than JOB_STALE_AFTER, so a long export that is
+-- still making progress is never run twice.
+
+ALTER TABLE jobs ADD COLUMN heartbeat_at REAL;
@@ -0,0 +1,25 @@
+-- Projects list in the order they were added. They were paged on rowid,
+-- which VACUUM may renumber; they now page on a stored created_at (with
+-- milliseconds, so projects added in quick succession keep their order)
+-- and then id, like the other listings.
+--
+-- ALTER TABLE cannot add a column whose default is datetime('now'), so a
+-- trigger stamps new rows. Existing rows are stamped a second apart in
+-- their current rowid order, all before any project added from now on.
+
+ALTER TABLE projects ADD COLUMN created_at TEXT;
+
+UPDATE projects SET created_at = strftime(
+    '%Y-%m-%d %H:%M:%f', 'now',
+    printf('-%d seconds', (SELECT MAX(rowid) FROM projects) - rowid + 1)
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_projects_insert_created AFTER INSERT ON projects
+WHEN NEW.created_at IS NULL
+BEGIN
+    UPDATE projects SET created_at = strftime('%Y-%m-%d %H:%M:%f', 'now') WHERE id = NEW.id;
+END;
+
+DROP INDEX IF EXISTS idx_projects_user;
+CREATE INDEX IF NOT EXISTS idx_projects_user_created_id
+    ON projects (user_id, created_at, id);
@@ -0,0 +1,30 @@
+-- Decrypted provider keys are cached per process (see app/keys.py). Every
+-- write to a user's api_keys rows bumps their 'api_keys' collection version
+-- (the 0007 table), and a cached entry is only used while that version is
+-- unchanged, so a key added, changed or deleted through one process is seen
+-- by all of them at once.
+
+CREATE TRIGGER IF NOT EXISTS trg_api_keys_insert_collection AFTER INSERT ON api_keys
+BEGIN
+    INSERT INTO collection_versions (user_id, collection, version)
+    VALUES (NEW.user_id, 'api_keys', 1)
+    ON CONFLICT (user_id, collection)
+    DO UPDATE SET version = version + 1, updated_at = datetime('now');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_api_keys_update_collection
+AFTER UPDATE OF provider, encrypted_key ON api_keys
+BEGIN
+    INSERT INTO collection_versions (user_id, collection, version)
+    VALUES (NEW.user_id, 'api_keys', 1)
+    ON CONFLICT (user_id, collection)
+    DO UPDATE SET version = version + 1, updated_at = datetime('now');
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_api_keys_delete_collection AFTER DELETE ON api_keys
+BEGIN
+    INSERT INTO collection_versions (user_id, collection, version)
+    VALUES (OLD.user_id, 'api_keys', 1)
+    ON CONFLICT (user_id, collection)
+    DO UPDATE SET version = version + 1, updated_at = datetime('now');
+END;
@@ -0,0 +1,147 @@
+"""Keyset pagination and field projection for the list endpoints.
+
+Each list endpoint describes itself with a ``Listing``: its table, its sort
+key and the API fields it can return. ``page`` reads three optional query
+parameters:
+
+    limit    page size (1..PAGE_SIZE_MAX); without it every row is returned
+    cursor   the X-Next-Cursor of the previous page
+    fields   comma-separated API fields; only their columns are selected
+
+Pages are addressed by the sort key of the last row seen rather than an
+offset, so each page is one index range scan whatever its depth, and rows
+inserted or deleted meanwhile never shift later pages. Sort keys end with a
+unique column so the order is total. The cursor is the last row's key,
+base64-encoded JSON; it is opaque to clients.
+
+Response bodies stay plain JSON arrays; the next cursor travels in the
+X-Next-Cursor header and is absent on the last page.
+"""
+import base64
+import binascii
+import json
+import sqlite3
+from dataclasses import dataclass
+from typing import Any, Callable
+
+from flask import current_app, jsonify
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidPage(ValueError):
+    """A limit, cursor or fields parameter the listing cannot serve."""
+
+
+@dataclass(frozen=True)
+class Field:
+    column: str
+    convert: Callable[[Any], Any] | None = None
+
+
+@dataclass(frozen=True)
+class Listing:
+    table: str
+    fields: dict[str, Field]
+    # Sort columns, most significant first; the last one must be unique.
+    order: tuple[str, ...]
+    descending: bool = True
+
+    def to_dict(self, row, fields=None) -> dict:
+        names = fields or self.fields
+        out = {}
+        for name in names:
+            spec = self.fields[name]
+            value = row[spec.column]
+            out[name] = spec.convert(value) if spec.convert else value
+        return out
+
+
+@dataclass
+class Page:
+    items: list[dict]
+    next_cursor: str | None
+
+
+def encode_cursor(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(values)).encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, width: int) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, ValueError, UnicodeDecodeError):
+        raise InvalidPage("cursor is not valid") from None
+    if (
+        not isinstance(values, list)
+        or len(values) != width
+        or not all(isinstance(v, (str, int)) and not isinstance(v, bool) for v in values)
+    ):
+        raise InvalidPage("cursor is not valid")
+    return values
+
+
+def _fields(listing: Listing, raw: str | None) -> list[str] | None:
+    if not raw:
+        return None
+    names = [n.strip() for n in raw.split(",") if n.strip()]
+    unknown = [n for n in names if n not in listing.fields]
+    if unknown:
+        raise InvalidPage(
+            f"unknown field(s) {', '.join(unknown)}; available: {', '.join(listing.fields)}"
+        )
+    return names
+
+
+def _limit(raw: str | None) -> int | None:
+    if raw is None:
+        return None
+    maximum = current_app.config["PAGE_SIZE_MAX"]
+    if not raw.isdigit() or not 1 <= int(raw) <= maximum:
+        raise InvalidPage(f"limit must be between 1 and {maximum}")
+    return int(raw)
+
+
+def page(
+    db: sqlite3.Connection,
+    listing: Listing,
+    args,
+    where: str,
+    params: tuple,
+) -> Page:
+    """One page of ``listing`` filtered by ``where`` (e.g. ``"user_id = ?"``)."""
+    names = _fields(listing, args.get("fields"))
+    limit = _limit(args.get("limit"))
+    wanted = names or list(listing.fields)
+
+    columns = list(dict.fromkeys(
+        [listing.fields[n].column for n in wanted] + list(listing.order)
+    ))
+    sql = f"SELECT {', '.join(columns)} FROM {listing.table} WHERE {where}"
+    params = list(params)
+    if args.get("cursor"):
+        keys = ", ".join(listing.order)
+        marks = ", ".join("?" * len(listing.order))
+        sql += f" AND ({keys}) {'<' if listing.descending else '>'} ({marks})"
+        params += decode_cursor(args["cursor"], len(listing.order))
+    direction = " DESC" if listing.descending else ""
+    sql += " ORDER BY " + ", ".join(f"{c}{direction}" for c in listing.order)
+    if limit is not None:
+        # One extra row tells whether another page follows.
+        sql += " LIMIT ?"
+        params.append(limit + 1)
+
+    rows = db.execute(sql, params).fetchall()
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1][c] for c in listing.order)
+    return Page([listing.to_dict(r, names) for r in rows], next_cursor)
+
+
+def response(result: Page):
+    res = jsonify(result.items)
+    if result.next_cursor:
+        res.headers[NEXT_CURSOR_HEADER] = result.next_cursor
+    return res, 200
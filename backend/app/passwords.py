@@ -0,0 +1,112 @@
+"""Password hashing off the request thread.
+
+bcrypt at a useful cost is tens to hundreds of milliseconds of pure CPU per
+call. ``PasswordHasher`` runs ``hashpw``/``checkpw`` in a process pool of
+PASSWORD_HASH_WORKERS processes (default 2), so a burst of logins queues for
+the hashing cores instead of occupying every request worker. Each app
+process (e.g. each gunicorn worker) has its own pool, so size it as cores
+divided by app processes. At most PASSWORD_HASH_QUEUE calls may wait behind the running ones;
+beyond that ``HasherBusy`` is raised at once and the endpoint answers 429,
+since a login that would wait seconds for a core is better retried than
+held.
+
+The cost factor is BCRYPT_ROUNDS. A successful login whose stored hash has
+a different cost is rehashed at the current one (see ``needs_rehash``).
+
+PASSWORD_HASH_WORKERS = 0 hashes on the calling thread, without a pool.
+"""
+import multiprocessing
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor
+
+import bcrypt
+from flask import Flask
+
+from app.metrics import counters
+
+
+class HasherBusy(Exception):
+    """Every worker is busy and the queue is full."""
+
+
+class PasswordHasher:
+    def __init__(self, app: Flask, workers: int, max_pending: int, rounds: int):
+        self.rounds = rounds
+        self.workers = workers
+        self._slots = threading.BoundedSemaphore(max(workers, 1) + max_pending)
+        self._stats = counters(app, "passwordHashing", "hashed", "verified", "rehashed", "rejectedBusy")
+        self._executor: Executor | None = None
+        self._lock = threading.Lock()
+
+    def _pool(self) -> Executor:
+        # Created on first use, when the process already runs request, job
+        # and HTTP client threads. Forking it then could copy a lock some
+        # other thread holds into the child, so workers come from a
+        # single-threaded fork server instead. The server preloads only
+        # bcrypt: its default, __main__, would run `python run.py`'s
+        # create_app() in it. Workers still import __main__ to unpickle
+        # their tasks; the job queue refuses to start there (see jobs.py).
+        with self._lock:
+            if self._executor is None:
+                ctx = multiprocessing.get_context("forkserver")
+                ctx.set_forkserver_preload(["bcrypt"])
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=ctx)
+            return self._executor
+
+    def _run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            self._stats.incr("rejectedBusy")
+            raise HasherBusy()
+        try:
+            if self.workers == 0:
+                return fn(*args)
+            return self._pool().submit(fn, *args).result()
+        finally:
+            self._slots.release()
+
+    def hash(self, password: str) -> str:
+        hashed = self._run(bcrypt.hashpw, password.encode(), bcrypt.gensalt(self.rounds))
+        self._stats.incr("hashed")
+        return hashed.decode()
+
+    def verify(self, password: str, hashed: str) -> bool:
+        try:
+            ok = self._run(bcrypt.checkpw, password.encode(), hashed.encode())
+        except ValueError:
+            # Not a bcrypt hash (e.g. a placeholder row).
+            return False
+        self._stats.incr("verified")
+        return ok
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """True if ``hashed`` was made at a cost other than BCRYPT_ROUNDS."""
+        # $2b$12$<salt+hash>
+        parts = hashed.split("$")
+        return len(parts) < 4 or not parts[2].isdigit() or int(parts[2]) != self.rounds
+
+    def rehash(self, password: str, hashed: str) -> str | None:
+        """A hash of ``password`` at BCRYPT_ROUNDS if ``hashed`` used another cost."""
+        if not self.needs_rehash(hashed):
+            return None
+        new = self.hash(password)
+        self._stats.incr("rehashed")
+        return new
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(cancel_futures=True)
+                self._executor = None
+
+
+def get_hasher(app: Flask) -> PasswordHasher:
+    hasher = app.extensions.get("password_hasher")
+    if hasher is None:
+        hasher = PasswordHasher(
+            app,
+            workers=app.config["PASSWORD_HASH_WORKERS"],
+            max_pending=app.config["PASSWORD_HASH_QUEUE"],
+            rounds=app.config["BCRYPT_ROUNDS"],
+        )
+        app.extensions["password_hasher"] = hasher
+    return hasher
@@ -0,0 +1,218 @@
+"""Per-user and per-IP rate limits, and per-user concurrency caps.
+
+Rate limits are token buckets. A limit such as ``RATE_LIMIT_AGENT =
+"30/minute"`` lets each caller burst 30 requests and then refills at 30 per
+minute; a request finding its bucket empty is answered 429 with
+``Retry-After`` set to when the next token arrives. ``@limit(setting, per)``
+charges the bucket of the current user (``per=USER``, under
+``@require_auth``) or of the client address (``per=IP``). Buckets are keyed
+by setting, so every endpoint decorated with the same setting draws from the
+same bucket. An empty setting disables that limit; RATE_LIMIT_ENABLED=0
+disables them all.
+
+Buckets live in process memory (at most RATE_LIMIT_MAX_KEYS, least recently
+used dropped first), so with several worker processes each enforces its own
+share: a client spread over N processes gets up to N times the limit.
+
+Rate limits bound how often; ``@concurrency(setting)`` bounds how many at
+once. It holds one of ``config[setting]`` per-user slots for the duration of
+the view (for a streamed response, until the stream closes) and answers 429
+at once when none is free, so a slow LLM call cannot be stacked up by the
+same user.
+"""
+import functools
+import math
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Hashable
+
+from flask import Flask, current_app, g, jsonify, request
+
+from app.concurrency import KeyedSemaphore, SlotsExhausted
+from app.metrics import counters
+
+USER = "user"
+IP = "ip"
+
+# Seconds a client is asked to wait when a concurrency slot or queue is full.
+BUSY_RETRY_AFTER = 1
+
+_PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+
+@dataclass(frozen=True)
+class Rate:
+    capacity: float
+    per_second: float
+
+
+def parse_rate(spec: str) -> Rate | None:
+    """``"30/minute"`` -> Rate(30, 0.5); empty or zero means no limit."""
+    spec = spec.strip()
+    if not spec:
+        return None
+    count, _, period = spec.partition("/")
+    seconds = _PERIODS.get(period.strip().rstrip("s"))
+    if seconds is None:
+        raise ValueError(f"Invalid rate {spec!r}; expected e.g. '30/minute'")
+    count = float(count)
+    if count <= 0:
+        return None
+    return Rate(count, count / seconds)
+
+
+class TokenBuckets:
+    """Thread-safe token buckets, created full on first use."""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        # key -> (tokens, monotonic time they were counted)
+        self._buckets: OrderedDict[Hashable, tuple[float, float]] = OrderedDict()
+
+    def take(self, key: Hashable, rate: Rate, cost: float = 1.0) -> float:
+        """Take ``cost`` tokens from ``key``'s bucket.
+
+        Returns 0 if they were taken, otherwise the seconds until they would
+        be available (nothing is taken). A cost above the capacity takes a
+        full bucket, so it can still succeed.
+        """
+        cost = min(cost, rate.capacity)
+        now = time.monotonic()
+        with self._lock:
+            tokens, counted_at = self._buckets.pop(key, (rate.capacity, now))
+            tokens = min(rate.capacity, tokens + (now - counted_at) * rate.per_second)
+            if tokens >= cost:
+                tokens -= cost
+                wait = 0.0
+            else:
+                wait = (cost - tokens) / rate.per_second
+            self._buckets[key] = (tokens, now)
+            # The least recently used bucket has usually refilled anyway.
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return wait
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._buckets)
+
+
+class Limiter:
+    def __init__(self, app: Flask):
+        self.enabled = app.config["RATE_LIMIT_ENABLED"]
+        self.buckets = TokenBuckets(app.config["RATE_LIMIT_MAX_KEYS"])
+        self._rates: dict[str, Rate | None] = {}
+        self._slots: dict[str, KeyedSemaphore] = {}
+        self._lock = threading.Lock()
+        self._stats = counters(app, "rateLimit", "allowed", "limited", "busy")
+
+    def check(self, setting: str, key: Hashable, cost: float = 1.0) -> float:
+        """Charge ``cost`` requests to ``key`` under ``config[setting]``; 0 or seconds to wait."""
+        rate = self._rate(setting)
+        if not self.enabled or rate is None:
+            return 0.0
+        wait = self.buckets.take((setting, key), rate, cost)
+        self._stats.incr("limited" if wait else "allowed")
+        return wait
+
+    def slots(self, setting: str) -> KeyedSemaphore:
+        with self._lock:
+            slots = self._slots.get(setting)
+            if slots is None:
+                slots = KeyedSemaphore(current_app.config[setting])
+                self._slots[setting] = slots
+            return slots
+
+    def _rate(self, setting: str) -> Rate | None:
+        spec = current_app.config[setting]
+        if spec not in self._rates:
+            self._rates[spec] = parse_rate(spec)
+        return self._rates[spec]
+
+    def record_busy(self) -> None:
+        self._stats.incr("busy")
+
+
+def get_limiter(app: Flask) -> Limiter:
+    limiter = app.extensions.get("rate_limiter")
+    if limiter is None:
+        limiter = Limiter(app)
+        app.extensions["rate_limiter"] = limiter
+    return limiter
+
+
+def too_many(message: str, retry_after: float = BUSY_RETRY_AFTER, code: str | None = None):
+    """A 429 response asking the client to retry after ``retry_after`` seconds.
+
+    With ``code`` the body uses the ``{"error": {"code", "message"}}`` shape.
+    """
+    res = jsonify({"error": {"code": code, "message": message} if code else message})
+    res.headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+    return res, 429
+
+
+def charge(setting: str, key: Hashable, cost: float = 1.0, code: str | None = None):
+    """Charge ``cost`` tokens to ``key``; a 429 response if its bucket is short, else None.
+
+    For views whose cost is only known from the request body; ``@limit``
+    charges one token per request.
+    """
+    wait = get_limiter(current_app).check(setting, key, cost)
+    if wait:
+        seconds = max(1, math.ceil(wait))
+        return too_many(f"Too many requests, please retry in {seconds} s", wait, code)
+    return None
+
+
+def limit(setting: str, per: str = USER, code: str | None = None):
+    """Rate-limit a view by the token bucket in ``config[setting]``.
+
+    ``per=USER`` must be placed under ``@require_auth``; ``per=IP`` may go
+    above it, so unauthenticated floods are limited too. ``code`` is passed
+    to ``too_many`` for blueprints with coded errors.
+    """
+    def decorate(view):
+        @functools.wraps(view)
+        def wrapped(*args, **kwargs):
+            key = g.user_id if per == USER else request.remote_addr
+            refused = charge(setting, key, code=code)
+            if refused:
+                return refused
+            return view(*args, **kwargs)
+        return wrapped
+    return decorate
+
+
+def concurrency(setting: str):
+    """Allow each user at most ``config[setting]`` concurrent calls of a view.
+
+    Place under ``@require_auth``.
+    """
+    def decorate(view):
+        @functools.wraps(view)
+        def wrapped(*args, **kwargs):
+            limiter = get_limiter(current_app)
+            slots = limiter.slots(setting)
+            user_id = g.user_id
+            try:
+                slots.acquire(user_id, timeout=0)
+            except SlotsExhausted:
+                limiter.record_busy()
+                return too_many("Too many requests in progress, please retry shortly")
+            try:
+                res = current_app.make_response(view(*args, **kwargs))
+            except BaseException:
+                slots.release(user_id)
+                raise
+            if res.is_streamed:
+                # Freed when the server closes the response, whether the
+                # stream finished or the client went away.
+                res.call_on_close(lambda: slots.release(user_id))
+            else:
+                slots.release(user_id)
+            return res
+        return wrapped
+    return decorate
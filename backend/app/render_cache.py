@@ -0,0 +1,252 @@
+"""Content-addressed store of compiled CVs, with retention.
+
+Each compiled document is stored as ``<sha256 of its TeX source>.pdf`` (plus
+the matching ``.tex``) under LATEX_OUTPUT_DIR, sharded as ``ab/cd/<key>.pdf``
+so no single directory grows without bound. Compiling an unchanged CV is a
+file lookup instead of a pdflatex run, and a document keeps the same URL.
+
+Ownership lives in ``compiled_artifacts``: users can only download keys they
+compiled, and every hit or download refreshes ``last_used_at``. Owners' rows
+are dropped past LATEX_ARTIFACT_TTL or beyond LATEX_USER_QUOTA_BYTES per
+user, and least recently used documents are dropped while the store exceeds
+LATEX_CACHE_MAX_BYTES; a file is deleted once its last owner is gone, and
+its shard directories once they are empty. Preamble formats (see
+app/latex_engine.py) unused for LATEX_ARTIFACT_TTL are deleted too.
+"""
+import hashlib
+import os
+import re
+import shutil
+import sqlite3
+import time
+from pathlib import Path
+
+from flask import Flask, current_app
+
+from app import jobs
+from app.db import get_db
+from app.metrics import Counters, counters
+
+KEY_RE = re.compile(r"[0-9a-f]{64}")
+SCRATCH_PREFIX = "work-"
+FORMAT_DIR = "formats"
+
+
+def _counters(app: Flask) -> Counters:
+    return counters(
+        app, "renderCache", "hits", "misses", "stores", "evictions", "bytesEvicted",
+        "expired", "overQuota", "overBudget", "strays", "formatsExpired",
+    )
+
+
+def digest(tex: str) -> str:
+    return hashlib.sha256(tex.encode("utf-8")).hexdigest()
+
+
+def path_for(out_dir: Path, key: str, suffix: str = ".pdf") -> Path:
+    return out_dir / key[:2] / key[2:4] / f"{key}{suffix}"
+
+
+def _claim(db: sqlite3.Connection, user_id: str, key: str, size: int) -> None:
+    now = time.time()
+    db.execute(
+        """INSERT INTO compiled_artifacts (key, user_id, bytes, created_at, last_used_at)
+           VALUES (?, ?, ?, ?, ?)
+           ON CONFLICT (key, user_id) DO UPDATE SET last_used_at = excluded.last_used_at""",
+        (key, user_id, size, now, now),
+    )
+    db.commit()
+
+
+def lookup(app: Flask, db: sqlite3.Connection, out_dir: Path, user_id: str, key: str) -> Path | None:
+    """Return the cached PDF for ``key``, recording ``user_id`` as an owner."""
+    path = path_for(out_dir, key)
+    try:
+        size = path.stat().st_size
+    except FileNotFoundError:
+        _counters(app).incr("misses")
+        return None
+    _claim(db, user_id, key, size)
+    _counters(app).incr("hits")
+    return path
+
+
+def store(
+    app: Flask, db: sqlite3.Connection, out_dir: Path, user_id: str, key: str, pdf: Path, tex: Path
+) -> Path:
+    """Move a freshly compiled PDF and its source into the store.
+
+    Both moves are atomic renames, and the source goes first, so a PDF that
+    is visible under its final name always has its ``.tex`` next to it. The
+    owner's quota and the overall size budget are enforced straight away.
+    """
+    target = path_for(out_dir, key)
+    target.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.replace(tex, path_for(out_dir, key, ".tex"))
+    except FileNotFoundError:
+        # A sweep removed the shard directory while it was empty.
+        target.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tex, path_for(out_dir, key, ".tex"))
+    os.replace(pdf, target)
+    _claim(db, user_id, key, target.stat().st_size)
+    _counters(app).incr("stores")
+    _enforce_quota(app, db, out_dir, app.config["LATEX_USER_QUOTA_BYTES"], user_id)
+    _enforce_budget(app, db, out_dir, app.config["LATEX_CACHE_MAX_BYTES"], keep=key)
+    return target
+
+
+def open_owned(db: sqlite3.Connection, out_dir: Path, user_id: str, key: str, suffix: str) -> Path | None:
+    """Return ``user_id``'s stored file for ``key``, refreshing its last use."""
+    updated = db.execute(
+        "UPDATE compiled_artifacts SET last_used_at = ? WHERE key = ? AND user_id = ?",
+        (time.time(), key, user_id),
+    ).rowcount
+    db.commit()
+    path = path_for(out_dir, key, suffix)
+    return path if updated and path.exists() else None
+
+
+def _drop(app: Flask, db: sqlite3.Connection, out_dir: Path, rows: list, reason: str) -> None:
+    """Delete (key, user_id) owner rows, then the files of keys left unowned."""
+    if not rows:
+        return
+    db.executemany("DELETE FROM compiled_artifacts WHERE key = ? AND user_id = ?", rows)
+    db.commit()
+    stats = _counters(app)
+    stats.incr(reason, len(rows))
+    for key in {key for key, _ in rows}:
+        if db.execute("SELECT 1 FROM compiled_artifacts WHERE key = ? LIMIT 1", (key,)).fetchone():
+            continue
+        size = 0
+        for suffix in (".pdf", ".tex"):
+            path = path_for(out_dir, key, suffix)
+            try:
+                size += path.stat().st_size
+                path.unlink()
+            except FileNotFoundError:
+                pass
+        stats.incr("evictions")
+        stats.incr("bytesEvicted", size)
+        _remove_empty_shard(out_dir, path_for(out_dir, key).parent)
+
+
+def _remove_empty_shard(out_dir: Path, shard: Path) -> None:
+    """Remove ``ab/cd/`` and then ``ab/`` if nothing else is left in them."""
+    while shard != out_dir:
+        try:
+            shard.rmdir()
+        except OSError:  # not empty, or already gone
+            return
+        shard = shard.parent
+
+
+def _enforce_quota(
+    app: Flask, db: sqlite3.Connection, out_dir: Path, quota: int, user_id: str | None = None
+) -> None:
+    """Drop each user's least recently used documents beyond ``quota`` bytes.
+
+    A user's most recent document is always kept, even if it alone is over.
+    """
+    scope = "WHERE user_id = ?" if user_id else ""
+    rows = db.execute(
+        f"""SELECT key, user_id FROM (
+               SELECT key, user_id,
+                      SUM(bytes) OVER owner_recent AS used,
+                      ROW_NUMBER() OVER owner_recent AS position
+               FROM compiled_artifacts {scope}
+               WINDOW owner_recent AS (
+                   PARTITION BY user_id ORDER BY last_used_at DESC, key
+                   ROWS UNBOUNDED PRECEDING
+               )
+           )
+           WHERE used > ? AND position > 1""",
+        (user_id, quota) if user_id else (quota,),
+    ).fetchall()
+    _drop(app, db, out_dir, [tuple(r) for r in rows], "overQuota")
+
+
+def _enforce_budget(
+    app: Flask, db: sqlite3.Connection, out_dir: Path, max_bytes: int, keep: str | None = None
+) -> None:
+    """Drop least recently used documents until the store fits in ``max_bytes``."""
+    total = db.execute("SELECT COALESCE(SUM(bytes), 0) FROM compiled_artifacts").fetchone()[0]
+    if total <= max_bytes:
+        return
+    documents = db.execute(
+        "SELECT key, MAX(bytes) FROM compiled_artifacts GROUP BY key ORDER BY MAX(last_used_at)"
+    ).fetchall()
+    # The first sum counts shared documents once per owner; this one is exact.
+    total = sum(size for _, size in documents)
+    victims = []
+    for key, size in documents:
+        if total <= max_bytes:
+            break
+        if key == keep:
+            continue
+        victims.append(key)
+        total -= size
+    rows = []
+    for key in victims:
+        rows += [
+            (key, owner)
+            for (owner,) in db.execute(
+                "SELECT user_id FROM compiled_artifacts WHERE key = ?", (key,)
+            )
+        ]
+    _drop(app, db, out_dir, rows, "overBudget")
+
+
+def _remove_strays(app: Flask, out_dir: Path, now: float, ttl: float, scratch_ttl: float) -> None:
+    """Clear what is not a stored document: abandoned scratch directories,
+    and files at the top level, left there by the old flat layout (pdflatex
+    aux/log output at once, PDFs and sources once past the TTL).
+    """
+    stats = _counters(app)
+    for entry in os.scandir(out_dir):
+        age = now - entry.stat().st_mtime
+        if entry.is_dir():
+            if entry.name.startswith(SCRATCH_PREFIX) and age > scratch_ttl:
+                shutil.rmtree(entry.path, ignore_errors=True)
+                stats.incr("strays")
+        elif not entry.name.endswith((".pdf", ".tex")) or age > ttl:
+            Path(entry.path).unlink(missing_ok=True)
+            stats.incr("strays")
+
+
+def _expire_formats(app: Flask, out_dir: Path, now: float, ttl: float, scratch_ttl: float) -> None:
+    """Delete formats unused for ``ttl`` and directories left by dumps that crashed."""
+    format_dir = out_dir / FORMAT_DIR
+    if not format_dir.is_dir():
+        return
+    stats = _counters(app)
+    for entry in os.scandir(format_dir):
+        age = now - entry.stat().st_mtime
+        if entry.is_dir():
+            if age > scratch_ttl:
+                shutil.rmtree(entry.path, ignore_errors=True)
+        elif age > ttl:
+            Path(entry.path).unlink(missing_ok=True)
+            stats.incr("formatsExpired")
+
+
+def sweep(app: Flask, db: sqlite3.Connection, out_dir: Path) -> dict:
+    """Apply the whole retention policy once; return the renderCache counters."""
+    now = time.time()
+    ttl = app.config["LATEX_ARTIFACT_TTL"]
+    expired = db.execute(
+        "SELECT key, user_id FROM compiled_artifacts WHERE last_used_at < ?", (now - ttl,)
+    ).fetchall()
+    _drop(app, db, out_dir, [tuple(r) for r in expired], "expired")
+    _enforce_quota(app, db, out_dir, app.config["LATEX_USER_QUOTA_BYTES"])
+    _enforce_budget(app, db, out_dir, app.config["LATEX_CACHE_MAX_BYTES"])
+    _remove_strays(app, out_dir, now, ttl, app.config["JOB_STALE_AFTER"])
+    _expire_formats(app, out_dir, now, ttl, app.config["JOB_STALE_AFTER"])
+    return _counters(app).snapshot()
+
+
+@jobs.periodic("compiled-sweep", "LATEX_SWEEP_INTERVAL")
+def _periodic_sweep() -> None:
+    out_dir = Path(current_app.config["LATEX_OUTPUT_DIR"])
+    if out_dir.is_dir():
+        sweep(current_app, get_db(), out_dir)
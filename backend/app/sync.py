@@ -0,0 +1,101 @@
+"""Change tracking for incremental export and import.
+
+Triggers from migration 0005 give every insert or update of a tracked row a
+``version`` drawn from one global sequence, and record deletes as
+tombstones in the same sequence. The highest value a client has seen is its
+cursor: ``changes(db, user_id, since=cursor)`` returns the rows written and
+deleted after it, and a new cursor to pass next time.
+
+Tombstones older than CHANGE_TOMBSTONE_TTL seconds are pruned by a periodic
+task; a cursor from before the pruned range raises CursorExpired, and the
+client falls back to a full export.
+"""
+import sqlite3
+from dataclasses import dataclass, field
+
+from flask import Flask, current_app
+
+from app import jobs
+from app.db import get_db
+from app.metrics import counters
+
+# Tracked tables, in the order an import applies them (job descriptions
+# before the blurbs that reference them).
+TRACKED = ("photos", "experiences", "projects", "job_descriptions", "blurbs")
+
+
+class CursorExpired(ValueError):
+    """The cursor is older than the retained tombstones."""
+
+
+@dataclass
+class Changes:
+    cursor: int
+    since: int | None
+    rows: dict[str, list[sqlite3.Row]] = field(default_factory=dict)
+    deleted: dict[str, list[str]] = field(default_factory=dict)
+
+
+def current_cursor(db: sqlite3.Connection) -> int:
+    return db.execute("SELECT seq FROM change_counter WHERE id = 1").fetchone()[0]
+
+
+def changes(db: sqlite3.Connection, user_id: str, since: int | None = None) -> Changes:
+    """Rows of ``user_id`` changed after ``since`` (all rows if None), read in one snapshot."""
+    db.execute("BEGIN")
+    try:
+        counter = db.execute("SELECT seq, pruned_through FROM change_counter WHERE id = 1").fetchone()
+        if since is not None and since < counter["pruned_through"]:
+            raise CursorExpired(f"cursor {since} is older than {counter['pruned_through']}")
+        result = Changes(cursor=counter["seq"], since=since)
+        for table in TRACKED:
+            result.rows[table] = db.execute(
+                f"SELECT * FROM {table} WHERE user_id = ? AND version > ? ORDER BY version",
+                (user_id, since or 0),
+            ).fetchall()
+        if since is not None:
+            tombstones = db.execute(
+                "SELECT entity, row_id FROM change_tombstones "
+                "WHERE user_id = ? AND version > ? ORDER BY version",
+                (user_id, since),
+            ).fetchall()
+            for table in TRACKED:
+                # A row deleted and then written again (e.g. by a replacing
+                # import) is sent as a row, not as a deletion.
+                alive = {r["id"] for r in result.rows[table]}
+                gone = [t["row_id"] for t in tombstones if t["entity"] == table]
+                result.deleted[table] = [i for i in dict.fromkeys(gone) if i not in alive]
+    finally:
+        db.commit()
+    return result
+
+
+def prune(app: Flask, db: sqlite3.Connection) -> int:
+    """Drop tombstones past CHANGE_TOMBSTONE_TTL; return how many were removed."""
+    ttl = app.config["CHANGE_TOMBSTONE_TTL"]
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        horizon = db.execute(
+            "SELECT MAX(version) FROM change_tombstones WHERE deleted_at < datetime('now', ?)",
+            (f"-{int(ttl)} seconds",),
+        ).fetchone()[0]
+        removed = 0
+        if horizon is not None:
+            removed = db.execute(
+                "DELETE FROM change_tombstones WHERE version <= ?", (horizon,)
+            ).rowcount
+            db.execute(
+                "UPDATE change_counter SET pruned_through = MAX(pruned_through, ?) WHERE id = 1",
+                (horizon,),
+            )
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    counters(app, "sync", "tombstonesPruned").incr("tombstonesPruned", removed)
+    return removed
+
+
+@jobs.periodic("tombstone-prune", "CHANGE_PRUNE_INTERVAL")
+def _periodic_prune() -> None:
+    prune(current_app, get_db())
@@ -0,0 +1,89 @@
+"""Escaping user values for LaTeX, with separate paths for text, URLs and keywords.
+
+``text`` makes arbitrary text print literally. Rather than mapping every
+character through ``str.translate`` it runs one C-level ``str.replace`` per
+special character actually present, which is an order of magnitude faster on
+long, mostly plain descriptions (see benchmarks/bench_escape.py). Backslashes
+are parked on a NUL placeholder first so the braces of ``\\textbackslash{}``
+are not escaped again; NULs cannot be typeset and are dropped.
+
+``url`` prepares the first argument of ``\\href``: characters that cannot
+appear in a link are percent-encoded, and only ``%`` and ``#`` are escaped,
+which is what hyperref expects (escaping ``~`` or ``_`` there would change
+the link). ``keywords`` joins a stored JSON list and escapes it in one call.
+
+Short values (titles, dates, organisations, links, keyword lists) repeat
+across documents and are cached; long text is escaped directly.
+"""
+import json
+from functools import lru_cache
+from urllib.parse import quote
+
+# Values up to this length go through the cache.
+_CACHE_MAX_LEN = 256
+
+# Order matters: braces before the replacements that introduce them.
+_REPLACEMENTS = (
+    ("{", r"\{"),
+    ("}", r"\}"),
+    ("&", r"\&"),
+    ("%", r"\%"),
+    ("$", r"\$"),
+    ("#", r"\#"),
+    ("_", r"\_"),
+    ("~", r"\textasciitilde{}"),
+    ("^", r"\textasciicircum{}"),
+)
+# Kept raw in links: RFC 3986 reserved/unreserved characters and existing %XX escapes.
+_URL_SAFE = "/:?#[]@!$&'()*+,;=-._~%"
+
+
+def _text(value: str) -> str:
+    if "\x00" in value:
+        value = value.replace("\x00", "")
+    if "\\" in value:
+        value = value.replace("\\", "\x00")
+    for char, replacement in _REPLACEMENTS:
+        if char in value:
+            value = value.replace(char, replacement)
+    if "\x00" in value:
+        value = value.replace("\x00", r"\textbackslash{}")
+    return value
+
+
+_text_cached = lru_cache(maxsize=4096)(_text)
+
+
+def text(value: str | None) -> str:
+    """Escape ``value`` so LaTeX prints it exactly as written."""
+    if not value:
+        return ""
+    if len(value) <= _CACHE_MAX_LEN:
+        return _text_cached(value)
+    return _text(value)
+
+
+@lru_cache(maxsize=1024)
+def url(value: str | None) -> str:
+    """Escape ``value`` for use as the link target of ``\\href``."""
+    if not value:
+        return ""
+    return quote(value, safe=_URL_SAFE).replace("%", r"\%").replace("#", r"\#")
+
+
+def href(value: str) -> str:
+    """A clickable link showing the address itself."""
+    return rf"\href{{{url(value)}}}{{{text(value)}}}"
+
+
+@lru_cache(maxsize=4096)
+def keywords(raw: str | None) -> str:
+    """Escape a stored JSON keyword list as one comma-separated string."""
+    return text(", ".join(str(k) for k in json.loads(raw or "[]")))
+
+
+def cache_info() -> dict:
+    return {
+        name: fn.cache_info()._asdict()
+        for name, fn in (("text", _text_cached), ("url", url), ("keywords", keywords))
+    }
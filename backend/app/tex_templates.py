@@ -0,0 +1,192 @@
+"""Jinja2 templates for compiled CVs.
+
+Each layout is ``<templateId>.tex.j2`` in LATEX_TEMPLATE_DIR (by default
+app/templates/latex, which ships the built-in layouts). Templates use
+LaTeX-friendly delimiters so braces stay literal TeX::
+
+    \\VAR{name}             a value
+    \\BLOCK{ if items }     a statement
+    \\#{ comment }
+
+Compiled templates are cached by the environment; with
+LATEX_TEMPLATES_AUTO_RELOAD on, a template whose file changed on disk is
+recompiled on its next use. Values are escaped before they reach a
+template (see app/tex_escape.py), so templates insert them verbatim.
+
+Each layout defines ``experience(e)`` and ``project(p)`` macros. Their output
+is memoised per entry, keyed by (template version, entry id, content hash),
+so re-rendering after editing one blurb or entry only runs the macros for
+entries that changed; the document itself receives the finished fragments.
+"""
+import hashlib
+import json
+import re
+from pathlib import Path
+
+import jinja2
+from flask import Flask
+
+from app import tex_escape
+from app.cache import TTLCache
+
+TEMPLATE_SUFFIX = ".tex.j2"
+DEFAULT_TEMPLATE = "modern-1"
+BLURB_TYPES = ("summary", "skills", "motivation", "closing")
+# Row fields each fragment depends on; any change gives it a new cache key.
+_EXPERIENCE_FIELDS = ("title", "organization", "start_date", "end_date", "description", "keywords")
+_PROJECT_FIELDS = ("title", "description", "keywords")
+
+_TEMPLATE_ID = re.compile(r"[a-z0-9][a-z0-9-]*")
+
+
+class UnknownTemplate(ValueError):
+    """No template exists with the requested id."""
+
+
+def get_environment(app: Flask) -> jinja2.Environment:
+    env = app.extensions.get("tex_templates")
+    if env is None:
+        env = jinja2.Environment(
+            loader=jinja2.FileSystemLoader(app.config["LATEX_TEMPLATE_DIR"]),
+            block_start_string=r"\BLOCK{",
+            block_end_string="}",
+            variable_start_string=r"\VAR{",
+            variable_end_string="}",
+            comment_start_string=r"\#{",
+            comment_end_string="}",
+            trim_blocks=True,
+            lstrip_blocks=True,
+            autoescape=False,
+            undefined=jinja2.StrictUndefined,
+            auto_reload=app.config["LATEX_TEMPLATES_AUTO_RELOAD"],
+        )
+        app.extensions["tex_templates"] = env
+    return env
+
+
+def template_ids(app: Flask) -> list[str]:
+    found = Path(app.config["LATEX_TEMPLATE_DIR"]).glob(f"*{TEMPLATE_SUFFIX}")
+    return sorted(p.name[: -len(TEMPLATE_SUFFIX)] for p in found)
+
+
+def get_template(app: Flask, template_id: str) -> jinja2.Template:
+    if not _TEMPLATE_ID.fullmatch(template_id or ""):
+        raise UnknownTemplate(template_id)
+    env = get_environment(app)
+    try:
+        template = env.get_template(template_id + TEMPLATE_SUFFIX)
+    except jinja2.TemplateNotFound:
+        raise UnknownTemplate(template_id) from None
+    if not hasattr(template, "tex_version"):
+        # A reloaded template is a new object, so this runs once per version.
+        source = env.loader.get_source(env, template.name)[0]
+        template.tex_version = hashlib.sha256(f"{template.name}\0{source}".encode()).hexdigest()[:16]
+    return template
+
+
+def _fragment_cache(app: Flask) -> TTLCache:
+    cache = app.extensions.get("tex_fragments")
+    if cache is None:
+        cache = TTLCache(
+            maxsize=app.config["LATEX_FRAGMENT_CACHE_SIZE"],
+            ttl=app.config["LATEX_FRAGMENT_CACHE_TTL"],
+        )
+        app.extensions["tex_fragments"] = cache
+    return cache
+
+
+def fragment_stats(app: Flask) -> dict:
+    stats = _fragment_cache(app).stats()
+    lookups = stats["hits"] + stats["misses"]
+    stats["hitRate"] = round(stats["hits"] / lookups, 4) if lookups else 0.0
+    return stats
+
+
+def _macros(template: jinja2.Template):
+    """The template's module, for calling its per-entry macros directly."""
+    module = getattr(template, "tex_macros", None)
+    if module is None:
+        module = template.make_module(document_context({}, [], [], [], 11))
+        template.tex_macros = module
+    return module
+
+
+def _experience(exp: dict) -> dict:
+    return {
+        "title": tex_escape.text(exp["title"]),
+        "organization": tex_escape.text(exp["organization"]),
+        "start": tex_escape.text(exp.get("start_date")),
+        "end": tex_escape.text(exp.get("end_date") or "Present"),
+        "description": tex_escape.text(exp.get("description")),
+        "keywords": tex_escape.keywords(exp.get("keywords")),
+    }
+
+
+def _project(proj: dict) -> dict:
+    return {
+        "title": tex_escape.text(proj["title"]),
+        "description": tex_escape.text(proj.get("description")),
+        "keywords": tex_escape.keywords(proj.get("keywords")),
+    }
+
+
+def _fragments(app: Flask, template: jinja2.Template, kind: str, rows: list, fields, to_context) -> list[str]:
+    cache = _fragment_cache(app)
+    out = []
+    for row in rows:
+        content = hashlib.sha1(json.dumps([row.get(f) for f in fields]).encode()).hexdigest()
+        key = (template.tex_version, kind, row.get("id"), content)
+        tex = cache.get(key)
+        if tex is None:
+            tex = str(getattr(_macros(template), kind)(to_context(row)))
+            cache.set(key, tex)
+        out.append(tex)
+    return out
+
+
+def document_context(
+    profile: dict, blurbs: list, experience_tex: list, project_tex: list, font_size: int
+) -> dict:
+    """Escape the profile and blurbs; entries arrive as rendered fragments."""
+    first, last = tex_escape.text(profile.get("first_name")), tex_escape.text(profile.get("last_name"))
+    name = f"{first} {last}".strip()
+    contact = [tex_escape.text(profile[f]) for f in ("email", "phone", "location") if profile.get(f)]
+    contact += [tex_escape.href(profile[f]) for f in ("website", "linkedin", "github") if profile.get(f)]
+
+    blurb_map = dict.fromkeys(BLURB_TYPES, "")
+    for b in blurbs:
+        blurb_map[b["type"]] = tex_escape.text(b["content"])
+
+    return {
+        "font_size": int(font_size),
+        "name": name or "Your Name",
+        "contact": contact,
+        "blurbs": blurb_map,
+        "experiences": experience_tex,
+        "projects": project_tex,
+    }
+
+
+def render(app: Flask, template_id: str, context: dict) -> str:
+    return get_template(app, template_id).render(context).strip()
+
+
+def render_document(
+    app: Flask,
+    template_id: str,
+    profile: dict,
+    blurbs: list,
+    experiences: list,
+    projects: list,
+    font_size: int,
+) -> str:
+    """Render a whole CV from database rows, reusing unchanged entry fragments."""
+    template = get_template(app, template_id)
+    context = document_context(
+        profile,
+        blurbs,
+        _fragments(app, template, "experience", experiences, _EXPERIENCE_FIELDS, _experience),
+        _fragments(app, template, "project", projects, _PROJECT_FIELDS, _project),
+        font_size,
+    )
+    return template.render(context).strip()
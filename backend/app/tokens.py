@@ -0,0 +1,197 @@
+"""Access and refresh tokens, their verification cache and revocation.
+
+Login returns a short-lived access token (ACCESS_TOKEN_TTL) sent on every
+request, and a refresh token (REFRESH_TOKEN_TTL) that /auth/refresh trades
+for a new pair. Both are HS256 JWTs with a random ``jti``.
+
+Per process, ``TokenState`` keeps:
+
+* an LRU of verified access tokens -> Claims, each entry expiring with its
+  token, so the signature and claims are checked once per token rather than
+  once per request;
+* a Bloom filter of revoked ``jti``s. A token whose jti is not in it is not
+  revoked, which is the answer for nearly every request and costs no query;
+  a "maybe" is settled against the ``revoked_tokens`` table.
+
+Logout and refresh-token rotation write to ``revoked_tokens``. The writing
+process adds the jti to its filter at once; the others pick it up within
+TOKEN_REVOCATION_SYNC seconds by reading rows past the last ``seq`` they saw.
+Rows are pruned once the token has expired anyway.
+"""
+import sqlite3
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+
+import jwt
+from flask import Flask, current_app
+
+from app import jobs
+from app.cache import BloomFilter, TTLCache
+from app.db import get_db
+from app.metrics import Counters, counters
+
+ACCESS = "access"
+REFRESH = "refresh"
+
+
+class TokenError(Exception):
+    """The token cannot be used; ``str(exc)`` is the user-facing reason."""
+
+
+class TokenExpired(TokenError):
+    pass
+
+
+class TokenRevoked(TokenError):
+    pass
+
+
+def _counters(app: Flask) -> Counters:
+    return counters(app, "tokens", "revocationLookups", "revoked", "pruned")
+
+
+@dataclass(frozen=True)
+class Claims:
+    user_id: str
+    jti: str
+    expires_at: float
+    kind: str
+
+
+def issue(user_id: str, kind: str = ACCESS) -> str:
+    ttl = current_app.config["ACCESS_TOKEN_TTL" if kind == ACCESS else "REFRESH_TOKEN_TTL"]
+    now = int(time.time())
+    payload = {"sub": user_id, "typ": kind, "jti": uuid.uuid4().hex, "iat": now, "exp": now + ttl}
+    return jwt.encode(payload, current_app.config["SECRET_KEY"], algorithm="HS256")
+
+
+def issue_pair(user_id: str) -> dict:
+    return {
+        "token": issue(user_id, ACCESS),
+        "refreshToken": issue(user_id, REFRESH),
+        "expiresIn": current_app.config["ACCESS_TOKEN_TTL"],
+    }
+
+
+def decode(token: str, kind: str) -> Claims:
+    """Check the signature, expiry and type of ``token``; no revocation check."""
+    try:
+        payload = jwt.decode(
+            token,
+            current_app.config["SECRET_KEY"],
+            algorithms=["HS256"],
+            options={"require": ["sub", "exp", "jti"]},
+        )
+    except jwt.ExpiredSignatureError:
+        raise TokenExpired("Token expired") from None
+    except jwt.InvalidTokenError:
+        raise TokenError("Invalid token") from None
+    if payload.get("typ") != kind:
+        raise TokenError("Invalid token")
+    return Claims(payload["sub"], payload["jti"], float(payload["exp"]), kind)
+
+
+class TokenState:
+    def __init__(self, app: Flask):
+        self.sync_interval = app.config["TOKEN_REVOCATION_SYNC"]
+        self.capacity = app.config["TOKEN_BLOOM_CAPACITY"]
+        self.cache = TTLCache(app.config["TOKEN_CACHE_SIZE"], app.config["ACCESS_TOKEN_TTL"])
+        self._stats = _counters(app)
+        self._lock = threading.Lock()
+        self._bloom = BloomFilter(self.capacity)
+        self._last_seq = 0
+        self._synced_at = float("-inf")
+
+    def verify(self, token: str) -> Claims:
+        """Claims of a valid, unrevoked access token; raises TokenError otherwise.
+
+        Runs in an app context; the database is only touched when the
+        revocation filter needs a sync or cannot rule the token out.
+        """
+        claims = self.cache.get(token)
+        if claims is None:
+            claims = decode(token, ACCESS)
+            self.cache.set(token, claims, ttl=claims.expires_at - time.time())
+        elif claims.expires_at <= time.time():
+            raise TokenExpired("Token expired")
+        if self.is_revoked(claims.jti):
+            raise TokenRevoked("Token revoked")
+        return claims
+
+    def is_revoked(self, jti: str) -> bool:
+        self._sync()
+        if jti not in self._bloom:
+            return False
+        self._stats.incr("revocationLookups")
+        row = get_db().execute("SELECT 1 FROM revoked_tokens WHERE jti = ?", (jti,)).fetchone()
+        return row is not None
+
+    def revoke(self, db: sqlite3.Connection, claims: Claims) -> bool:
+        """Revoke ``claims``' token; False if it already was."""
+        cur = db.execute(
+            "INSERT OR IGNORE INTO revoked_tokens (jti, user_id, expires_at, revoked_at) "
+            "VALUES (?, ?, ?, ?)",
+            (claims.jti, claims.user_id, claims.expires_at, time.time()),
+        )
+        db.commit()
+        with self._lock:
+            self._bloom.add(claims.jti)
+        if cur.rowcount:
+            self._stats.incr("revoked")
+        return cur.rowcount == 1
+
+    def _sync(self) -> None:
+        if time.monotonic() - self._synced_at < self.sync_interval:
+            return
+        with self._lock:
+            if time.monotonic() - self._synced_at < self.sync_interval:
+                return
+            if self._bloom.count > self.capacity:
+                # Overfull: start again from the rows still stored.
+                self._bloom = BloomFilter(self.capacity)
+                self._last_seq = 0
+            for seq, jti in get_db().execute(
+                "SELECT seq, jti FROM revoked_tokens WHERE seq > ? ORDER BY seq",
+                (self._last_seq,),
+            ):
+                self._bloom.add(jti)
+                self._last_seq = seq
+            self._synced_at = time.monotonic()
+
+    def stats(self) -> dict:
+        return {"cache": self.cache.stats(), "bloom": self._bloom.stats()}
+
+
+def get_tokens(app: Flask) -> TokenState:
+    state = app.extensions.get("token_state")
+    if state is None:
+        state = TokenState(app)
+        app.extensions["token_state"] = state
+    return state
+
+
+def refresh(db: sqlite3.Connection, refresh_token: str) -> dict:
+    """Trade a refresh token for a new pair; the old refresh token is revoked."""
+    claims = decode(refresh_token, REFRESH)
+    # Revoking is the check: of two requests racing with one token, only
+    # the first inserts the row.
+    if not get_tokens(current_app).revoke(db, claims):
+        raise TokenRevoked("Token revoked")
+    return issue_pair(claims.user_id)
+
+
+def prune(app: Flask, db: sqlite3.Connection) -> int:
+    """Forget revocations of tokens that have expired; return how many."""
+    removed = db.execute(
+        "DELETE FROM revoked_tokens WHERE expires_at < ?", (time.time(),)
+    ).rowcount
+    db.commit()
+    _counters(app).incr("pruned", removed)
+    return removed
+
+
+@jobs.periodic("token-prune", "TOKEN_PRUNE_INTERVAL")
+def _periodic_prune() -> None:
+    prune(current_app, get_db())
@@ -0,0 +1,77 @@
+"""Per-request cost of authentication.
+
+Times --requests GETs through the Flask test client against trivial views
+that differ only in how they authenticate, and reports microseconds per
+request above an unauthenticated view:
+
+    jwt          the previous require_auth: jwt.decode on every request
+    cached       require_auth: verified-token cache hit, Bloom filter says
+                 the token is not revoked
+    lookup       as cached, but the jti is in the Bloom filter, so the
+                 revocation table is queried (a false positive's cost)
+
+    cd backend && python -m benchmarks.bench_auth [--requests 20000]
+"""
+import argparse
+import tempfile
+import time
+
+import jwt
+from flask import current_app, g, jsonify, request
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    args = parser.parse_args()
+
+    from app import create_app, tokens
+    from app.auth_utils import generate_token, require_auth
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({"DATABASE": f"{tmp}/bench.db"})
+
+        @app.get("/bench/none")
+        def bench_none():
+            return jsonify({}), 200
+
+        @app.get("/bench/jwt")
+        def bench_jwt():
+            token = request.headers["Authorization"][7:]
+            g.user_id = jwt.decode(token, current_app.config["SECRET_KEY"], algorithms=["HS256"])["sub"]
+            return jsonify({}), 200
+
+        @app.get("/bench/cached")
+        @require_auth
+        def bench_cached():
+            return jsonify({}), 200
+
+        with app.app_context():
+            headers = {"Authorization": f"Bearer {generate_token('u')}"}
+            suspect = generate_token("u")
+            # Put the second token's jti in the filter without revoking it.
+            state = tokens.get_tokens(app)
+            state._bloom.add(tokens.decode(suspect, tokens.ACCESS).jti)
+        client = app.test_client()
+
+        def timed(url: str, hdrs: dict) -> float:
+            for _ in range(200):
+                client.get(url, headers=hdrs)
+            start = time.perf_counter()
+            for _ in range(args.requests):
+                client.get(url, headers=hdrs)
+            return (time.perf_counter() - start) / args.requests * 1e6
+
+        base = timed("/bench/none", {})
+        print(f"{args.requests} requests each; unauthenticated view {base:.1f} us/request")
+        for name, url, hdrs in [
+            ("jwt", "/bench/jwt", headers),
+            ("cached", "/bench/cached", headers),
+            ("lookup", "/bench/cached", {"Authorization": f"Bearer {suspect}"}),
+        ]:
+            us = timed(url, hdrs)
+            print(f"{name:<7} {us:7.1f} us/request  auth overhead {us - base:6.1f} us")
+
+
+if __name__ == "__main__":
+    main()
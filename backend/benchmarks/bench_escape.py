@@ -0,0 +1,52 @@
+"""Escaping throughput on megabyte-sized descriptions.
+
+Compares app.tex_escape.text with the single str.translate table it
+replaced, on ~1 MB of text that is plain ASCII, ASCII with sparse LaTeX
+specials, accented/CJK prose, and special-dense markup.
+
+    cd backend && python -m benchmarks.bench_escape [--mb N] [--runs N]
+"""
+import argparse
+import statistics
+import time
+
+from app import tex_escape
+
+_TRANSLATE = str.maketrans({
+    "&": r"\&", "%": r"\%", "$": r"\$", "#": r"\#", "_": r"\_", "{": r"\{", "}": r"\}",
+    "~": r"\textasciitilde{}", "^": r"\textasciicircum{}", "\\": r"\textbackslash{}",
+})
+
+CORPORA = {
+    "plain ascii": "Built a data pipeline and reporting for all services. ",
+    "sparse specials": "Built a data_pipeline & reporting for 100% of C# services. ",
+    "unicode prose": "Développé une chaîne de données — 数据处理 — naïve café. ",
+    "dense specials": r"{x_1^2} & $y_2$ ~ 50% #tag \path ",
+}
+
+
+def _throughput(fn, value: str, runs: int) -> float:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(value)
+        samples.append(time.perf_counter() - start)
+    return len(value.encode()) / 1e6 / statistics.median(samples)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mb", type=float, default=1.0)
+    parser.add_argument("--runs", type=int, default=7)
+    args = parser.parse_args()
+
+    for name, unit in CORPORA.items():
+        value = unit * int(args.mb * 1e6 // len(unit.encode()))
+        assert tex_escape.text(value) == value.translate(_TRANSLATE)
+        old = _throughput(lambda v: v.translate(_TRANSLATE), value, args.runs)
+        new = _throughput(tex_escape.text, value, args.runs)
+        print(f"{name:<16} translate={old:8.1f} MB/s  tex_escape={new:8.1f} MB/s  x{new / old:5.1f}")
+
+
+if __name__ == "__main__":
+    main()
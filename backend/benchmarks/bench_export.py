@@ -0,0 +1,107 @@
+"""Peak memory of /export with a large photo library.
+
+Writes --mb megabytes of incompressible photos for one user, then exports
+them in a fresh interpreter per mode and reports the peak RSS growth:
+
+    streaming   GET /export, consuming the streamed response chunk by chunk
+    buffered    the previous implementation: the whole ZIP built in a BytesIO
+
+    cd backend && python -m benchmarks.bench_export [--mb 500] [--photo-mb 5]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import uuid
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+_CHILD = """
+import io, json, resource, sys, time, zipfile
+from pathlib import Path
+from app import create_app
+from app.auth_utils import generate_token
+
+db_path, photos_dir, user_id, mode = sys.argv[1:]
+app = create_app({"DATABASE": db_path, "PHOTOS_DIR": photos_dir})
+client = app.test_client()
+with app.app_context():
+    headers = {"Authorization": f"Bearer {generate_token(user_id)}"}
+client.get("/health")
+
+def rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+before = rss_mb()
+start = time.perf_counter()
+total = 0
+if mode == "streaming":
+    res = client.get("/export", headers=headers, buffered=False)
+    for chunk in res.response:
+        total += len(chunk)
+    res.close()
+else:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("data.json", "{}")
+        for path in sorted(Path(photos_dir).iterdir()):
+            zf.write(str(path), f"photos/{path.name}")
+    total = len(buf.getvalue())
+elapsed = time.perf_counter() - start
+print(json.dumps({"peakGrowthMb": rss_mb() - before, "archiveMb": total / 2**20, "seconds": elapsed}))
+"""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mb", type=int, default=500, help="total size of the photos")
+    parser.add_argument("--photo-mb", type=int, default=5, help="size of each photo")
+    args = parser.parse_args()
+
+    from app import create_app
+    from app.db import get_db
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "bench.db")
+        photos_dir = Path(tmp) / "photos"
+        photos_dir.mkdir()
+        user_id = str(uuid.uuid4())
+        app = create_app({"DATABASE": db_path, "PHOTOS_DIR": str(photos_dir)})
+        with app.app_context():
+            db = get_db()
+            db.execute(
+                "INSERT INTO users (id, email, password_hash) VALUES (?, ?, ?)",
+                (user_id, "bench@example.com", "x"),
+            )
+            for i in range(args.mb // args.photo_mb):
+                filename = f"{uuid.uuid4()}.jpg"
+                with open(photos_dir / filename, "wb") as f:
+                    for _ in range(args.photo_mb):
+                        f.write(os.urandom(2**20))
+                db.execute(
+                    "INSERT INTO photos (id, user_id, filename, is_main) VALUES (?, ?, ?, ?)",
+                    (str(uuid.uuid4()), user_id, filename, int(i == 0)),
+                )
+            db.commit()
+
+        print(f"{args.mb} MB of photos in {args.photo_mb} MB files")
+        for mode in ("streaming", "buffered"):
+            out = subprocess.run(
+                [sys.executable, "-c", _CHILD, db_path, str(photos_dir), user_id, mode],
+                cwd=BACKEND_DIR,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            result = json.loads(out.strip().splitlines()[-1])
+            print(
+                f"{mode:<10} peak RSS growth={result['peakGrowthMb']:8.1f} MB  "
+                f"archive={result['archiveMb']:7.1f} MB  time={result['seconds']:6.2f} s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""Time and peak memory of /import for a large archive.
+
+Builds an export with --experiences experiences and --photos photos of
+--photo-kb KB each, then imports it in a fresh interpreter per mode:
+
+    pipeline    POST /import (spooled upload, validated up front, executemany
+                inside one transaction)
+    legacy      the previous implementation: the upload read into memory,
+                namelist() scanned per photo, one execute per row
+
+    cd backend && python -m benchmarks.bench_import [--experiences 10000] [--photos 1000]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import uuid
+import zipfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+_CHILD = """
+import io, json, resource, sys, time, zipfile
+from pathlib import Path
+from flask import request
+from app import create_app
+from app.auth_utils import generate_token
+from app.db import get_db
+
+db_path, photos_dir, archive, mode = sys.argv[1:]
+app = create_app({"DATABASE": db_path, "PHOTOS_DIR": photos_dir})
+client = app.test_client()
+with app.app_context():
+    db = get_db()
+    db.execute("INSERT INTO users (id, email, password_hash) VALUES ('u', 'u@example.com', 'x')")
+    db.commit()
+    headers = {"Authorization": f"Bearer {generate_token('u')}"}
+
+
+def legacy(raw):
+    zf = zipfile.ZipFile(io.BytesIO(raw))
+    data = json.loads(zf.read("data.json"))
+    db = get_db()
+    db.execute("DELETE FROM photos WHERE user_id = 'u'")
+    for meta in data["photos"]:
+        zip_path = f"photos/{meta['filename']}"
+        if zip_path in zf.namelist():
+            (Path(photos_dir) / meta["filename"]).write_bytes(zf.read(zip_path))
+        db.execute(
+            "INSERT OR REPLACE INTO photos (id, user_id, filename, is_main) VALUES (?, 'u', ?, ?)",
+            (meta["id"], meta["filename"], 1 if meta.get("isMain") else 0),
+        )
+    db.execute("DELETE FROM experiences WHERE user_id = 'u'")
+    for e in data["experiences"]:
+        db.execute(
+            "INSERT INTO experiences (id, user_id, category, title, organization, start_date, "
+            "end_date, description, keywords) VALUES (?, 'u', ?, ?, ?, ?, ?, ?, ?)",
+            (e["id"], e["category"], e["title"], e["organization"], e["start_date"],
+             e.get("end_date"), e.get("description"), json.dumps(e.get("keywords", []))),
+        )
+    db.commit()
+
+
+@app.post("/legacy-import")
+def legacy_import():
+    legacy(request.files["file"].read())
+    return "", 200
+
+
+client.get("/health")
+
+
+def rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+before = rss_mb()
+start = time.perf_counter()
+url = "/import" if mode == "pipeline" else "/legacy-import"
+with open(archive, "rb") as f:
+    res = client.post(url, data={"file": (f, "cv-export.zip")}, headers=headers)
+assert res.status_code == 200, res.get_json()
+elapsed = time.perf_counter() - start
+with app.app_context():
+    count = get_db().execute("SELECT COUNT(*) FROM experiences").fetchone()[0]
+print(json.dumps({"peakGrowthMb": rss_mb() - before, "seconds": elapsed, "experiences": count}))
+"""
+
+
+def build_archive(path: Path, experiences: int, photos: int, photo_kb: int) -> None:
+    data = {
+        "version": 1,
+        "profile": {"first_name": "Bench", "last_name": "Mark"},
+        "photos": [
+            {"id": str(uuid.uuid4()), "filename": f"{uuid.uuid4()}.jpg", "isMain": i == 0}
+            for i in range(photos)
+        ],
+        "experiences": [
+            {
+                "id": str(uuid.uuid4()),
+                "category": ("work", "education", "hobby")[i % 3],
+                "title": f"Role {i}",
+                "organization": f"Organisation {i % 50}",
+                "start_date": f"{2000 + i % 25}-01-01",
+                "end_date": None,
+                "description": "Did things. " * 20,
+                "keywords": ["python", "sql", f"k{i % 100}"],
+            }
+            for i in range(experiences)
+        ],
+    }
+    with zipfile.ZipFile(path, "w") as zf:
+        zf.writestr("data.json", json.dumps(data), zipfile.ZIP_DEFLATED)
+        for meta in data["photos"]:
+            zf.writestr(f"photos/{meta['filename']}", os.urandom(photo_kb * 1024))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--experiences", type=int, default=10000)
+    parser.add_argument("--photos", type=int, default=1000)
+    parser.add_argument("--photo-kb", type=int, default=100, help="size of each photo")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        archive = Path(tmp) / "cv-export.zip"
+        build_archive(archive, args.experiences, args.photos, args.photo_kb)
+        size_mb = archive.stat().st_size / 2**20
+        print(f"{args.experiences} experiences, {args.photos} photos, archive {size_mb:.1f} MB")
+        for mode in ("pipeline", "legacy"):
+            run_dir = Path(tmp) / mode
+            (run_dir / "photos").mkdir(parents=True)
+            out = subprocess.run(
+                [sys.executable, "-c", _CHILD, str(run_dir / "bench.db"),
+                 str(run_dir / "photos"), str(archive), mode],
+                cwd=BACKEND_DIR,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+            result = json.loads(out.strip().splitlines()[-1])
+            print(
+                f"{mode:<9} time={result['seconds']:6.2f} s  "
+                f"peak RSS growth={result['peakGrowthMb']:7.1f} MB  rows={result['experiences']}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Cold vs. precompiled-preamble compile latency.
+
+Compiles the same CV repeatedly through LatexEngine, once with preamble
+formats disabled (every run loads all packages) and once enabled (the first
+run dumps the format, the rest start from it). Uses the real pdflatex when
+it is on PATH, otherwise tests/fake_pdflatex.py with a simulated per-package
+load time.
+
+    cd backend && python -m benchmarks.bench_latex [--runs N] [--fake] [--package-ms MS]
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+
+def _install_fake(bin_dir: Path, package_ms: float) -> None:
+    script = bin_dir / "pdflatex"
+    script.write_text(
+        f'#!/bin/sh\nexec "{sys.executable}" "{BACKEND_DIR / "tests" / "fake_pdflatex.py"}" "$@"\n'
+    )
+    script.chmod(0o755)
+    os.environ["PATH"] = f"{bin_dir}{os.pathsep}{os.environ['PATH']}"
+    os.environ["FAKE_PDFLATEX_PACKAGE_MS"] = str(package_ms)
+
+
+def _document() -> str:
+    from app.blueprints.latex import _build_tex
+
+    profile = {"first_name": "Ada", "last_name": "Lovelace", "email": "ada@example.com"}
+    experiences = [
+        {
+            "title": f"Role {i}",
+            "organization": "Analytical Engine Co.",
+            "start_date": "1842-01-01",
+            "description": "Wrote programs & notes.",
+            "keywords": '["Bernoulli"]',
+        }
+        for i in range(5)
+    ]
+    return _build_tex(profile, [], experiences, [], 11)
+
+
+def _run(app, tex: str, precompile: bool, runs: int) -> list[float]:
+    from app.latex_engine import LatexEngine
+
+    with app.app_context():
+        engine = LatexEngine(
+            app,
+            binary=app.config["PDFLATEX"],
+            format_dir=Path(app.config["LATEX_OUTPUT_DIR"]) / "formats",
+            timeout=120,
+            precompile=precompile,
+        )
+        samples = []
+        for _ in range(runs):
+            with tempfile.TemporaryDirectory() as work_dir:
+                start = time.perf_counter()
+                engine.compile(tex, Path(work_dir))
+                samples.append((time.perf_counter() - start) * 1000)
+                assert (Path(work_dir) / "cv.pdf").exists(), "compile failed"
+        return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--fake", action="store_true", help="use the fake pdflatex even if a real one exists")
+    parser.add_argument("--package-ms", type=float, default=40, help="fake load time per \\usepackage")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.fake or shutil.which("pdflatex") is None:
+            bin_dir = Path(tmp) / "bin"
+            bin_dir.mkdir()
+            _install_fake(bin_dir, args.package_ms)
+            print(f"using fake pdflatex ({args.package_ms:g} ms per package)")
+
+        from app import create_app
+
+        app = create_app({
+            "DATABASE": os.path.join(tmp, "bench.db"),
+            "LATEX_OUTPUT_DIR": os.path.join(tmp, "compiled"),
+        })
+        with app.app_context():
+            tex = _document()
+        for label, precompile in (("cold", False), ("precompiled preamble", True)):
+            samples = _run(app, tex, precompile, args.runs)
+            steady = samples[1:] if precompile and len(samples) > 1 else samples
+            print(
+                f"{label:<22} first={samples[0]:8.1f} ms  "
+                f"median={statistics.median(steady):8.1f} ms  "
+                f"min={min(steady):8.1f} ms  runs={len(samples)}"
+            )
+
+
+if __name__ == "__main__":
+    main()
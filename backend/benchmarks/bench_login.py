@@ -0,0 +1,121 @@
+"""Login throughput per core, and what a login storm does to other requests.
+
+Serves the app from a threaded local HTTP server and fires --clients
+concurrent login loops for --seconds, while one more client times GET
+/health. Run once per mode:
+
+    inline   bcrypt on the request thread (PASSWORD_HASH_WORKERS=0)
+    pool     bcrypt in the hashing process pool (one process per core)
+
+Reports logins/s overall and per core, 429s, and /health latency.
+
+    cd backend && python -m benchmarks.bench_login [--clients 16] [--seconds 10] [--rounds 12]
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs) -> None:
+        pass
+
+
+def run(mode: str, clients: int, seconds: float, rounds: int) -> dict:
+    from app import create_app
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({
+            "DATABASE": f"{tmp}/bench.db",
+            "BCRYPT_ROUNDS": rounds,
+            "PASSWORD_HASH_WORKERS": 0 if mode == "inline" else os.cpu_count() or 1,
+            "PASSWORD_HASH_QUEUE": clients,
+            # Every client is 127.0.0.1; measure hashing, not the per-IP limit.
+            "RATE_LIMIT_AUTH": "",
+        })
+        server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=_QuietHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_port}"
+
+        def post(path: str, body: dict) -> tuple[int, dict]:
+            req = urllib.request.Request(
+                base + path, data=json.dumps(body).encode(),
+                headers={"Content-Type": "application/json"},
+            )
+            try:
+                with urllib.request.urlopen(req) as res:
+                    return res.status, json.loads(res.read())
+            except urllib.error.HTTPError as err:
+                return err.code, {}
+
+        _, creds = post("/auth/register", {"email": "bench@example.com"})
+        login = {"email": "bench@example.com", "password": creds["generatedPassword"]}
+        post("/auth/login", login)  # start the pool
+
+        ok = busy = 0
+        health_ms: list[float] = []
+        lock = threading.Lock()
+        deadline = time.perf_counter() + seconds
+
+        def login_loop() -> None:
+            nonlocal ok, busy
+            while time.perf_counter() < deadline:
+                status, _ = post("/auth/login", login)
+                with lock:
+                    if status == 200:
+                        ok += 1
+                    elif status == 429:
+                        busy += 1
+
+        def health_loop() -> None:
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                urllib.request.urlopen(base + "/health").read()
+                health_ms.append((time.perf_counter() - start) * 1000)
+                time.sleep(0.05)
+
+        threads = [threading.Thread(target=login_loop) for _ in range(clients)]
+        threads.append(threading.Thread(target=health_loop))
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        server.shutdown()
+        if "password_hasher" in app.extensions:
+            app.extensions["password_hasher"].shutdown()
+
+    return {
+        "loginsPerSecond": ok / seconds,
+        "rejected": busy,
+        "healthP50": statistics.median(health_ms),
+        "healthP95": statistics.quantiles(health_ms, n=20)[-1],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--seconds", type=float, default=10)
+    parser.add_argument("--rounds", type=int, default=12)
+    args = parser.parse_args()
+
+    cores = os.cpu_count() or 1
+    print(f"{cores} core(s), bcrypt cost {args.rounds}, {args.clients} concurrent clients")
+    for mode in ("inline", "pool"):
+        r = run(mode, args.clients, args.seconds, args.rounds)
+        print(
+            f"{mode:<7} logins/s={r['loginsPerSecond']:6.2f}  per core={r['loginsPerSecond'] / cores:6.2f}  "
+            f"429s={r['rejected']:4d}  /health p50={r['healthP50']:7.1f} ms  p95={r['healthP95']:7.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Template render micro-benchmark over large profiles.
+
+Times rendering CVs with hundreds of experiences and projects, per layout:
+
+    first      template compile + every fragment rendered
+    cold       cached template, empty fragment cache
+    warm       nothing changed since the last render
+    one edit   one experience changed since the last render
+
+    cd backend && python -m benchmarks.bench_render [--runs N] [--sizes 100,500,1000]
+"""
+import argparse
+import json
+import os
+import statistics
+import tempfile
+import time
+
+
+def _rows(n: int) -> tuple[dict, list, list, list]:
+    profile = {
+        "first_name": "Ada", "last_name": "Lovelace", "email": "ada@example.com",
+        "website": "https://example.com/~ada", "github": "https://github.com/ada",
+    }
+    blurbs = [{"type": t, "content": f"{t} text with 100% & more_{t}"} for t in
+              ("summary", "skills", "motivation", "closing")]
+    experiences = [
+        {
+            "id": f"e{i}", "title": f"Engineer #{i}", "organization": "Analytical Engine & Co.",
+            "start_date": "2019-01-01", "end_date": None if i % 3 else "2021-06-30",
+            "description": "Built things_" * 20,
+            "keywords": json.dumps(["Python", "C#", "LaTeX", f"skill_{i}"]),
+        }
+        for i in range(n)
+    ]
+    projects = [
+        {
+            "id": f"p{i}", "title": f"Project {i}", "description": "Did $stuff$ " * 10,
+            "keywords": json.dumps(["R&D", f"tag{i}"]),
+        }
+        for i in range(n // 4)
+    ]
+    return profile, blurbs, experiences, projects
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--sizes", default="100,500,1000")
+    args = parser.parse_args()
+
+    from app import create_app
+    from app import tex_templates
+    from app.blueprints.latex import _build_tex
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({
+            "DATABASE": os.path.join(tmp, "bench.db"),
+            "LATEX_OUTPUT_DIR": os.path.join(tmp, "compiled"),
+        })
+        with app.app_context():
+            for template_id in tex_templates.template_ids(app):
+                for n in (int(size) for size in args.sizes.split(",")):
+                    profile, blurbs, experiences, projects = _rows(n)
+
+                    def render() -> float:
+                        start = time.perf_counter()
+                        _build_tex(profile, blurbs, experiences, projects, 11, template_id)
+                        return (time.perf_counter() - start) * 1000
+
+                    app.extensions.pop("tex_templates", None)
+                    app.extensions.pop("tex_fragments", None)
+                    first = render()
+
+                    cold, warm, edited = [], [], []
+                    for i in range(args.runs):
+                        app.extensions.pop("tex_fragments", None)
+                        cold.append(render())
+                        warm.append(render())
+                        experiences[i % n] = {**experiences[i % n], "description": f"edit {i}"}
+                        edited.append(render())
+
+                    print(
+                        f"{template_id:<10} experiences={n:<5} first={first:7.2f} ms  "
+                        f"cold={statistics.median(cold):7.2f} ms  "
+                        f"warm={statistics.median(warm):7.2f} ms  "
+                        f"one edit={statistics.median(edited):7.2f} ms"
+                    )
+
+
+if __name__ == "__main__":
+    main()
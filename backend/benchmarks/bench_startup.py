@@ -0,0 +1,67 @@
+"""Cold-start benchmark for create_app.
+
+Each sample runs in a fresh interpreter so module imports are cold. Reports
+the median milliseconds per start-up phase for a fresh database and for an
+already-migrated one, with FAST_STARTUP on and off.
+
+    cd backend && python -m benchmarks.bench_startup [--runs N]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+_CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+from app import create_app
+import_ms = (time.perf_counter() - t0) * 1000
+app = create_app({"DATABASE": sys.argv[1], "FAST_STARTUP": sys.argv[2] == "1"})
+print(json.dumps({"import": import_ms, **app.extensions["startup_ms"]}))
+"""
+
+
+def _sample(db_path: str, fast: bool) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", _CHILD, db_path, "1" if fast else "0"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def _report(label: str, samples: list[dict]) -> None:
+    phases = samples[0].keys()
+    medians = {p: statistics.median(s[p] for s in samples) for p in phases}
+    cols = "  ".join(f"{p}={medians[p]:8.2f}" for p in phases)
+    print(f"{label:<28} total={sum(medians.values()):8.2f}  {cols}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        fresh = []
+        for i in range(args.runs):
+            fresh.append(_sample(os.path.join(tmp, f"fresh{i}.db"), fast=True))
+        _report("fresh database", fresh)
+
+        existing = os.path.join(tmp, "existing.db")
+        _sample(existing, fast=True)
+        for fast in (False, True):
+            samples = [_sample(existing, fast) for _ in range(args.runs)]
+            _report(f"migrated db, FAST_STARTUP={int(fast)}", samples)
+
+
+if __name__ == "__main__":
+    main()
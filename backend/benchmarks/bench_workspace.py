@@ -0,0 +1,109 @@
+"""CV builder page-load latency: six list requests vs one GET /workspace.
+
+Seeds one user with --rows experiences, projects, blurbs and job
+descriptions, serves the app from a threaded local HTTP server and times a
+page load as the frontend does it:
+
+    separate    /profile, /profile/photos, /experiences, /projects, /blurbs
+                and /job-descriptions fired concurrently (Promise.all)
+    workspace   one GET /workspace
+
+    cd backend && python -m benchmarks.bench_workspace [--rows 200] [--runs 50]
+"""
+import argparse
+import statistics
+import tempfile
+import threading
+import time
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+SEPARATE = (
+    "/profile", "/profile/photos", "/experiences", "/projects", "/blurbs", "/job-descriptions",
+)
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_request(self, *args, **kwargs) -> None:
+        pass
+
+
+def seed(app, rows: int) -> str:
+    from app.auth_utils import generate_token
+    from app.db import get_db
+
+    with app.app_context():
+        db = get_db()
+        db.execute("INSERT INTO users (id, email, password_hash) VALUES ('u', 'u@example.com', 'x')")
+        db.execute("INSERT INTO profiles (id, user_id, first_name) VALUES ('pr', 'u', 'Bench')")
+        for i in range(rows):
+            jd = str(uuid.uuid4())
+            db.execute(
+                "INSERT INTO job_descriptions (id, user_id, title, company, description) "
+                "VALUES (?, 'u', ?, 'Co', ?)",
+                (jd, f"Job {i}", "Requirements. " * 100),
+            )
+            db.execute(
+                "INSERT INTO experiences (id, user_id, category, title, organization, start_date, "
+                "description, keywords) VALUES (?, 'u', 'work', ?, 'Org', ?, ?, '[\"python\"]')",
+                (str(uuid.uuid4()), f"Role {i}", f"{2000 + i % 25}-01-01", "Did things. " * 20),
+            )
+            db.execute(
+                "INSERT INTO projects (id, user_id, title, description) VALUES (?, 'u', ?, ?)",
+                (str(uuid.uuid4()), f"Project {i}", "Built it. " * 10),
+            )
+            db.execute(
+                "INSERT INTO blurbs (id, user_id, type, content, job_description_id) "
+                "VALUES (?, 'u', 'summary', ?, ?)",
+                (str(uuid.uuid4()), "Summary text. " * 10, jd),
+            )
+        db.commit()
+        return generate_token("u")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=200, help="rows per list")
+    parser.add_argument("--runs", type=int, default=50)
+    args = parser.parse_args()
+
+    from app import create_app
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({"DATABASE": f"{tmp}/bench.db", "PHOTOS_DIR": f"{tmp}/photos"})
+        token = seed(app, args.rows)
+        server = make_server("127.0.0.1", 0, app, threaded=True, request_handler=_QuietHandler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base = f"http://127.0.0.1:{server.server_port}"
+
+        def fetch(path: str) -> int:
+            req = urllib.request.Request(base + path, headers={"Authorization": f"Bearer {token}"})
+            with urllib.request.urlopen(req) as res:
+                return len(res.read())
+
+        pool = ThreadPoolExecutor(len(SEPARATE))
+        loads = {
+            "separate": lambda: sum(pool.map(fetch, SEPARATE)),
+            "workspace": lambda: fetch("/workspace"),
+        }
+        print(f"{args.rows} rows per list, {args.runs} page loads each")
+        for name, load in loads.items():
+            size = load()  # warm the connection pool and caches
+            times = []
+            for _ in range(args.runs):
+                start = time.perf_counter()
+                load()
+                times.append((time.perf_counter() - start) * 1000)
+            print(
+                f"{name:<10} median={statistics.median(times):7.2f} ms  "
+                f"p95={statistics.quantiles(times, n=20)[-1]:7.2f} ms  body={size / 1024:7.1f} KB"
+            )
+        pool.shutdown()
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
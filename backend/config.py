@@ -6,8 +6,96 @@ BASE_DIR = Path(__file__).parent
 
 class Config:
     SECRET_KEY = os.environ.get("SECRET_KEY", "dev-secret-key-change-in-production")
+    # Previous secrets, still accepted when decrypting stored API keys (comma-separated)
+    SECRET_KEY_FALLBACKS = [k for k in os.environ.get("SECRET_KEY_FALLBACKS", "").split(",") if k]
     DATABASE = os.environ.get("DATABASE_PATH", str(BASE_DIR / "instance" / "cv.db"))
+    PHOTOS_DIR = os.environ.get("PHOTOS_DIR", str(BASE_DIR / "instance" / "uploads" / "photos"))
     TESTING = False
+    # Skip the schema bootstrap when the database is already at the latest migration
+    FAST_STARTUP = os.environ.get("FAST_STARTUP", "1") == "1"
+    # SQLite connection pool (see app/db.py)
+    DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 8))
+    DB_JOURNAL_MODE = os.environ.get("DB_JOURNAL_MODE", "WAL")
+    DB_SYNCHRONOUS = os.environ.get("DB_SYNCHRONOUS", "NORMAL")
+    DB_MMAP_SIZE = int(os.environ.get("DB_MMAP_SIZE", 256 * 1024 * 1024))
+    DB_CACHE_SIZE = int(os.environ.get("DB_CACHE_SIZE", -64 * 1024))  # negative = KiB
+    DB_BUSY_TIMEOUT = int(os.environ.get("DB_BUSY_TIMEOUT", 5000))  # ms
+    # Password hashing (see app/passwords.py)
+    BCRYPT_ROUNDS = int(os.environ.get("BCRYPT_ROUNDS", 12))  # cost factor; older hashes are upgraded on login
+    PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", 2))  # processes per app process; 0 = inline
+    PASSWORD_HASH_QUEUE = int(os.environ.get("PASSWORD_HASH_QUEUE", 32))  # waiting hashes before 429
+    # Access/refresh tokens and revocation (see app/tokens.py)
+    ACCESS_TOKEN_TTL = int(os.environ.get("ACCESS_TOKEN_TTL", 15 * 60))  # seconds
+    REFRESH_TOKEN_TTL = int(os.environ.get("REFRESH_TOKEN_TTL", 7 * 24 * 3600))  # seconds
+    TOKEN_CACHE_SIZE = int(os.environ.get("TOKEN_CACHE_SIZE", 10000))  # verified access tokens per process
+    TOKEN_BLOOM_CAPACITY = int(os.environ.get("TOKEN_BLOOM_CAPACITY", 100000))  # revocations before the filter is rebuilt
+    TOKEN_REVOCATION_SYNC = float(os.environ.get("TOKEN_REVOCATION_SYNC", 5))  # seconds before other processes see a logout
+    TOKEN_PRUNE_INTERVAL = int(os.environ.get("TOKEN_PRUNE_INTERVAL", 3600))  # seconds
+    # Rate limits and per-user concurrency caps (see app/ratelimit.py); "<count>/<second|minute|hour|day>", empty = off
+    RATE_LIMIT_ENABLED = os.environ.get("RATE_LIMIT_ENABLED", "1") == "1"
+    RATE_LIMIT_AUTH = os.environ.get("RATE_LIMIT_AUTH", "10/minute")  # per IP: login, register, password reset
+    RATE_LIMIT_AGENT = os.environ.get("RATE_LIMIT_AGENT", "30/minute")  # per user: /agent/*
+    RATE_LIMIT_COMPILE = os.environ.get("RATE_LIMIT_COMPILE", "20/minute")  # per user: /latex/compile
+    RATE_LIMIT_IP = os.environ.get("RATE_LIMIT_IP", "120/minute")  # per IP: /agent/* and /latex/compile together
+    RATE_LIMIT_EXPORT = os.environ.get("RATE_LIMIT_EXPORT", "10/hour")  # per user: POST /export/jobs
+    RATE_LIMIT_MAX_KEYS = int(os.environ.get("RATE_LIMIT_MAX_KEYS", 100000))  # buckets kept per process
+    LLM_CONCURRENCY_PER_USER = int(os.environ.get("LLM_CONCURRENCY_PER_USER", 2))  # generate-blurb(s) / analyze-job requests in flight
+    LATEX_PENDING_PER_USER = int(os.environ.get("LATEX_PENDING_PER_USER", 2))  # compile jobs queued or running
+    # Decrypted provider API keys, cached per user (see app/keys.py)
+    API_KEY_CACHE_TTL = int(os.environ.get("API_KEY_CACHE_TTL", 60))  # seconds
+    API_KEY_CACHE_SIZE = int(os.environ.get("API_KEY_CACHE_SIZE", 1024))
+    # OpenAI clients (see app/llm.py)
+    OPENAI_BASE_URL = os.environ.get("OPENAI_BASE_URL") or None
+    OPENAI_TIMEOUT = float(os.environ.get("OPENAI_TIMEOUT", 30))  # seconds
+    OPENAI_MAX_RETRIES = int(os.environ.get("OPENAI_MAX_RETRIES", 2))
+    OPENAI_BACKOFF_BASE = float(os.environ.get("OPENAI_BACKOFF_BASE", 0.5))  # seconds
+    OPENAI_BACKOFF_MAX = float(os.environ.get("OPENAI_BACKOFF_MAX", 8))  # seconds
+    OPENAI_CLIENT_CACHE_SIZE = int(os.environ.get("OPENAI_CLIENT_CACHE_SIZE", 256))
+    # /agent/generate-blurbs/batch
+    AGENT_BATCH_MAX_ITEMS = int(os.environ.get("AGENT_BATCH_MAX_ITEMS", 16))
+    AGENT_BATCH_CONCURRENCY = int(os.environ.get("AGENT_BATCH_CONCURRENCY", 4))  # per user
+    # Background job queue (see app/jobs.py)
+    JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 2))  # threads per process
+    JOB_POLL_INTERVAL = float(os.environ.get("JOB_POLL_INTERVAL", 1.0))  # seconds
+    JOB_STALE_AFTER = int(os.environ.get("JOB_STALE_AFTER", 600))  # seconds
+    JOB_RETENTION_SECONDS = int(os.environ.get("JOB_RETENTION_SECONDS", 7 * 24 * 3600))  # after finishing
+    JOB_PRUNE_INTERVAL = int(os.environ.get("JOB_PRUNE_INTERVAL", 3600))  # seconds
+    LATEX_TIMEOUT = int(os.environ.get("LATEX_TIMEOUT", 30))  # seconds per pdflatex run
+    # pdflatex binary (name on PATH or absolute path) and preamble format caching (see app/latex_engine.py)
+    PDFLATEX = os.environ.get("PDFLATEX", "pdflatex")
+    LATEX_PRECOMPILE_PREAMBLE = os.environ.get("LATEX_PRECOMPILE_PREAMBLE", "1") == "1"
+    # CV layouts, <templateId>.tex.j2 (see app/tex_templates.py); recompiled when the file changes
+    LATEX_TEMPLATE_DIR = os.environ.get("LATEX_TEMPLATE_DIR", str(BASE_DIR / "app" / "templates" / "latex"))
+    LATEX_TEMPLATES_AUTO_RELOAD = os.environ.get("LATEX_TEMPLATES_AUTO_RELOAD", "1") == "1"
+    # Rendered TeX per experience/project, keyed by template version and content
+    LATEX_FRAGMENT_CACHE_SIZE = int(os.environ.get("LATEX_FRAGMENT_CACHE_SIZE", 20000))
+    LATEX_FRAGMENT_CACHE_TTL = int(os.environ.get("LATEX_FRAGMENT_CACHE_TTL", 24 * 3600))  # seconds
+    # Compiled PDFs are cached by source hash (see app/render_cache.py)
+    LATEX_OUTPUT_DIR = os.environ.get("LATEX_OUTPUT_DIR", str(BASE_DIR / "instance" / "compiled"))
+    LATEX_CACHE_MAX_BYTES = int(os.environ.get("LATEX_CACHE_MAX_BYTES", 512 * 1024 * 1024))
+    LATEX_USER_QUOTA_BYTES = int(os.environ.get("LATEX_USER_QUOTA_BYTES", 20 * 1024 * 1024))
+    LATEX_ARTIFACT_TTL = int(os.environ.get("LATEX_ARTIFACT_TTL", 30 * 24 * 3600))  # seconds since last use
+    LATEX_SWEEP_INTERVAL = int(os.environ.get("LATEX_SWEEP_INTERVAL", 3600))  # seconds
+    # Largest page a list endpoint returns for ?limit= (see app/pagination.py)
+    PAGE_SIZE_MAX = int(os.environ.get("PAGE_SIZE_MAX", 500))
+    # How long browsers may reuse a photo before revalidating it
+    PHOTO_CACHE_MAX_AGE = int(os.environ.get("PHOTO_CACHE_MAX_AGE", 3600))  # seconds
+    # /import (see app/data_import.py)
+    IMPORT_SPOOL_MEMORY = int(os.environ.get("IMPORT_SPOOL_MEMORY", 1024 * 1024))  # bytes kept in memory before spooling to disk
+    IMPORT_MAX_PHOTO_BYTES = int(os.environ.get("IMPORT_MAX_PHOTO_BYTES", 20 * 1024 * 1024))
+    # Export archives written by background jobs (see app/export_archive.py)
+    EXPORT_DIR = os.environ.get("EXPORT_DIR", str(BASE_DIR / "instance" / "exports"))
+    EXPORT_ARCHIVE_TTL = int(os.environ.get("EXPORT_ARCHIVE_TTL", 24 * 3600))  # seconds
+    EXPORT_SWEEP_INTERVAL = int(os.environ.get("EXPORT_SWEEP_INTERVAL", 3600))  # seconds
+    EXPORT_PENDING_PER_USER = int(os.environ.get("EXPORT_PENDING_PER_USER", 1))  # export jobs queued or running
+    # Delta export: how long deletions are remembered, and how often old ones are pruned
+    CHANGE_TOMBSTONE_TTL = int(os.environ.get("CHANGE_TOMBSTONE_TTL", 90 * 24 * 3600))  # seconds
+    CHANGE_PRUNE_INTERVAL = int(os.environ.get("CHANGE_PRUNE_INTERVAL", 24 * 3600))  # seconds
+    # Shared analyze-job results (see app/analysis_cache.py)
+    ANALYSIS_CACHE_TTL = int(os.environ.get("ANALYSIS_CACHE_TTL", 7 * 24 * 3600))  # seconds
+    ANALYSIS_CACHE_MAX_ENTRIES = int(os.environ.get("ANALYSIS_CACHE_MAX_ENTRIES", 50000))
+    # Bearer token for GET /health/stats (server-wide counters); empty = endpoint disabled
+    HEALTH_STATS_TOKEN = os.environ.get("HEALTH_STATS_TOKEN", "")
     # SMTP (for password reset — not wired yet)
     SMTP_HOST = os.environ.get("SMTP_HOST", "localhost")
     SMTP_PORT = int(os.environ.get("SMTP_PORT", 587))
@@ -1,9 +1,18 @@
 import os
+import stat
+import sys
 import tempfile
+import uuid
+from pathlib import Path
 
 import pytest
 
 from app import create_app
+from app.auth_utils import generate_token
+from app.db import get_db, get_pool
+
+
+STATS_TOKEN = "test-stats-token"
 
 
 @pytest.fixture
@@ -14,10 +23,27 @@ def app():
     sqlite3.connect() call to ':memory:' returns a different, empty database.
     """
     db_fd, db_path = tempfile.mkstemp(suffix=".db")
-    test_app = create_app({"TESTING": True, "DATABASE": db_path})
+    output_dir = tempfile.TemporaryDirectory()
+    test_app = create_app({
+        "TESTING": True,
+        "DATABASE": db_path,
+        "LATEX_OUTPUT_DIR": f"{output_dir.name}/compiled",
+        "PHOTOS_DIR": f"{output_dir.name}/photos",
+        "EXPORT_DIR": f"{output_dir.name}/exports",
+        "BCRYPT_ROUNDS": 4,
+        "HEALTH_STATS_TOKEN": STATS_TOKEN,
+    })
     yield test_app
+    if "job_queue" in test_app.extensions:
+        test_app.extensions["job_queue"].shutdown()
+    if "password_hasher" in test_app.extensions:
+        test_app.extensions["password_hasher"].shutdown()
+    get_pool(test_app).close()
+    output_dir.cleanup()
     os.close(db_fd)
-    os.unlink(db_path)
+    for path in (db_path, f"{db_path}-wal", f"{db_path}-shm"):
+        if os.path.exists(path):
+            os.unlink(path)
 
 
 @pytest.fixture
@@ -25,6 +51,51 @@ def client(app):
     return app.test_client()
 
 
+@pytest.fixture
+def health_stats(client):
+    """Return a function fetching GET /health/stats as the operator."""
+    return lambda: client.get(
+        "/health/stats", headers={"Authorization": f"Bearer {STATS_TOKEN}"}
+    ).get_json()
+
+
 @pytest.fixture
 def runner(app):
     return app.test_cli_runner()
+
+
+@pytest.fixture
+def user_id(app):
+    """Insert a user directly and return its id."""
+    uid = str(uuid.uuid4())
+    with app.app_context():
+        db = get_db()
+        db.execute(
+            "INSERT INTO users (id, email, password_hash) VALUES (?, ?, ?)",
+            (uid, f"{uid}@example.com", "hash"),
+        )
+        db.commit()
+    return uid
+
+
+@pytest.fixture
+def auth_headers(app, user_id):
+    with app.app_context():
+        token = generate_token(user_id)
+    return {"Authorization": f"Bearer {token}"}
+
+
+@pytest.fixture
+def fake_pdflatex(app, tmp_path, monkeypatch):
+    """Put tests/fake_pdflatex.py first on PATH as ``pdflatex``."""
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    script = bin_dir / "pdflatex"
+    script.write_text(
+        f'#!/bin/sh\nexec "{sys.executable}" "{Path(__file__).parent / "fake_pdflatex.py"}" "$@"\n'
+    )
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+    # The engine resolved the binary at start-up; make it look again.
+    app.extensions.pop("latex_engine", None)
+    return bin_dir
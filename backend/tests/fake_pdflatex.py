@@ -0,0 +1,68 @@
+"""Stand-in for pdflatex used by the LaTeX tests and benchmarks.
+
+Writes a tiny PDF (embedding the source, so output differs per document)
+plus the .aux and .log files real pdflatex leaves behind. A source
+containing FAIL-COMPILE produces no PDF.
+
+``-ini`` dumps a "format" (the preamble text) when the source ends in
+\\dump, and ``-fmt=NAME`` prepends NAME.fmt, found via TEXFORMATS, to the
+source. Set FAKE_PDFLATEX_PACKAGE_MS to sleep that long per \\usepackage
+actually loaded, to mimic where a real cold compile spends its time.
+"""
+import os
+import re
+import sys
+import time
+from pathlib import Path
+
+args = sys.argv[1:]
+if "--version" in args:
+    print("pdfTeX 3.141592653 (fake)")
+    sys.exit(0)
+
+
+def option(name):
+    for arg in args:
+        if arg.startswith(f"-{name}="):
+            return arg.split("=", 1)[1]
+    return None
+
+
+def load_packages(text):
+    per_package = float(os.environ.get("FAKE_PDFLATEX_PACKAGE_MS", 0)) / 1000
+    time.sleep(per_package * len(re.findall(r"\\usepackage", text)))
+
+
+out_dir = Path.cwd()
+if "-output-directory" in args:
+    out_dir = Path(args[args.index("-output-directory") + 1])
+source = Path(args[-1])
+text = source.read_text()
+
+if "-ini" in args:
+    if not text.rstrip().endswith("\\dump") or "FAIL-FORMAT" in text:
+        print("! Emergency stop (fake format failure)")
+        sys.exit(1)
+    load_packages(text)
+    (out_dir / f"{option('jobname')}.fmt").write_text(text.rstrip()[: -len("\\dump")])
+    sys.exit(0)
+
+fmt = option("fmt")
+if fmt:
+    dirs = [d for d in os.environ.get("TEXFORMATS", "").split(os.pathsep) if d]
+    found = [Path(d) / f"{fmt}.fmt" for d in dirs if (Path(d) / f"{fmt}.fmt").exists()]
+    if not found:
+        print(f"I can't find the format file `{fmt}.fmt'!")
+        sys.exit(1)
+    text = found[0].read_text() + text
+else:
+    load_packages(text)
+
+if "FAIL-COMPILE" in text:
+    print("! LaTeX Error: fake failure")
+    sys.exit(1)
+
+(out_dir / f"{source.stem}.aux").write_text("\\relax\n")
+(out_dir / f"{source.stem}.log").write_text("fake log\n")
+(out_dir / f"{source.stem}.pdf").write_bytes(b"%PDF-1.4\n" + text.encode() + b"\n%%EOF\n")
+print(f"Output written on {source.stem}.pdf")
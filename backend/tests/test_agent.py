@@ -0,0 +1,469 @@
+"""Tests for the agent blueprint against a local stand-in for the OpenAI API."""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.llm import get_registry
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        self.server.requests.append(body)
+        if self.server.fail_next > 0:
+            self.server.fail_next -= 1
+            self._send(500, {"error": {"message": "upstream broke", "type": "server_error"}})
+            return
+        if body.get("stream"):
+            self._stream(body)
+            return
+        self._send(200, {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": 0,
+            "model": body["model"],
+            "choices": [{
+                "index": 0,
+                "finish_reason": "stop",
+                "message": {"role": "assistant", "content": self.server.reply(body)},
+            }],
+        })
+
+    def _send(self, status: int, payload: dict) -> None:
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, body: dict) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        for piece in self.server.reply(body).split(" "):
+            chunk = {
+                "id": "chatcmpl-stub",
+                "object": "chat.completion.chunk",
+                "created": 0,
+                "model": body["model"],
+                "choices": [{"index": 0, "delta": {"content": piece + " "}, "finish_reason": None}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+        self.wfile.write(b"data: [DONE]\n\n")
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def openai_stub(app):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    server.requests = []
+    server.fail_next = 0
+    server.reply = lambda body: "  A generated blurb.  "
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    app.config.update(
+        OPENAI_BASE_URL=f"http://127.0.0.1:{server.server_port}/v1",
+        OPENAI_BACKOFF_BASE=0.001,
+    )
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def openai_key(client, auth_headers):
+    client.post(
+        "/api-keys",
+        json={"name": "main", "provider": "openai", "key": "sk-test"},
+        headers=auth_headers,
+    )
+
+
+def test_generate_blurb_requires_key(client, auth_headers):
+    res = client.post("/agent/generate-blurb", json={"type": "summary"}, headers=auth_headers)
+    assert res.status_code == 400
+
+
+def test_generate_blurb(client, auth_headers, openai_stub, openai_key):
+    res = client.post("/agent/generate-blurb", json={"type": "summary"}, headers=auth_headers)
+    assert res.status_code == 200
+    assert res.get_json() == {"generatedBlurb": "A generated blurb."}
+    assert openai_stub.requests[0]["model"] == "gpt-4o-mini"
+
+
+def test_clients_and_connections_are_reused(app, client, auth_headers, openai_stub, openai_key):
+    for _ in range(3):
+        client.post("/agent/generate-blurb", json={"type": "skills"}, headers=auth_headers)
+    stats = get_registry(app).stats()
+    assert stats["clientsCreated"] == 1
+    assert stats["clientHits"] == 2
+    assert stats["connectionsNew"] == 1
+    assert stats["connectionsReused"] == 2
+
+
+def test_transient_errors_are_retried(app, client, auth_headers, openai_stub, openai_key):
+    openai_stub.fail_next = 2
+    res = client.post("/agent/generate-blurb", json={"type": "summary"}, headers=auth_headers)
+    assert res.status_code == 200
+    assert get_registry(app).stats()["retries"] == 2
+
+
+def test_exhausted_retries_return_502(app, client, auth_headers, openai_stub, openai_key):
+    openai_stub.fail_next = 10
+    res = client.post("/agent/generate-blurb", json={"type": "summary"}, headers=auth_headers)
+    assert res.status_code == 502
+    assert len(openai_stub.requests) == app.config["OPENAI_MAX_RETRIES"] + 1
+
+
+def test_registry_evicts_least_recently_used(app):
+    registry = get_registry(app)
+    registry.maxsize = 2
+    first = registry.get("sk-a")
+    registry.get("sk-b")
+    registry.get("sk-a")
+    registry.get("sk-c")
+    assert registry.get("sk-a") is first
+    assert registry.stats()["clientsEvicted"] == 1
+    assert registry.stats()["clients"] == 2
+
+
+def test_analyze_job(client, auth_headers, openai_stub, openai_key):
+    openai_stub.reply = lambda body: json.dumps({
+        "keywords": ["python"], "requiredSkills": ["flask"], "seniorityLevel": "Senior",
+    })
+    job = client.post(
+        "/job-descriptions",
+        json={"title": "Engineer", "company": "Acme", "description": "Build things."},
+        headers=auth_headers,
+    ).get_json()
+    res = client.post("/agent/analyze-job", json={"jobDescriptionId": job["id"]}, headers=auth_headers)
+    assert res.status_code == 200
+    assert res.get_json()["seniorityLevel"] == "Senior"
+
+
+def _events(body: str) -> list[tuple[str, dict]]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_generate_blurb_streams_deltas(client, auth_headers, openai_stub, openai_key):
+    openai_stub.reply = lambda body: "Seasoned backend engineer."
+    res = client.post(
+        "/agent/generate-blurb",
+        json={"type": "summary", "stream": True},
+        headers=auth_headers,
+    )
+    assert res.status_code == 200
+    assert res.mimetype == "text/event-stream"
+    events = _events(res.get_data(as_text=True))
+    deltas = [data["delta"] for name, data in events if name == "delta"]
+    assert len(deltas) == 3
+    assert events[-1] == ("done", {"generatedBlurb": "Seasoned backend engineer."})
+
+
+def test_stream_selected_by_accept_header_and_saved(client, auth_headers, openai_stub, openai_key):
+    res = client.post(
+        "/agent/generate-blurb",
+        json={"type": "closing", "save": True},
+        headers={**auth_headers, "Accept": "text/event-stream"},
+    )
+    name, done = _events(res.get_data(as_text=True))[-1]
+    assert name == "done"
+    blurbs = client.get("/blurbs", headers=auth_headers).get_json()
+    assert [(b["id"], b["type"], b["content"]) for b in blurbs] == [
+        (done["blurbId"], "closing", "A generated blurb."),
+    ]
+
+
+def test_stream_cancelled_on_disconnect(app, client, auth_headers, openai_stub, openai_key):
+    res = client.post(
+        "/agent/generate-blurb",
+        json={"type": "summary", "stream": True, "save": True},
+        headers=auth_headers,
+        buffered=False,
+    )
+    next(iter(res.response))
+    res.close()
+    stats = get_registry(app).stats()
+    assert stats["streamsCancelled"] == 1
+    assert stats["streamsCompleted"] == 0
+    assert client.get("/blurbs", headers=auth_headers).get_json() == []
+
+
+def test_stream_closed_on_disconnect_before_first_chunk(app, client, auth_headers, openai_stub, openai_key):
+    # The test client always reads the first chunk, so dispatch directly.
+    with app.test_request_context(
+        "/agent/generate-blurb", method="POST", json={"type": "summary", "stream": True},
+        headers=auth_headers,
+    ):
+        res = app.full_dispatch_request()
+        assert res.is_streamed
+        res.close()
+    stats = get_registry(app).stats()
+    assert stats["streamsCancelled"] == 1
+    assert stats["streamsCompleted"] == 0
+
+
+def _add_job(client, headers, description="Build things."):
+    return client.post(
+        "/job-descriptions",
+        json={"title": "Engineer", "company": "Acme", "description": description},
+        headers=headers,
+    ).get_json()["id"]
+
+
+def _other_users_job(app) -> str:
+    """A job description owned by another user."""
+    from app.db import get_db
+
+    with app.app_context():
+        db = get_db()
+        db.execute("INSERT INTO users (id, email, password_hash) VALUES ('u3', 'u3@x.com', 'h')")
+        db.execute(
+            "INSERT INTO job_descriptions (id, user_id, title, company, description) "
+            "VALUES ('theirs', 'u3', 'Spy', 'Other Co', 'Secret.')"
+        )
+        db.commit()
+    return "theirs"
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_generate_blurb_rejects_unknown_or_foreign_jobs(
+    app, client, auth_headers, openai_stub, openai_key, stream
+):
+    for job_id in ("missing", _other_users_job(app)):
+        res = client.post(
+            "/agent/generate-blurb",
+            json={"type": "summary", "jobDescriptionId": job_id, "save": True, "stream": stream},
+            headers=auth_headers,
+        )
+        assert res.status_code == 404
+    res = client.post("/agent/generate-blurb", json={"jobDescriptionId": ["x"]}, headers=auth_headers)
+    assert res.status_code == 400
+    assert openai_stub.requests == []
+    assert client.get("/blurbs", headers=auth_headers).get_json() == []
+
+
+def test_stream_reports_save_failure_as_event(client, auth_headers, openai_stub, openai_key, monkeypatch):
+    import sqlite3
+
+    from app.blueprints import agent
+
+    def broken_save(*args):
+        raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(agent, "_save_blurb", broken_save)
+    res = client.post(
+        "/agent/generate-blurb",
+        json={"type": "summary", "stream": True, "save": True},
+        headers=auth_headers,
+    )
+    name, data = _events(res.get_data(as_text=True))[-1]
+    assert name == "error"
+    assert data == {"error": "Could not save the blurb", "generatedBlurb": "A generated blurb."}
+
+
+def test_analysis_cache_shared_across_users(app, client, auth_headers, openai_stub, openai_key):
+    from app.auth_utils import generate_token
+    from app.db import get_db
+
+    openai_stub.reply = lambda body: json.dumps({"keywords": [], "requiredSkills": [], "seniorityLevel": "Lead"})
+    first = client.post(
+        "/agent/analyze-job",
+        json={"jobDescriptionId": _add_job(client, auth_headers)},
+        headers=auth_headers,
+    )
+    assert first.headers["X-Cache"] == "MISS"
+
+    with app.app_context():
+        db = get_db()
+        db.execute("INSERT INTO users (id, email, password_hash) VALUES ('u2', 'u2@x.com', 'h')")
+        db.commit()
+        other = {"Authorization": f"Bearer {generate_token('u2')}"}
+    client.post("/api-keys", json={"name": "k", "provider": "openai", "key": "sk-2"}, headers=other)
+    # Same posting with different whitespace and case still hits the cache
+    job_id = _add_job(client, other, description="  build   THINGS. ")
+    second = client.post("/agent/analyze-job", json={"jobDescriptionId": job_id}, headers=other)
+    assert second.headers["X-Cache"] == "HIT"
+    assert second.get_json()["seniorityLevel"] == "Lead"
+    assert len(openai_stub.requests) == 1
+    jobs = client.get("/job-descriptions", headers=other).get_json()
+    assert jobs[0]["analysis"]["seniorityLevel"] == "Lead"
+
+
+def test_analysis_force_bypasses_cache(client, auth_headers, openai_stub, openai_key, health_stats):
+    openai_stub.reply = lambda body: json.dumps({"keywords": [], "requiredSkills": [], "seniorityLevel": "Junior"})
+    job_id = _add_job(client, auth_headers)
+    client.post("/agent/analyze-job", json={"jobDescriptionId": job_id}, headers=auth_headers)
+    res = client.post(
+        "/agent/analyze-job", json={"jobDescriptionId": job_id, "force": True}, headers=auth_headers
+    )
+    assert res.headers["X-Cache"] == "MISS"
+    assert len(openai_stub.requests) == 2
+    stats = health_stats()["analysisCache"]
+    assert stats["bypassed"] == 1
+    assert stats["misses"] == 1
+
+
+def test_analysis_cache_evicts_least_recently_used(app, client, auth_headers, openai_stub, openai_key):
+    from app.db import get_db
+
+    app.config["ANALYSIS_CACHE_MAX_ENTRIES"] = 2
+    openai_stub.reply = lambda body: json.dumps({"keywords": [], "requiredSkills": [], "seniorityLevel": "Mid-level"})
+    for description in ("one", "two", "three"):
+        job_id = _add_job(client, auth_headers, description=description)
+        client.post("/agent/analyze-job", json={"jobDescriptionId": job_id}, headers=auth_headers)
+    with app.app_context():
+        assert get_db().execute("SELECT COUNT(*) FROM analysis_cache").fetchone()[0] == 2
+
+
+def test_batch_generates_all_types(client, auth_headers, openai_stub, openai_key):
+    openai_stub.reply = lambda body: body["messages"][1]["content"].split(" for a CV")[0]
+    job_id = _add_job(client, auth_headers)
+    res = client.post(
+        "/agent/generate-blurbs/batch",
+        json={"jobDescriptionIds": [job_id], "save": True},
+        headers=auth_headers,
+    )
+    assert res.status_code == 200
+    results = res.get_json()["results"]
+    assert [r["type"] for r in results] == ["summary", "skills", "motivation", "closing"]
+    assert all(r["error"] is None and r["elapsedMs"] >= 0 for r in results)
+    assert results[0]["generatedBlurb"] == "Write a 2-3 sentence professional summary"
+    assert all("Company: Acme" in req["messages"][1]["content"] for req in openai_stub.requests)
+    saved = client.get(f"/blurbs?jobDescriptionId={job_id}", headers=auth_headers).get_json()
+    assert {b["id"] for b in saved} == {r["blurbId"] for r in results}
+
+
+def test_batch_reports_per_item_errors(app, client, auth_headers, openai_stub, openai_key):
+    app.config.update(AGENT_BATCH_CONCURRENCY=1, OPENAI_MAX_RETRIES=0)
+    openai_stub.fail_next = 1
+    res = client.post(
+        "/agent/generate-blurbs/batch",
+        json={"items": [{"type": "summary"}, {"type": "skills"}], "save": True},
+        headers=auth_headers,
+    )
+    results = res.get_json()["results"]
+    assert "AI provider error" in results[0]["error"]
+    assert results[1]["error"] is None
+    assert len(client.get("/blurbs", headers=auth_headers).get_json()) == 1
+
+
+@pytest.mark.parametrize("body", [
+    {"types": "summary"},
+    {"types": ["summary", "bogus"]},
+    {"jobDescriptionIds": "abc"},
+    {"jobDescriptionIds": [1]},
+    {"items": [{"type": ["x"]}]},
+    {"items": [{"type": "bogus"}]},
+    {"items": [{"jobDescriptionId": ["a"]}]},
+    {"items": [{"mode": {}}]},
+])
+def test_batch_rejects_malformed_requests(client, auth_headers, openai_stub, openai_key, body):
+    res = client.post("/agent/generate-blurbs/batch", json=body, headers=auth_headers)
+    assert res.status_code == 400
+    assert openai_stub.requests == []
+
+
+def test_batch_rejects_unknown_or_foreign_jobs(app, client, auth_headers, openai_stub, openai_key):
+    mine = _add_job(client, auth_headers)
+    for job_id in ("missing", _other_users_job(app)):
+        res = client.post(
+            "/agent/generate-blurbs/batch",
+            json={"jobDescriptionIds": [mine, job_id], "save": True},
+            headers=auth_headers,
+        )
+        assert res.status_code == 404
+    assert openai_stub.requests == []
+    assert client.get("/blurbs", headers=auth_headers).get_json() == []
+
+
+def test_batch_rejects_oversized_requests(app, client, auth_headers, openai_key):
+    items = [{"type": "summary"}] * (app.config["AGENT_BATCH_MAX_ITEMS"] + 1)
+    res = client.post("/agent/generate-blurbs/batch", json={"items": items}, headers=auth_headers)
+    assert res.status_code == 400
+
+
+def test_batch_respects_per_user_concurrency(app, client, auth_headers, openai_stub, openai_key):
+    import threading
+    import time
+
+    app.config["AGENT_BATCH_CONCURRENCY"] = 2
+    active, peak, lock = [0], [0], threading.Lock()
+
+    def slow_reply(body):
+        with lock:
+            active[0] += 1
+            peak[0] = max(peak[0], active[0])
+        time.sleep(0.05)
+        with lock:
+            active[0] -= 1
+        return "ok"
+
+    openai_stub.reply = slow_reply
+    res = client.post(
+        "/agent/generate-blurbs/batch",
+        json={"items": [{"type": "summary"}] * 6},
+        headers=auth_headers,
+    )
+    assert res.status_code == 200
+    assert peak[0] == 2
+
+
+def test_llm_calls_are_capped_per_user(app, client, auth_headers, openai_stub, openai_key):
+    app.config["LLM_CONCURRENCY_PER_USER"] = 1
+    stream = client.post(
+        "/agent/generate-blurb",
+        json={"type": "summary", "stream": True},
+        headers=auth_headers,
+        buffered=False,
+    )
+    next(iter(stream.response))
+    # The slot is held until the stream is closed.
+    res = client.post("/agent/generate-blurb", json={"type": "summary"}, headers=auth_headers)
+    assert res.status_code == 429
+    assert res.headers["Retry-After"] == "1"
+    assert client.post("/agent/analyze-job", json={"jobDescriptionId": "x"}, headers=auth_headers).status_code == 429
+    res = client.post("/agent/generate-blurbs/batch", json={"types": ["summary"]}, headers=auth_headers)
+    assert res.status_code == 429
+
+    stream.close()
+    res = client.post("/agent/generate-blurb", json={"type": "summary"}, headers=auth_headers)
+    assert res.status_code == 200
+
+
+def test_agent_requests_are_rate_limited_per_user(app, client, auth_headers, openai_stub, openai_key):
+    app.config["RATE_LIMIT_AGENT"] = "2/minute"
+    for _ in range(2):
+        assert client.post("/agent/generate-blurb", json={}, headers=auth_headers).status_code == 200
+    # The bucket is shared by every agent endpoint.
+    res = client.post("/agent/generate-blurbs/batch", json={"types": ["summary"]}, headers=auth_headers)
+    assert res.status_code == 429
+    assert 1 <= int(res.headers["Retry-After"]) <= 30
+    assert "retry in" in res.get_json()["error"]
+
+
+def test_batch_is_charged_per_item(app, client, auth_headers, openai_stub, openai_key):
+    app.config["RATE_LIMIT_AGENT"] = "4/minute"
+    res = client.post(
+        "/agent/generate-blurbs/batch",
+        json={"types": ["summary", "skills", "closing"]},
+        headers=auth_headers,
+    )
+    assert res.status_code == 200
+    assert client.post("/agent/generate-blurb", json={}, headers=auth_headers).status_code == 200
+    assert client.post("/agent/generate-blurb", json={}, headers=auth_headers).status_code == 429
+    assert len(openai_stub.requests) == 4
@@ -1,5 +1,6 @@
 """Tests for the auth blueprint stub endpoints."""
 import json
+import os
 
 
 def test_register_returns_201(client):
@@ -44,3 +45,97 @@ def test_reset_password_confirm_returns_200(client):
         json={"token": "abc123", "newPassword": "NewP@ss1"},
     )
     assert res.status_code == 200
+
+
+def _register(client, email="user@example.com"):
+    return client.post("/auth/register", json={"email": email}).get_json()["generatedPassword"]
+
+
+def _stored_hash(app, email):
+    from app.db import get_db
+    with app.app_context():
+        return get_db().execute(
+            "SELECT password_hash FROM users WHERE email = ?", (email,)
+        ).fetchone()[0]
+
+
+def test_login_with_registered_password(app, client):
+    password = _register(client)
+    assert _stored_hash(app, "user@example.com").startswith("$2b$04$")
+    res = client.post("/auth/login", json={"email": "user@example.com", "password": password})
+    assert res.status_code == 200
+    assert "token" in res.get_json()
+    wrong = client.post("/auth/login", json={"email": "user@example.com", "password": "nope"})
+    assert wrong.status_code == 401
+
+
+def test_login_rehashes_when_cost_changes(app, client, health_stats):
+    from app.passwords import get_hasher
+    password = _register(client)
+    old = _stored_hash(app, "user@example.com")
+    get_hasher(app).rounds = 5
+
+    assert client.post("/auth/login", json={"email": "user@example.com", "password": password}).status_code == 200
+    new = _stored_hash(app, "user@example.com")
+    assert new.startswith("$2b$05$") and new != old
+    assert client.post("/auth/login", json={"email": "user@example.com", "password": password}).status_code == 200
+    assert _stored_hash(app, "user@example.com") == new
+    assert health_stats()["passwordHashing"]["rehashed"] == 1
+
+
+def test_saturated_hasher_answers_429(app, client, health_stats):
+    from app.passwords import PasswordHasher
+    hasher = PasswordHasher(app, workers=1, max_pending=0, rounds=4)
+    app.extensions["password_hasher"] = hasher
+    # Occupy the only slot directly rather than racing a slow hash.
+    assert hasher._slots.acquire(blocking=False)
+    try:
+        res = client.post("/auth/register", json={"email": "busy@example.com"})
+        assert res.status_code == 429
+        assert res.headers["Retry-After"] == "1"
+    finally:
+        hasher._slots.release()
+    assert client.post("/auth/register", json={"email": "busy@example.com"}).status_code == 201
+    assert health_stats()["passwordHashing"]["rejectedBusy"] == 1
+
+
+_HELPER_SCRIPT = """
+import os
+import threading
+
+from app import create_app
+from app.passwords import get_hasher
+
+# Module level like run.py, so hashing workers run it again as __mp_main__.
+app = create_app({"DATABASE": os.environ["HELPER_TEST_DB"], "PASSWORD_HASH_WORKERS": 1})
+
+
+def thread_names():
+    return sorted(t.name for t in threading.enumerate())
+
+
+if __name__ == "__main__":
+    hasher = get_hasher(app)
+    print(",".join(hasher._pool().submit(thread_names).result()))
+    hasher.shutdown()
+    app.extensions["job_queue"].shutdown()
+"""
+
+
+def test_hashing_workers_run_no_job_threads(tmp_path):
+    import subprocess
+    import sys
+    from pathlib import Path
+
+    script = tmp_path / "serve.py"
+    script.write_text(_HELPER_SCRIPT)
+    out = subprocess.run(
+        [sys.executable, str(script)],
+        cwd=Path(__file__).resolve().parent.parent,
+        env={**os.environ, "HELPER_TEST_DB": str(tmp_path / "cv.db"), "PYTHONPATH": "."},
+        capture_output=True,
+        text=True,
+        timeout=60,
+        check=True,
+    ).stdout.strip()
+    assert out == "MainThread"
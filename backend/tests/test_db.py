@@ -11,6 +11,14 @@ EXPECTED_TABLES = {
     "job_descriptions",
     "blurbs",
     "api_keys",
+    "schema_version",
+    "analysis_cache",
+    "jobs",
+    "compiled_artifacts",
+    "change_counter",
+    "change_tombstones",
+    "collection_versions",
+    "revoked_tokens",
 }
 
 EXPECTED_COLUMNS = {
@@ -19,17 +27,34 @@ EXPECTED_COLUMNS = {
         "id", "user_id", "first_name", "last_name", "email",
         "phone", "location", "website", "linkedin", "github", "updated_at",
     },
-    "photos": {"id", "user_id", "filename", "is_main"},
+    "photos": {"id", "user_id", "filename", "is_main", "sha256", "version", "updated_at"},
     "experiences": {
         "id", "user_id", "category", "title", "organization",
-        "start_date", "end_date", "description", "keywords",
+        "start_date", "end_date", "description", "keywords", "version", "updated_at",
+    },
+    "projects": {
+        "id", "user_id", "title", "description", "keywords", "version", "updated_at", "created_at",
     },
-    "projects": {"id", "user_id", "title", "description", "keywords"},
     "job_descriptions": {
         "id", "user_id", "title", "company", "description", "analysis_json", "created_at",
+        "version", "updated_at",
+    },
+    "blurbs": {
+        "id", "user_id", "type", "content", "job_description_id", "created_at",
+        "version", "updated_at",
     },
-    "blurbs": {"id", "user_id", "type", "content", "job_description_id", "created_at"},
     "api_keys": {"id", "user_id", "name", "provider", "encrypted_key", "created_at"},
+    "schema_version": {"version", "name", "applied_at"},
+    "analysis_cache": {"key", "model", "result_json", "hits", "created_at", "last_used_at"},
+    "jobs": {
+        "id", "kind", "user_id", "status", "progress", "payload", "result", "error",
+        "created_at", "started_at", "finished_at", "heartbeat_at",
+    },
+    "compiled_artifacts": {"key", "user_id", "bytes", "created_at", "last_used_at"},
+    "change_counter": {"id", "seq", "pruned_through"},
+    "change_tombstones": {"version", "user_id", "entity", "row_id", "deleted_at"},
+    "collection_versions": {"user_id", "collection", "version", "updated_at"},
+    "revoked_tokens": {"seq", "jti", "user_id", "expires_at", "revoked_at"},
 }
 
 
@@ -119,3 +144,126 @@ def test_blurbs_type_constraint(app):
                 ("b2", "u2", "bad_type", "Oops."),
             )
             db.commit()
+
+
+def test_wal_journal_mode(app):
+    with app.app_context():
+        db = get_db()
+        assert db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert db.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+
+
+def test_pool_reuses_connections(app):
+    from app.db import get_pool
+    pool = get_pool(app)
+    with app.app_context():
+        first = get_db()
+    with app.app_context():
+        second = get_db()
+    assert first is second
+    stats = pool.stats()
+    assert stats["reused"] >= 1
+    assert stats["inUse"] == 0
+    assert stats["idle"] >= 1
+
+
+def test_pool_rolls_back_uncommitted_work(app):
+    with app.app_context():
+        db = get_db()
+        db.execute(
+            "INSERT INTO users (id, email, password_hash) VALUES (?, ?, ?)",
+            ("u3", "rollback@test.com", "hash"),
+        )
+    with app.app_context():
+        db = get_db()
+        row = db.execute("SELECT id FROM users WHERE id = 'u3'").fetchone()
+        assert row is None
+
+
+def test_pool_discards_broken_connections(app):
+    from app.db import get_pool
+    pool = get_pool(app)
+    conn = pool.acquire()
+    pool.release(conn)
+    conn.close()
+    fresh = pool.acquire()
+    assert fresh is not conn
+    assert pool.stats()["healthCheckFailures"] == 1
+    pool.release(fresh)
+
+
+def test_health_stats_exposes_pool(client, health_stats):
+    client.get("/health")
+    data = health_stats()
+    assert {"idle", "inUse", "created", "reused"} <= set(data["db"])
+
+
+def test_health_stats_require_the_operator_token(app, client):
+    assert client.get("/health").status_code == 200
+    assert client.get("/health/stats").status_code == 401
+    assert client.get("/health/stats", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    app.config["HEALTH_STATS_TOKEN"] = ""
+    assert client.get("/health/stats").status_code == 404
+
+
+def test_migrations_recorded(app):
+    from app.db import _migrations
+    with app.app_context():
+        db = get_db()
+        versions = [r["version"] for r in db.execute("SELECT version FROM schema_version")]
+        assert versions == [v for v, _ in _migrations()]
+
+
+def test_migrate_is_idempotent(app):
+    from app.db import migrate
+    with app.app_context():
+        assert migrate(get_db()) == []
+
+
+@pytest.mark.parametrize("sql, params", [
+    ("SELECT * FROM experiences WHERE user_id = ? ORDER BY start_date DESC, id DESC", ("u",)),
+    (
+        "SELECT * FROM experiences WHERE user_id = ? AND (start_date, id) < (?, ?) "
+        "ORDER BY start_date DESC, id DESC LIMIT ?",
+        ("u", "2020-01-01", "e", 10),
+    ),
+    ("SELECT * FROM job_descriptions WHERE user_id = ? ORDER BY created_at DESC, id DESC", ("u",)),
+    (
+        "SELECT * FROM job_descriptions WHERE user_id = ? AND (created_at, id) < (?, ?) "
+        "ORDER BY created_at DESC, id DESC LIMIT ?",
+        ("u", "2020-01-01", "j", 10),
+    ),
+    ("SELECT * FROM blurbs WHERE user_id = ? ORDER BY created_at DESC, id DESC", ("u",)),
+    (
+        "SELECT * FROM blurbs WHERE user_id = ? AND job_description_id = ? "
+        "AND (created_at, id) < (?, ?) ORDER BY created_at DESC, id DESC LIMIT ?",
+        ("u", "j", "2020-01-01", "b", 10),
+    ),
+    ("SELECT * FROM projects WHERE user_id = ? ORDER BY created_at, id", ("u",)),
+    (
+        "SELECT * FROM projects WHERE user_id = ? AND (created_at, id) > (?, ?) "
+        "ORDER BY created_at, id LIMIT ?",
+        ("u", "2020-01-01", "p", 10),
+    ),
+    ("SELECT * FROM photos WHERE user_id = ? ORDER BY is_main DESC, id DESC", ("u",)),
+    (
+        "SELECT * FROM photos WHERE user_id = ? AND (is_main, id) < (?, ?) "
+        "ORDER BY is_main DESC, id DESC LIMIT ?",
+        ("u", 1, "p", 10),
+    ),
+    ("SELECT * FROM api_keys WHERE user_id = ? ORDER BY created_at DESC", ("u",)),
+    ("SELECT * FROM compiled_artifacts WHERE last_used_at < ?", (0,)),
+    ("SELECT * FROM experiences WHERE user_id = ? AND version > ? ORDER BY version", ("u", 0)),
+    (
+        "SELECT entity, row_id FROM change_tombstones "
+        "WHERE user_id = ? AND version > ? ORDER BY version",
+        ("u", 0),
+    ),
+])
+def test_list_queries_use_index_without_sorting(app, sql, params):
+    with app.app_context():
+        plan = " ".join(
+            row["detail"] for row in get_db().execute(f"EXPLAIN QUERY PLAN {sql}", params)
+        )
+        assert "USING INDEX" in plan
+        assert "TEMP B-TREE" not in plan
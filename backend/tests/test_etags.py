@@ -0,0 +1,117 @@
+"""ETags and conditional GETs on the profile, list and photo endpoints."""
+import hashlib
+import io
+import os
+import uuid
+
+import pytest
+
+from app import pagination
+from app.auth_utils import generate_token
+from app.db import get_db
+
+EXP = {"category": "work", "title": "Dev", "organization": "Org", "startDate": "2020-01-01"}
+
+
+def _get(client, headers, url, etag=None):
+    if etag:
+        headers = {**headers, "If-None-Match": f'"{etag}"'}
+    return client.get(url, headers=headers)
+
+
+def test_unchanged_list_is_answered_with_304_without_querying(client, auth_headers, monkeypatch, health_stats):
+    client.post("/experiences", json=EXP, headers=auth_headers)
+    first = _get(client, auth_headers, "/experiences")
+    etag, _ = first.get_etag()
+    assert first.status_code == 200 and etag
+    assert first.headers["Cache-Control"] == "private, no-cache"
+    assert "Authorization" in first.headers["Vary"]
+
+    def no_query(*args, **kwargs):
+        raise AssertionError("list query ran for a matching ETag")
+
+    monkeypatch.setattr(pagination, "page", no_query)
+    res = _get(client, auth_headers, "/experiences", etag)
+    assert res.status_code == 304
+    assert res.data == b""
+    assert res.get_etag()[0] == etag
+    assert health_stats()["etags"]["notModified"] == 1
+
+
+@pytest.mark.parametrize("url, create, path", [
+    ("/experiences", EXP, "/experiences"),
+    ("/projects", {"title": "P"}, "/projects"),
+    ("/job-descriptions", {"title": "J", "company": "C", "description": "d"}, "/job-descriptions"),
+    ("/blurbs", {"type": "summary", "content": "Hi"}, "/blurbs"),
+])
+def test_writes_change_the_etag(client, auth_headers, url, create, path):
+    empty = _get(client, auth_headers, url).get_etag()[0]
+    item = client.post(path, json=create, headers=auth_headers).get_json()
+    created = _get(client, auth_headers, url, empty)
+    assert created.status_code == 200
+    assert len(created.get_json()) == 1
+
+    tag = created.get_etag()[0]
+    client.put(f"{path}/{item['id']}", json=create, headers=auth_headers)
+    assert _get(client, auth_headers, url, tag).status_code == 304
+
+    client.put(f"{path}/{item['id']}", json={**create, "title": "Changed", "content": "Changed"},
+               headers=auth_headers)
+    edited = _get(client, auth_headers, url, tag)
+    assert edited.status_code == 200
+
+    client.delete(f"{path}/{item['id']}", headers=auth_headers)
+    deleted = _get(client, auth_headers, url, edited.get_etag()[0])
+    assert deleted.status_code == 200 and deleted.get_json() == []
+
+
+def test_etag_depends_on_user_and_query(app, client, auth_headers):
+    other_id = str(uuid.uuid4())
+    with app.app_context():
+        db = get_db()
+        db.execute(
+            "INSERT INTO users (id, email, password_hash) VALUES (?, ?, 'hash')",
+            (other_id, f"{other_id}@example.com"),
+        )
+        db.commit()
+        other = {"Authorization": f"Bearer {generate_token(other_id)}"}
+    tag = _get(client, auth_headers, "/projects").get_etag()[0]
+    assert _get(client, other, "/projects", tag).status_code == 200
+    assert _get(client, auth_headers, "/projects?fields=id", tag).status_code == 200
+    assert _get(client, auth_headers, "/projects", tag).status_code == 304
+
+
+def test_profile_etag(client, auth_headers):
+    first = _get(client, auth_headers, "/profile")
+    assert first.status_code == 200
+    tag = _get(client, auth_headers, "/profile").get_etag()[0]
+    assert _get(client, auth_headers, "/profile", tag).status_code == 304
+    client.put("/profile", json={"firstName": "Ada"}, headers=auth_headers)
+    res = _get(client, auth_headers, "/profile", tag)
+    assert res.status_code == 200 and res.get_json()["firstName"] == "Ada"
+
+
+def test_photo_list_and_file_are_cacheable(client, auth_headers):
+    data = os.urandom(2048)
+    listing = _get(client, auth_headers, "/profile/photos").get_etag()[0]
+    photo = client.post(
+        "/profile/photos",
+        data={"photo": (io.BytesIO(data), "me.png")},
+        headers=auth_headers,
+        content_type="multipart/form-data",
+    ).get_json()
+    assert _get(client, auth_headers, "/profile/photos", listing).status_code == 200
+
+    res = client.get(photo["url"], headers=auth_headers)
+    assert res.status_code == 200 and res.data == data
+    assert res.get_etag() == (hashlib.sha256(data).hexdigest(), False)
+    assert res.last_modified is not None
+    assert res.cache_control.private and not res.cache_control.public
+    assert res.cache_control.max_age == 3600
+
+    again = _get(client, auth_headers, photo["url"], res.get_etag()[0])
+    assert again.status_code == 304
+    since = client.get(
+        photo["url"], headers={**auth_headers, "If-Modified-Since": res.headers["Last-Modified"]}
+    )
+    assert since.status_code == 304
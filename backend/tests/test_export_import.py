@@ -0,0 +1,400 @@
+"""Tests for the /export and /import blueprint."""
+import io
+import json
+import os
+import time
+import uuid
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from app.auth_utils import generate_token
+from app.db import get_db
+from tests.test_latex import wait_for_job
+
+
+@pytest.fixture
+def photo(app, user_id):
+    """A 1 MiB incompressible photo on disk plus its row."""
+    filename = f"{uuid.uuid4()}.jpg"
+    data = os.urandom(1024 * 1024)
+    photos_dir = Path(app.config["PHOTOS_DIR"])
+    photos_dir.mkdir(parents=True, exist_ok=True)
+    (photos_dir / filename).write_bytes(data)
+    with app.app_context():
+        db = get_db()
+        db.execute(
+            "INSERT INTO photos (id, user_id, filename, is_main) VALUES (?, ?, ?, 1)",
+            (str(uuid.uuid4()), user_id, filename),
+        )
+        db.commit()
+    return filename, data
+
+
+def test_export_streams_a_valid_zip(client, auth_headers, photo):
+    filename, data = photo
+    client.post(
+        "/experiences",
+        json={"category": "work", "title": "Engineer", "organization": "Org",
+              "startDate": "2020-01-01", "keywords": ["x"]},
+        headers=auth_headers,
+    )
+
+    res = client.get("/export", headers=auth_headers, buffered=False)
+    assert res.status_code == 200
+    assert res.is_streamed
+    assert res.mimetype == "application/zip"
+    assert 'filename="cv-export.zip"' in res.headers["Content-Disposition"]
+    chunks = list(res.response)
+    assert len(chunks) > 1
+
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as zf:
+        assert zf.testzip() is None
+        exported = json.loads(zf.read("data.json"))
+        assert exported["experiences"][0]["title"] == "Engineer"
+        assert exported["photos"][0]["filename"] == filename
+        assert zf.read(f"photos/{filename}") == data
+        assert zf.getinfo(f"photos/{filename}").compress_type == zipfile.ZIP_STORED
+        assert zf.getinfo("data.json").compress_type == zipfile.ZIP_DEFLATED
+
+
+def test_export_skips_missing_photo_files(app, client, auth_headers, photo):
+    filename, _ = photo
+    (Path(app.config["PHOTOS_DIR"]) / filename).unlink()
+    res = client.get("/export", headers=auth_headers)
+    with zipfile.ZipFile(io.BytesIO(res.data)) as zf:
+        assert zf.namelist() == ["data.json"]
+
+
+def test_streamed_chunks_stay_small(tmp_path):
+    from app.zipstream import CHUNK_SIZE, stream_zip
+
+    big = tmp_path / "big.png"
+    big.write_bytes(os.urandom(8 * 1024 * 1024))
+    sizes = [len(chunk) for chunk in stream_zip([("big.png", big), ("note.txt", b"hi")])]
+    # Each chunk is at most one read plus a local header or data descriptor.
+    assert max(sizes) < CHUNK_SIZE + 1024
+    assert sum(sizes) > 8 * 1024 * 1024
+
+
+def _archive(data: dict, photos: dict | None = None) -> io.BytesIO:
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("data.json", json.dumps(data))
+        for name, content in (photos or {}).items():
+            zf.writestr(f"photos/{name}", content)
+    buf.seek(0)
+    return buf
+
+
+def _import(client, auth_headers, archive):
+    return client.post(
+        "/import",
+        data={"file": (archive, "cv-export.zip")},
+        headers=auth_headers,
+        content_type="multipart/form-data",
+    )
+
+
+def _rows(app, table, user_id):
+    with app.app_context():
+        return [
+            dict(r) for r in get_db().execute(
+                f"SELECT * FROM {table} WHERE user_id = ? ORDER BY id", (user_id,)
+            )
+        ]
+
+
+def _untracked(rows):
+    return [{k: v for k, v in r.items() if k not in ("version", "updated_at")} for r in rows]
+
+
+def test_import_round_trips_an_export(app, client, auth_headers, user_id, photo):
+    old_filename, data = photo
+    client.post(
+        "/experiences",
+        json={"category": "work", "title": "Engineer", "organization": "Org",
+              "startDate": "2020-01-01", "keywords": ["x"]},
+        headers=auth_headers,
+    )
+    with app.app_context():
+        db = get_db()
+        db.execute(
+            "INSERT INTO job_descriptions (id, user_id, title, company, description, created_at) "
+            "VALUES ('jd1', ?, 'Dev', 'Acme', 'Build', '2024-05-01 10:00:00')",
+            (user_id,),
+        )
+        db.execute(
+            "INSERT INTO blurbs (id, user_id, type, content, job_description_id, created_at) "
+            "VALUES ('b1', ?, 'summary', 'Hello', 'jd1', '2024-05-02 10:00:00')",
+            (user_id,),
+        )
+        db.commit()
+    before = {t: _rows(app, t, user_id) for t in ("experiences", "job_descriptions", "blurbs")}
+    archive = io.BytesIO(client.get("/export", headers=auth_headers).data)
+
+    res = _import(client, auth_headers, archive)
+    assert res.status_code == 200, res.get_json()
+
+    # Replacing re-creates every row, so only the change tracking differs.
+    for table, rows in before.items():
+        assert _untracked(_rows(app, table, user_id)) == _untracked(rows)
+    [row] = _rows(app, "photos", user_id)
+    assert row["is_main"] == 1
+    # Imported photos get fresh file names; the replaced file is removed.
+    assert row["filename"] != old_filename
+    photos_dir = Path(app.config["PHOTOS_DIR"])
+    assert sorted(p.name for p in photos_dir.iterdir()) == [row["filename"]]
+    served = client.get(f"/profile/photos/{row['id']}/file", headers=auth_headers)
+    assert served.data == data
+
+
+def test_invalid_import_changes_nothing(app, client, auth_headers, user_id, photo):
+    client.post(
+        "/experiences",
+        json={"category": "work", "title": "Keep me", "organization": "Org",
+              "startDate": "2020-01-01"},
+        headers=auth_headers,
+    )
+    before = _rows(app, "experiences", user_id)
+    archive = _archive(
+        {
+            "photos": [{"id": "p1", "filename": "new.png"}],
+            "experiences": [
+                {"category": "work", "title": "Fine", "organization": "O", "start_date": "2021"},
+                {"category": "job", "title": "", "organization": "O", "start_date": "2021"},
+            ],
+            "blurbs": [{"type": "summary", "content": "x", "job_description_id": "nope"}],
+        },
+        {"new.png": b"png"},
+    )
+
+    res = _import(client, auth_headers, archive)
+    assert res.status_code == 400
+    error = res.get_json()["error"]
+    assert error["code"] == "INVALID_DATA"
+    assert "experiences[1].category: must be one of work, education, hobby" in error["details"]
+    assert "experiences[1].title: is required" in error["details"]
+    assert any(d.startswith("blurbs[0].job_description_id") for d in error["details"])
+
+    assert _rows(app, "experiences", user_id) == before
+    assert [p["filename"] for p in _rows(app, "photos", user_id)] == [photo[0]]
+    assert [p.name for p in Path(app.config["PHOTOS_DIR"]).iterdir()] == [photo[0]]
+
+
+def test_conflicting_import_rolls_back(app, client, auth_headers, user_id):
+    with app.app_context():
+        db = get_db()
+        db.execute(
+            "INSERT INTO users (id, email, password_hash) VALUES ('other', 'o@example.com', 'x')"
+        )
+        db.execute(
+            "INSERT INTO projects (id, user_id, title) VALUES ('taken', 'other', 'Theirs')"
+        )
+        db.commit()
+    client.post("/projects", json={"title": "Mine"}, headers=auth_headers)
+    before = _rows(app, "projects", user_id)
+    archive = _archive(
+        {
+            "photos": [{"id": "p1", "filename": "a.jpg"}],
+            "experiences": [
+                {"category": "work", "title": "T", "organization": "O", "start_date": "2021"}
+            ],
+            "projects": [{"id": "taken", "title": "Clash"}],
+        },
+        {"a.jpg": b"jpg"},
+    )
+
+    res = _import(client, auth_headers, archive)
+    assert res.status_code == 409
+    assert res.get_json()["error"]["code"] == "CONFLICT"
+    assert _rows(app, "projects", user_id) == before
+    assert _rows(app, "experiences", user_id) == []
+    assert _rows(app, "photos", user_id) == []
+    assert list(Path(app.config["PHOTOS_DIR"]).iterdir()) == []
+
+
+def test_import_defaults_missing_timestamps(app, client, auth_headers, user_id):
+    archive = _archive({
+        "jobDescriptions": [{"id": "jd", "title": "T", "company": "C", "description": "D"}],
+        "blurbs": [{"type": "closing", "content": "Bye", "job_description_id": "jd"}],
+    })
+    assert _import(client, auth_headers, archive).status_code == 200
+    for table in ("job_descriptions", "blurbs"):
+        [row] = _rows(app, table, user_id)
+        assert row["created_at"] != "datetime('now')"
+        assert row["created_at"][:2] == "20"
+
+
+def test_import_rejects_bad_archives(app, client, auth_headers):
+    res = _import(client, auth_headers, io.BytesIO(b"not a zip"))
+    assert res.get_json()["error"]["code"] == "BAD_ZIP"
+
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("other.json", "{}")
+    buf.seek(0)
+    res = _import(client, auth_headers, buf)
+    assert res.status_code == 400
+    assert res.get_json()["error"]["code"] == "MISSING_DATA"
+
+    res = _import(client, auth_headers, _archive({"photos": [{"filename": "../../evil.sh"}]}))
+    assert res.get_json()["error"]["code"] == "INVALID_DATA"
+
+    app.config["IMPORT_MAX_PHOTO_BYTES"] = 10
+    res = _import(client, auth_headers, _archive(
+        {"photos": [{"filename": "big.jpg"}]}, {"big.jpg": b"x" * 11}
+    ))
+    assert res.get_json()["error"]["code"] == "PHOTO_TOO_LARGE"
+    assert list(Path(app.config["PHOTOS_DIR"]).iterdir()) == []
+
+
+def test_export_job_serves_resumable_archive(client, auth_headers, photo):
+    filename, data = photo
+    res = client.post("/export/jobs", headers=auth_headers)
+    assert res.status_code == 202
+    job = wait_for_job(client, auth_headers, res.get_json()["statusUrl"])
+    assert job["status"] == "done", job
+    url = job["downloadUrl"]
+
+    full = client.get(url, headers=auth_headers)
+    assert full.status_code == 200
+    assert full.headers["Accept-Ranges"] == "bytes"
+    assert full.headers["ETag"] == f'"{job["sha256"]}"'
+    assert int(full.headers["X-Export-Cursor"]) == job["cursor"]
+    assert len(full.data) == job["bytes"]
+    with zipfile.ZipFile(io.BytesIO(full.data)) as zf:
+        assert zf.read(f"photos/{filename}") == data
+
+    # Resume after a dropped connection: the rest of the file, if unchanged.
+    head = client.get(url, headers={**auth_headers, "Range": "bytes=0-99999"})
+    assert head.status_code == 206
+    tail = client.get(url, headers={
+        **auth_headers, "Range": "bytes=100000-", "If-Range": full.headers["ETag"],
+    })
+    assert tail.status_code == 206
+    assert head.data + tail.data == full.data
+
+    stale = client.get(url, headers={**auth_headers, "Range": "bytes=100000-", "If-Range": '"other"'})
+    assert stale.status_code == 200 and stale.data == full.data
+    cached = client.get(url, headers={**auth_headers, "If-None-Match": full.headers["ETag"]})
+    assert cached.status_code == 304
+
+
+def test_export_job_delta_and_errors(app, client, auth_headers):
+    assert client.post("/export/jobs", json={"since": "x"}, headers=auth_headers).status_code == 400
+    client.post("/projects", json={"title": "P"}, headers=auth_headers)
+    res = client.post("/export/jobs", json={"since": 0}, headers=auth_headers)
+    job = wait_for_job(client, auth_headers, res.get_json()["statusUrl"])
+    with zipfile.ZipFile(io.BytesIO(client.get(job["downloadUrl"], headers=auth_headers).data)) as zf:
+        delta = json.loads(zf.read("data.json"))
+    assert delta["since"] == 0 and [p["title"] for p in delta["projects"]] == ["P"]
+
+    with app.app_context():
+        other = generate_token("someone-else")
+    assert client.get(job["downloadUrl"], headers={"Authorization": f"Bearer {other}"}).status_code == 404
+
+    with app.app_context():
+        db = get_db()
+        db.execute("UPDATE change_counter SET pruned_through = 5")
+        db.commit()
+    res = client.post("/export/jobs", json={"since": 1}, headers=auth_headers)
+    failed = wait_for_job(client, auth_headers, res.get_json()["statusUrl"])
+    assert failed["status"] == "failed"
+    assert "full export" in failed["error"]
+    assert client.get(f"{res.get_json()['statusUrl']}/download", headers=auth_headers).status_code == 409
+
+
+def test_export_archives_expire(app, client, auth_headers):
+    from app import export_archive
+
+    res = client.post("/export/jobs", headers=auth_headers)
+    job = wait_for_job(client, auth_headers, res.get_json()["statusUrl"])
+    out_dir = Path(app.config["EXPORT_DIR"])
+    [archive] = out_dir.iterdir()
+    assert export_archive.sweep(app, out_dir) == 0
+
+    old = time.time() - app.config["EXPORT_ARCHIVE_TTL"] - 1
+    os.utime(archive, (old, old))
+    assert export_archive.sweep(app, out_dir) == 1
+    res = client.get(job["downloadUrl"], headers=auth_headers)
+    assert res.status_code == 410
+    assert res.get_json()["error"]["code"] == "EXPIRED"
+
+
+def test_export_jobs_are_capped_and_rate_limited(app, client, auth_headers, user_id):
+    with app.app_context():
+        db = get_db()
+        db.execute(
+            "INSERT INTO jobs (id, kind, user_id, status, payload, created_at) "
+            "VALUES ('busy', 'export', ?, 'running', '{}', ?)",
+            (user_id, time.time()),
+        )
+        db.commit()
+    res = client.post("/export/jobs", headers=auth_headers)
+    assert res.status_code == 429
+    assert res.get_json()["error"]["code"] == "EXPORT_PENDING"
+    assert res.headers["Retry-After"] == "1"
+
+    app.config.update(EXPORT_PENDING_PER_USER=5, RATE_LIMIT_EXPORT="1/hour")
+    assert client.post("/export/jobs", headers=auth_headers).status_code == 202
+    res = client.post("/export/jobs", headers=auth_headers)
+    assert res.status_code == 429
+    assert res.get_json()["error"]["code"] == "RATE_LIMITED"
+
+
+def test_running_jobs_are_requeued_only_once_their_heartbeat_stops(app):
+    from app import jobs
+
+    app.config["JOB_STALE_AFTER"] = 0.2
+    started = []
+
+    @jobs.handler("test-slow")
+    def slow(payload, progress):
+        started.append(payload)
+        time.sleep(0.6)
+        return {}
+
+    queue = jobs.get_queue(app)
+    with app.app_context():
+        db = get_db()
+        db.execute("INSERT INTO users (id, email, password_hash) VALUES ('hb', 'hb@x.com', 'h')")
+        # Left running by a worker that died: no heartbeat for far longer than 0.2 s.
+        db.execute(
+            "INSERT INTO jobs (id, kind, user_id, status, payload, created_at, started_at, heartbeat_at) "
+            "VALUES ('dead', 'test-slow', 'hb', 'running', '{\"n\": 0}', 0, 0, 0)"
+        )
+        db.commit()
+        job_id = queue.enqueue(db, "test-slow", "hb", {"n": 1})
+        deadline = time.monotonic() + 10
+        while time.monotonic() < deadline:
+            if all(queue.get(db, i, "hb")["status"] == "done" for i in (job_id, "dead")):
+                break
+            time.sleep(0.05)
+    # Each ran once although both took three times JOB_STALE_AFTER.
+    assert sorted(p["n"] for p in started) == [0, 1]
+    assert queue._counters.snapshot()["requeued"] == 1
+
+
+def test_finished_jobs_drop_their_payload_and_are_pruned(app, client, auth_headers):
+    from app import export_archive, jobs
+
+    res = client.post("/export/jobs", headers=auth_headers)
+    job = wait_for_job(client, auth_headers, res.get_json()["statusUrl"])
+    queue = jobs.get_queue(app)
+    with app.app_context():
+        db = get_db()
+        assert db.execute("SELECT payload FROM jobs WHERE id = ?", (job["jobId"],)).fetchone()[0] == "{}"
+        assert client.get(job["downloadUrl"], headers=auth_headers).status_code == 200
+
+        assert queue.prune(db, app.config["JOB_RETENTION_SECONDS"]) == 0
+        db.execute(
+            "UPDATE jobs SET finished_at = ?", (time.time() - app.config["EXPORT_ARCHIVE_TTL"] - 1,)
+        )
+        db.commit()
+        assert queue.prune(db, app.config["JOB_RETENTION_SECONDS"]) == 0
+        # Export jobs go with their archive, well before JOB_RETENTION_SECONDS.
+        export_archive._periodic_sweep()
+    assert client.get(res.get_json()["statusUrl"], headers=auth_headers).status_code == 404
+    assert queue._counters.snapshot()["pruned"] == 1
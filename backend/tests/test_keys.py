@@ -0,0 +1,95 @@
+"""Tests for API key encryption and the decrypted-key cache."""
+from app.db import get_db
+from app.keys import cache_stats, decrypt, encrypt, get_provider_key
+
+
+def test_encrypt_round_trip(app):
+    with app.app_context():
+        token = encrypt("sk-test")
+        assert token != "sk-test"
+        assert decrypt(token) == "sk-test"
+
+
+def test_decrypt_with_fallback_secret(app):
+    with app.app_context():
+        token = encrypt("sk-old")
+    app.config["SECRET_KEY_FALLBACKS"] = [app.config["SECRET_KEY"]]
+    app.config["SECRET_KEY"] = "rotated-secret"
+    with app.app_context():
+        assert decrypt(token) == "sk-old"
+
+
+def test_rotated_key_is_reencrypted_on_read(app, user_id):
+    with app.app_context():
+        db = get_db()
+        db.execute(
+            "INSERT INTO api_keys (id, user_id, name, provider, encrypted_key) "
+            "VALUES ('k1', ?, 'main', 'openai', ?)",
+            (user_id, encrypt("sk-old")),
+        )
+        db.commit()
+    app.config["SECRET_KEY_FALLBACKS"] = [app.config["SECRET_KEY"]]
+    app.config["SECRET_KEY"] = "rotated-secret"
+    with app.app_context():
+        db = get_db()
+        assert get_provider_key(db, user_id, "openai") == "sk-old"
+        stored = db.execute("SELECT encrypted_key FROM api_keys WHERE id = 'k1'").fetchone()[0]
+    app.config["SECRET_KEY_FALLBACKS"] = []
+    with app.app_context():
+        assert decrypt(stored) == "sk-old"
+
+
+def test_provider_key_is_cached(client, app, auth_headers, user_id):
+    client.post(
+        "/api-keys",
+        json={"name": "main", "provider": "openai", "key": "sk-1"},
+        headers=auth_headers,
+    )
+    with app.app_context():
+        db = get_db()
+        assert get_provider_key(db, user_id, "openai") == "sk-1"
+        assert get_provider_key(db, user_id, "openai") == "sk-1"
+        assert get_provider_key(db, user_id, "anthropic") is None
+        assert get_provider_key(db, user_id, "anthropic") is None
+    stats = cache_stats(app)
+    assert stats["hits"] >= 2
+
+
+def test_key_changes_invalidate_cache(client, app, auth_headers, user_id):
+    with app.app_context():
+        assert get_provider_key(get_db(), user_id, "openai") is None
+
+    res = client.post(
+        "/api-keys",
+        json={"name": "main", "provider": "openai", "key": "sk-1"},
+        headers=auth_headers,
+    )
+    key_id = res.get_json()["id"]
+    with app.app_context():
+        assert get_provider_key(get_db(), user_id, "openai") == "sk-1"
+
+    client.put(f"/api-keys/{key_id}", json={"name": "main", "key": "sk-2"}, headers=auth_headers)
+    with app.app_context():
+        assert get_provider_key(get_db(), user_id, "openai") == "sk-2"
+
+    client.delete(f"/api-keys/{key_id}", headers=auth_headers)
+    with app.app_context():
+        assert get_provider_key(get_db(), user_id, "openai") is None
+
+
+def test_key_changed_by_another_process_is_seen(client, app, auth_headers, user_id):
+    client.post(
+        "/api-keys",
+        json={"name": "main", "provider": "openai", "key": "sk-1"},
+        headers=auth_headers,
+    )
+    with app.app_context():
+        db = get_db()
+        assert get_provider_key(db, user_id, "openai") == "sk-1"
+        # Written without invalidating this process's cache, as another process would.
+        db.execute("UPDATE api_keys SET encrypted_key = ? WHERE user_id = ?", (encrypt("sk-2"), user_id))
+        db.commit()
+        assert get_provider_key(db, user_id, "openai") == "sk-2"
+        db.execute("DELETE FROM api_keys WHERE user_id = ?", (user_id,))
+        db.commit()
+        assert get_provider_key(db, user_id, "openai") is None
@@ -0,0 +1,442 @@
+"""Tests for the LaTeX blueprint and its compile queue (with a fake pdflatex)."""
+import time
+
+import pytest
+
+from app.db import get_db
+
+
+@pytest.fixture
+def cv_data(client, auth_headers):
+    client.put("/profile", json={"firstName": "Ada", "lastName": "Lovelace"}, headers=auth_headers)
+    exp = client.post(
+        "/experiences",
+        json={
+            "category": "work",
+            "title": "Analyst & Programmer",
+            "organization": "Analytical Engine Co.",
+            "startDate": "1842-01-01",
+            "description": "Wrote the first program_100%.",
+            "keywords": ["Bernoulli", "C#"],
+        },
+        headers=auth_headers,
+    ).get_json()
+    return {"experienceIds": [exp["id"]], "fontSize": 11}
+
+
+def wait_for_job(client, headers, status_url, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        job = client.get(status_url, headers=headers).get_json()
+        if job["status"] in ("done", "failed"):
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job at {status_url} did not finish")
+
+
+def test_compile_enqueues_and_completes(client, auth_headers, cv_data, fake_pdflatex):
+    res = client.post("/latex/compile", json=cv_data, headers=auth_headers)
+    assert res.status_code == 202
+    queued = res.get_json()
+    assert queued["status"] == "queued"
+
+    job = wait_for_job(client, auth_headers, queued["statusUrl"])
+    assert job["status"] == "done"
+    assert job["progress"] == 100
+    assert job["waitMs"] >= 0 and job["runMs"] >= 0
+
+    pdf = client.get(job["pdfUrl"], headers=auth_headers)
+    assert pdf.status_code == 200
+    assert pdf.data.startswith(b"%PDF")
+    assert b"Ada Lovelace" in pdf.data
+
+
+def test_failed_compile_reports_details(client, auth_headers, fake_pdflatex):
+    client.put("/profile", json={"firstName": "FAIL-COMPILE"}, headers=auth_headers)
+    queued = client.post("/latex/compile", json={}, headers=auth_headers).get_json()
+    job = wait_for_job(client, auth_headers, queued["statusUrl"])
+    assert job["status"] == "failed"
+    assert job["error"] == "LaTeX compilation failed"
+    assert "fake failure" in job["details"]
+
+
+def test_job_status_is_private(app, client, auth_headers, cv_data, fake_pdflatex):
+    from app.auth_utils import generate_token
+
+    queued = client.post("/latex/compile", json=cv_data, headers=auth_headers).get_json()
+    with app.app_context():
+        other = {"Authorization": f"Bearer {generate_token('someone-else')}"}
+    assert client.get(queued["statusUrl"], headers=other).status_code == 404
+
+
+def test_queue_stats_exposed(client, auth_headers, cv_data, fake_pdflatex, health_stats):
+    queued = client.post("/latex/compile", json=cv_data, headers=auth_headers).get_json()
+    wait_for_job(client, auth_headers, queued["statusUrl"])
+    stats = health_stats()["jobs"]
+    assert stats["depth"] == 0
+    assert stats["enqueued"] == 1
+    assert stats["completed"] == 1
+
+
+def test_unchanged_document_is_served_from_cache(client, auth_headers, cv_data, fake_pdflatex, health_stats):
+    queued = client.post("/latex/compile", json=cv_data, headers=auth_headers).get_json()
+    first = wait_for_job(client, auth_headers, queued["statusUrl"])
+
+    res = client.post("/latex/compile", json=cv_data, headers=auth_headers)
+    assert res.status_code == 200
+    cached = res.get_json()
+    assert cached["status"] == "done"
+    assert cached["cached"] is True
+    assert cached["pdfUrl"] == first["pdfUrl"]
+    assert client.get(cached["pdfUrl"], headers=auth_headers).data.startswith(b"%PDF")
+
+    stats = health_stats()
+    assert stats["renderCache"]["hits"] == 1
+    assert stats["renderCache"]["misses"] == 1
+    assert stats["jobs"]["enqueued"] == 1
+
+
+def test_changed_document_gets_new_url(client, auth_headers, cv_data, fake_pdflatex):
+    queued = client.post("/latex/compile", json=cv_data, headers=auth_headers).get_json()
+    first = wait_for_job(client, auth_headers, queued["statusUrl"])
+
+    res = client.post("/latex/compile", json={**cv_data, "fontSize": 12}, headers=auth_headers)
+    assert res.status_code == 202
+    second = wait_for_job(client, auth_headers, res.get_json()["statusUrl"])
+    assert second["pdfUrl"] != first["pdfUrl"]
+
+
+def test_cache_evicts_least_recently_used(app, client, auth_headers, cv_data, fake_pdflatex, health_stats):
+    from pathlib import Path
+
+    app.config["LATEX_CACHE_MAX_BYTES"] = 1
+    urls = []
+    for size in (10, 11):
+        queued = client.post(
+            "/latex/compile", json={**cv_data, "fontSize": size}, headers=auth_headers
+        ).get_json()
+        urls.append(wait_for_job(client, auth_headers, queued["statusUrl"])["pdfUrl"])
+
+    # The newest document is always kept, even when it alone is over budget.
+    assert client.get(urls[0], headers=auth_headers).status_code == 404
+    assert client.get(urls[1], headers=auth_headers).status_code == 200
+    files = Path(app.config["LATEX_OUTPUT_DIR"]).rglob("*")
+    assert sorted(p.suffix for p in files if p.is_file() and "formats" not in p.parts) == [
+        ".pdf", ".tex",
+    ]
+    assert health_stats()["renderCache"]["evictions"] == 1
+
+
+def _compile(client, headers, data):
+    queued = client.post("/latex/compile", json=data, headers=headers).get_json()
+    return wait_for_job(client, headers, queued["statusUrl"])
+
+
+def test_artifacts_are_sharded_and_owned(app, client, auth_headers, cv_data, fake_pdflatex):
+    from pathlib import Path
+
+    from app.auth_utils import generate_token
+    from app.db import get_db
+
+    job = _compile(client, auth_headers, cv_data)
+    key = job["pdfUrl"].rsplit("/", 1)[1][:-4]
+    out_dir = Path(app.config["LATEX_OUTPUT_DIR"])
+    assert (out_dir / key[:2] / key[2:4] / f"{key}.pdf").exists()
+    assert (out_dir / key[:2] / key[2:4] / f"{key}.tex").exists()
+    # pdflatex's aux and log files never leave the scratch directory.
+    stored = [p for p in out_dir.rglob("*") if p.is_file() and "formats" not in p.parts]
+    assert sorted(p.suffix for p in stored) == [".pdf", ".tex"]
+
+    with app.app_context():
+        row = get_db().execute("SELECT * FROM compiled_artifacts WHERE key = ?", (key,)).fetchone()
+        other = {"Authorization": f"Bearer {generate_token('someone-else')}"}
+    assert row["bytes"] == (out_dir / key[:2] / key[2:4] / f"{key}.pdf").stat().st_size
+    assert client.get(job["pdfUrl"], headers=other).status_code == 404
+    tex_url = job["pdfUrl"].replace("/download/", "/download-tex/")
+    assert client.get(tex_url, headers=auth_headers).status_code == 200
+    assert client.get("/latex/download/not-a-key.pdf", headers=auth_headers).status_code == 400
+
+
+def test_sweep_expires_unused_artifacts(app, client, auth_headers, cv_data, fake_pdflatex):
+    from app import render_cache
+    from app.db import get_db
+
+    job = _compile(client, auth_headers, cv_data)
+    with app.app_context():
+        db = get_db()
+        db.execute("UPDATE compiled_artifacts SET last_used_at = last_used_at - 1e9")
+        db.commit()
+        out_dir = render_cache.Path(app.config["LATEX_OUTPUT_DIR"])
+        stats = render_cache.sweep(app, db, out_dir)
+        assert db.execute("SELECT COUNT(*) FROM compiled_artifacts").fetchone()[0] == 0
+    assert stats["expired"] == 1
+    assert stats["evictions"] == 1
+    assert client.get(job["pdfUrl"], headers=auth_headers).status_code == 404
+    # The emptied ab/cd/ shard went with the document.
+    assert [p.name for p in out_dir.iterdir()] == ["formats"]
+
+
+def test_quota_keeps_most_recent_documents(app, client, auth_headers, cv_data, fake_pdflatex, health_stats):
+    app.config["LATEX_USER_QUOTA_BYTES"] = 1
+    first = _compile(client, auth_headers, cv_data)
+    second = _compile(client, auth_headers, {**cv_data, "fontSize": 12})
+    assert client.get(first["pdfUrl"], headers=auth_headers).status_code == 404
+    assert client.get(second["pdfUrl"], headers=auth_headers).status_code == 200
+    assert health_stats()["renderCache"]["overQuota"] == 1
+
+
+def test_shared_document_survives_until_last_owner_is_gone(app, client, fake_pdflatex):
+    """Two users with empty profiles compile byte-identical documents."""
+    import uuid
+
+    from app import render_cache
+    from app.auth_utils import generate_token
+    from app.db import get_db
+
+    headers = []
+    with app.app_context():
+        db = get_db()
+        for _ in range(2):
+            uid = str(uuid.uuid4())
+            db.execute(
+                "INSERT INTO users (id, email, password_hash) VALUES (?, ?, ?)",
+                (uid, f"{uid}@example.com", "hash"),
+            )
+            headers.append({"Authorization": f"Bearer {generate_token(uid)}"})
+        db.commit()
+
+    url = _compile(client, headers[0], {})["pdfUrl"]
+    assert client.post("/latex/compile", json={}, headers=headers[1]).status_code == 200
+    with app.app_context():
+        db = get_db()
+        db.execute("UPDATE compiled_artifacts SET last_used_at = 0 WHERE rowid = 1")
+        db.commit()
+        render_cache.sweep(app, db, render_cache.Path(app.config["LATEX_OUTPUT_DIR"]))
+    statuses = sorted(client.get(url, headers=h).status_code for h in headers)
+    assert statuses == [200, 404]
+
+
+def test_sweep_removes_strays_and_runs_from_cli(app, runner):
+    import json
+    import os
+    from pathlib import Path
+
+    out_dir = Path(app.config["LATEX_OUTPUT_DIR"])
+    out_dir.mkdir(parents=True)
+    (out_dir / "old-flat.aux").write_text("")
+    (out_dir / "recent-flat.pdf").write_bytes(b"%PDF")
+    scratch = out_dir / "work-abandoned"
+    scratch.mkdir()
+    os.utime(scratch, (0, 0))
+
+    result = runner.invoke(args=["latex", "sweep"])
+    assert result.exit_code == 0
+    assert json.loads(result.output)["strays"] == 2
+    assert sorted(p.name for p in out_dir.iterdir()) == ["recent-flat.pdf"]
+
+
+def test_sweep_runs_as_periodic_job_task(app):
+    from app.jobs import get_queue
+
+    queue = get_queue(app)
+    assert "compiled-sweep" in queue.run_periodic()
+    # Not due again until LATEX_SWEEP_INTERVAL has passed.
+    assert queue.run_periodic() == []
+
+
+def test_preamble_is_precompiled_once(app, client, auth_headers, cv_data, fake_pdflatex, health_stats):
+    from pathlib import Path
+
+    first = _compile(client, auth_headers, cv_data)
+    client.put("/profile", json={"firstName": "Grace", "lastName": "Hopper"}, headers=auth_headers)
+    second = _compile(client, auth_headers, cv_data)
+
+    assert b"Grace Hopper" in client.get(second["pdfUrl"], headers=auth_headers).data
+    assert first["pdfUrl"] != second["pdfUrl"]
+    stats = health_stats()["latexEngine"]
+    assert stats["formatsBuilt"] == 1
+    assert stats["formatCompiles"] == 2
+    assert stats["coldCompiles"] == 0
+    assert len(list((Path(app.config["LATEX_OUTPUT_DIR"]) / "formats").glob("*.fmt"))) == 1
+    # The stored source is the whole document, not just the body that was compiled.
+    tex = client.get(second["pdfUrl"].replace("/download/", "/download-tex/"), headers=auth_headers)
+    assert tex.data.startswith(b"\\documentclass")
+
+
+def test_sweep_expires_unused_formats(app, client, auth_headers, cv_data, fake_pdflatex):
+    import os
+
+    from app import render_cache
+    from app.db import get_db
+
+    _compile(client, auth_headers, cv_data)
+    out_dir = render_cache.Path(app.config["LATEX_OUTPUT_DIR"])
+    [fmt] = (out_dir / "formats").glob("*.fmt")
+    with app.app_context():
+        assert render_cache.sweep(app, get_db(), out_dir)["formatsExpired"] == 0
+        old = render_cache.time.time() - app.config["LATEX_ARTIFACT_TTL"] - 1
+        os.utime(fmt, (old, old))
+        assert render_cache.sweep(app, get_db(), out_dir)["formatsExpired"] == 1
+    assert not fmt.exists()
+    # The same preamble with a new body dumps the format again.
+    client.put("/profile", json={"firstName": "Grace"}, headers=auth_headers)
+    _compile(client, auth_headers, cv_data)
+    assert fmt.exists()
+
+
+def test_engine_falls_back_when_preamble_cannot_be_dumped(app, tmp_path, fake_pdflatex):
+    from app.latex_engine import get_engine
+
+    engine = get_engine(app)
+    tex = "\\documentclass{article}\n% FAIL-FORMAT\n\\begin{document}\nHi\n\\end{document}"
+    for _ in range(2):
+        engine.compile(tex, tmp_path)
+        assert (tmp_path / "cv.pdf").exists()
+    stats = engine._counters.snapshot()
+    assert stats["formatFailures"] == 1
+    assert stats["coldCompiles"] == 2
+
+
+def test_missing_pdflatex_is_reported(app, client, auth_headers):
+    app.config["PDFLATEX"] = "no-such-pdflatex"
+    app.extensions.pop("latex_engine")
+    res = client.post("/latex/compile", json={}, headers=auth_headers)
+    assert res.status_code == 501
+
+
+def test_template_is_selected_per_request(client, auth_headers, cv_data, fake_pdflatex):
+    templates = client.get("/latex/templates", headers=auth_headers).get_json()
+    assert {"modern-1", "classic-1"} <= set(templates["templates"])
+    assert templates["default"] == "modern-1"
+
+    modern = _compile(client, auth_headers, cv_data)
+    classic = _compile(client, auth_headers, {**cv_data, "templateId": "classic-1"})
+    legacy = client.post(
+        "/latex/compile", json={**cv_data, "template": "classic-1"}, headers=auth_headers
+    ).get_json()
+    assert legacy["pdfUrl"] == classic["pdfUrl"]
+
+    def source(job):
+        url = job["pdfUrl"].replace("/download/", "/download-tex/")
+        return client.get(url, headers=auth_headers).data.decode()
+
+    assert "\\color{accent}" in source(modern)
+    assert "\\scshape" in source(classic)
+    # User text is escaped once, whichever layout renders it.
+    for tex in (source(modern), source(classic)):
+        assert "Analyst \\& Programmer" in tex
+        assert "program\\_100\\%" in tex
+        assert "Bernoulli, C\\#" in tex
+
+
+def test_unknown_template_is_rejected(client, auth_headers, fake_pdflatex):
+    for template_id in ("nope", "../modern-1"):
+        res = client.post("/latex/compile", json={"templateId": template_id}, headers=auth_headers)
+        assert res.status_code == 400
+        assert "Unknown template" in res.get_json()["error"]
+
+
+def test_templates_are_cached_and_hot_reloaded(app, tmp_path):
+    import os
+
+    from app import tex_templates
+
+    app.config["LATEX_TEMPLATE_DIR"] = str(tmp_path)
+    path = tmp_path / "tiny.tex.j2"
+    path.write_text("v1 \\VAR{name}")
+    context = tex_templates.document_context({"first_name": "A&B"}, [], [], [], 11)
+    with app.app_context():
+        assert tex_templates.render(app, "tiny", context) == "v1 A\\&B"
+        first = tex_templates.get_template(app, "tiny")
+        assert tex_templates.get_template(app, "tiny") is first
+
+        path.write_text("v2 \\VAR{name}")
+        stat = path.stat()
+        os.utime(path, (stat.st_atime, stat.st_mtime + 5))
+        assert tex_templates.render(app, "tiny", context) == "v2 A\\&B"
+
+
+def _entries(n):
+    return [
+        {
+            "id": f"e{i}", "title": f"Role {i}", "organization": "Org", "start_date": "2020",
+            "end_date": None, "description": f"Did thing {i}", "keywords": '["x"]',
+        }
+        for i in range(n)
+    ]
+
+
+def test_only_changed_fragments_are_rerendered(app):
+    from app import tex_templates
+
+    experiences = _entries(5)
+    with app.app_context():
+        first = tex_templates.render_document(app, "modern-1", {}, [], experiences, [], 11)
+        assert tex_templates.fragment_stats(app)["misses"] == 5
+
+        experiences[2] = {**experiences[2], "description": "Did it better & faster"}
+        blurbs = [{"type": "summary", "content": "New summary"}]
+        second = tex_templates.render_document(app, "modern-1", {}, blurbs, experiences, [], 11)
+
+        stats = tex_templates.fragment_stats(app)
+        assert stats["misses"] == 6
+        assert stats["hits"] == 4
+        assert stats["hitRate"] == 0.4
+    assert "Did thing 2" in first and "Did thing 2" not in second
+    assert "Did it better \\& faster" in second
+    assert "New summary" in second
+
+
+def test_fragments_follow_template_version(app, tmp_path):
+    import os
+
+    from app import tex_templates
+
+    app.config["LATEX_TEMPLATE_DIR"] = str(tmp_path)
+    path = tmp_path / "tiny.tex.j2"
+    path.write_text(
+        "\\BLOCK{ macro experience(e) }v1 \\VAR{e.title}\\BLOCK{ endmacro }"
+        "\\BLOCK{ macro project(p) }\\BLOCK{ endmacro }"
+        "\\VAR{ experiences | join(',') }"
+    )
+    with app.app_context():
+        assert tex_templates.render_document(app, "tiny", {}, [], _entries(2), [], 11) == "v1 Role 0,v1 Role 1"
+        path.write_text(path.read_text().replace("v1", "v2"))
+        stat = path.stat()
+        os.utime(path, (stat.st_atime, stat.st_mtime + 5))
+        assert tex_templates.render_document(app, "tiny", {}, [], _entries(2), [], 11) == "v2 Role 0,v2 Role 1"
+        assert tex_templates.fragment_stats(app)["hits"] == 0
+
+
+def test_fragment_stats_exposed(client, auth_headers, cv_data, fake_pdflatex, health_stats):
+    _compile(client, auth_headers, cv_data)
+    client.post("/latex/compile", json=cv_data, headers=auth_headers)
+    stats = health_stats()["texFragments"]
+    assert stats["misses"] == 1
+    assert stats["hits"] == 1
+    assert stats["hitRate"] == 0.5
+
+
+def test_pending_compiles_are_capped_per_user(
+    app, client, auth_headers, user_id, cv_data, fake_pdflatex, health_stats
+):
+    app.config["LATEX_PENDING_PER_USER"] = 1
+    with app.app_context():
+        db = get_db()
+        db.execute(
+            "INSERT INTO jobs (id, kind, user_id, status, payload, created_at) "
+            "VALUES ('busy', 'latex', ?, 'running', '{}', ?)",
+            (user_id, time.time()),
+        )
+        db.commit()
+    res = client.post("/latex/compile", json=cv_data, headers=auth_headers)
+    assert res.status_code == 429
+    assert res.headers["Retry-After"] == "1"
+
+    with app.app_context():
+        db = get_db()
+        db.execute("UPDATE jobs SET status = 'done' WHERE id = 'busy'")
+        db.commit()
+    queued = client.post("/latex/compile", json=cv_data, headers=auth_headers).get_json()
+    assert wait_for_job(client, auth_headers, queued["statusUrl"])["status"] == "done"
+    assert health_stats()["jobs"]["rejected"] == 1
@@ -0,0 +1,85 @@
+"""Token-bucket rate limits (app/ratelimit.py)."""
+import pytest
+
+from app import ratelimit
+from app.ratelimit import Rate, TokenBuckets, parse_rate
+
+
+def _login(client, addr="10.0.0.1"):
+    return client.post(
+        "/auth/login",
+        json={"email": "nobody@example.com", "password": "x"},
+        environ_base={"REMOTE_ADDR": addr},
+    )
+
+
+@pytest.mark.parametrize("spec, rate", [
+    ("10/minute", Rate(10, 10 / 60)),
+    ("5 / seconds", Rate(5, 5)),
+    ("24/day", Rate(24, 24 / 86400)),
+    ("", None),
+    ("0/hour", None),
+])
+def test_parse_rate(spec, rate):
+    assert parse_rate(spec) == rate
+
+
+def test_parse_rate_rejects_unknown_periods():
+    with pytest.raises(ValueError):
+        parse_rate("10/fortnight")
+
+
+def test_bucket_bursts_then_refills(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(ratelimit.time, "monotonic", lambda: now[0])
+    buckets = TokenBuckets(max_keys=10)
+    rate = Rate(capacity=3, per_second=0.5)
+
+    assert [buckets.take("k", rate) for _ in range(3)] == [0, 0, 0]
+    assert buckets.take("k", rate) == pytest.approx(2.0)
+    now[0] += 1
+    assert buckets.take("k", rate) == pytest.approx(1.0)
+    now[0] += 1
+    assert buckets.take("k", rate) == 0
+    # Other keys have their own bucket.
+    assert buckets.take("other", rate) == 0
+    # A cost above the capacity empties a full bucket rather than never fitting.
+    assert buckets.take("big", rate, cost=10) == 0
+    assert buckets.take("big", rate) == pytest.approx(2.0)
+
+
+def test_least_recently_used_buckets_are_dropped():
+    buckets = TokenBuckets(max_keys=2)
+    rate = Rate(capacity=1, per_second=0.001)
+    for key in ("a", "b", "a", "c"):
+        buckets.take(key, rate)
+    assert len(buckets) == 2
+    # "a" is still empty; "b" was forgotten and starts full again.
+    assert buckets.take("a", rate) > 0
+    assert buckets.take("b", rate) == 0
+
+
+def test_auth_endpoints_are_limited_per_ip(app, client, health_stats):
+    app.config["RATE_LIMIT_AUTH"] = "3/minute"
+    assert [_login(client).status_code for _ in range(3)] == [401, 401, 401]
+    res = _login(client)
+    assert res.status_code == 429
+    assert 1 <= int(res.headers["Retry-After"]) <= 20
+    # Register shares the bucket; another address does not.
+    assert client.post(
+        "/auth/register", json={"email": "a@example.com"}, environ_base={"REMOTE_ADDR": "10.0.0.1"}
+    ).status_code == 429
+    assert _login(client, addr="10.0.0.2").status_code == 401
+
+    stats = health_stats()["rateLimit"]
+    assert stats["allowed"] == 4
+    assert stats["limited"] == 2
+
+
+def test_limits_can_be_switched_off(app, client):
+    app.config.update(RATE_LIMIT_ENABLED=False, RATE_LIMIT_AUTH="1/minute")
+    assert all(_login(client).status_code == 401 for _ in range(5))
+
+    app.extensions.pop("rate_limiter")
+    app.config.update(RATE_LIMIT_ENABLED=True, RATE_LIMIT_AUTH="")
+    assert all(_login(client).status_code == 401 for _ in range(5))
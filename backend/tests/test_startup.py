@@ -0,0 +1,60 @@
+"""Tests for the fast start-up path of create_app."""
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from app import create_app
+from app.db import get_pool
+
+
+def test_heavy_sdks_not_imported_at_startup():
+    code = (
+        "import sys; from app import create_app; "
+        "print('openai' in sys.modules, 'cryptography.fernet' in sys.modules)"
+    )
+    out = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=Path(__file__).resolve().parent.parent,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout.split()
+    assert out == ["False", "False"]
+
+
+def test_bootstrap_skipped_when_schema_current(app, monkeypatch):
+    def fail(db):
+        raise AssertionError("migrate() should not run on an up-to-date database")
+
+    monkeypatch.setattr("app.db.migrate", fail)
+    second = create_app({"TESTING": True, "DATABASE": app.config["DATABASE"]})
+    assert "database" in second.extensions["startup_ms"]
+
+
+def test_bootstrap_runs_without_fast_startup(app, monkeypatch):
+    calls = []
+    monkeypatch.setattr("app.db.migrate", calls.append)
+    create_app({
+        "TESTING": True,
+        "DATABASE": app.config["DATABASE"],
+        "FAST_STARTUP": False,
+    })
+    assert len(calls) == 1
+
+
+def test_job_workers_start_with_the_app(app):
+    """Housekeeping runs even in a process that never enqueues a job."""
+    from app.jobs import get_queue
+
+    served = create_app({"DATABASE": app.config["DATABASE"], "JOB_POLL_INTERVAL": 0.01})
+    queue = get_queue(served)
+    try:
+        assert len(queue._threads) == served.config["JOB_WORKERS"]
+        deadline = time.monotonic() + 5
+        while queue._counters.snapshot()["periodicRuns"] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert queue._counters.snapshot()["periodicRuns"] > 0
+    finally:
+        queue.shutdown()
+        get_pool(served).close()
@@ -0,0 +1,214 @@
+"""Change tracking, delta export (/export?since=) and merge-mode import."""
+import hashlib
+import io
+import json
+import os
+import tempfile
+import uuid
+import zipfile
+from pathlib import Path
+
+import pytest
+
+from app import create_app, sync
+from app.auth_utils import generate_token
+from app.db import get_db, get_pool
+
+EXP = {"category": "work", "organization": "Org", "startDate": "2020-01-01", "keywords": []}
+
+
+@pytest.fixture
+def remote():
+    """A second installation to sync into, with its own database and photos."""
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app({
+            "TESTING": True,
+            "DATABASE": f"{tmp}/remote.db",
+            "LATEX_OUTPUT_DIR": f"{tmp}/compiled",
+            "PHOTOS_DIR": f"{tmp}/photos",
+        })
+        uid = str(uuid.uuid4())
+        with app.app_context():
+            db = get_db()
+            db.execute(
+                "INSERT INTO users (id, email, password_hash) VALUES (?, ?, 'hash')",
+                (uid, f"{uid}@example.com"),
+            )
+            db.commit()
+            headers = {"Authorization": f"Bearer {generate_token(uid)}"}
+        yield app, app.test_client(), headers, uid
+        if "job_queue" in app.extensions:
+            app.extensions["job_queue"].shutdown()
+        get_pool(app).close()
+
+
+def _version(app, table, row_id):
+    with app.app_context():
+        return get_db().execute(f"SELECT version FROM {table} WHERE id = ?", (row_id,)).fetchone()[0]
+
+
+def _export(client, headers, since=None):
+    res = client.get("/export" + (f"?since={since}" if since is not None else ""), headers=headers)
+    assert res.status_code == 200, res.data
+    with zipfile.ZipFile(io.BytesIO(res.data)) as zf:
+        data = json.loads(zf.read("data.json"))
+        names = zf.namelist()
+    assert int(res.headers["X-Export-Cursor"]) == data["cursor"]
+    return res.data, data, names
+
+
+def _import(client, headers, archive, mode):
+    return client.post(
+        "/import",
+        data={"file": (io.BytesIO(archive), "cv-export.zip"), "mode": mode},
+        headers=headers,
+        content_type="multipart/form-data",
+    )
+
+
+def _contents(app, user_id):
+    tracked = ("version", "updated_at", "user_id", "filename")
+    with app.app_context():
+        db = get_db()
+        return {
+            table: sorted(
+                ({k: r[k] for k in r.keys() if k not in tracked} for r in
+                 db.execute(f"SELECT * FROM {table} WHERE user_id = ?", (user_id,))),
+                key=lambda r: r["id"],
+            )
+            for table in sync.TRACKED
+        }
+
+
+def test_versions_advance_only_on_real_changes(app, client, auth_headers):
+    exp = client.post("/experiences", json={**EXP, "title": "A"}, headers=auth_headers).get_json()
+    first = _version(app, "experiences", exp["id"])
+    assert first > 1
+
+    client.put(f"/experiences/{exp['id']}", json={**EXP, "title": "A"}, headers=auth_headers)
+    assert _version(app, "experiences", exp["id"]) == first
+
+    client.put(f"/experiences/{exp['id']}", json={**EXP, "title": "B"}, headers=auth_headers)
+    assert _version(app, "experiences", exp["id"]) > first
+
+    client.delete(f"/experiences/{exp['id']}", headers=auth_headers)
+    with app.app_context():
+        tomb = get_db().execute("SELECT * FROM change_tombstones").fetchone()
+        assert (tomb["entity"], tomb["row_id"]) == ("experiences", exp["id"])
+        assert tomb["version"] == sync.current_cursor(get_db())
+
+
+def test_delta_export_holds_only_changes(client, auth_headers):
+    keep = client.post("/experiences", json={**EXP, "title": "Keep"}, headers=auth_headers).get_json()
+    edit = client.post("/experiences", json={**EXP, "title": "Edit"}, headers=auth_headers).get_json()
+    gone = client.post("/experiences", json={**EXP, "title": "Gone"}, headers=auth_headers).get_json()
+    _, full, _ = _export(client, auth_headers)
+    assert {e["title"] for e in full["experiences"]} == {"Keep", "Edit", "Gone"}
+    assert "deleted" not in full
+
+    client.put(f"/experiences/{edit['id']}", json={**EXP, "title": "Edited"}, headers=auth_headers)
+    client.delete(f"/experiences/{gone['id']}", headers=auth_headers)
+    client.post("/projects", json={"title": "New"}, headers=auth_headers)
+
+    _, delta, _ = _export(client, auth_headers, since=full["cursor"])
+    assert delta["since"] == full["cursor"]
+    assert delta["cursor"] > full["cursor"]
+    assert [e["title"] for e in delta["experiences"]] == ["Edited"]
+    assert [p["title"] for p in delta["projects"]] == ["New"]
+    assert delta["deleted"]["experiences"] == [gone["id"]]
+    assert keep["id"] not in json.dumps(delta)
+
+    _, empty, _ = _export(client, auth_headers, since=delta["cursor"])
+    assert empty["experiences"] == [] and empty["deleted"]["experiences"] == []
+
+
+def test_delta_export_rejects_bad_and_pruned_cursors(app, client, auth_headers):
+    assert client.get("/export?since=-1", headers=auth_headers).status_code == 400
+    exp = client.post("/experiences", json={**EXP, "title": "A"}, headers=auth_headers).get_json()
+    client.delete(f"/experiences/{exp['id']}", headers=auth_headers)
+    with app.app_context():
+        db = get_db()
+        db.execute("UPDATE change_tombstones SET deleted_at = '2000-01-01 00:00:00'")
+        db.commit()
+        assert sync.prune(app, db) == 1
+
+    res = client.get("/export?since=0", headers=auth_headers)
+    assert res.status_code == 410
+    assert res.get_json()["error"]["code"] == "CURSOR_EXPIRED"
+    assert client.get("/export", headers=auth_headers).status_code == 200
+
+
+def test_merge_import_applies_a_delta(app, client, auth_headers, user_id, remote):
+    r_app, r_client, r_headers, r_uid = remote
+    client.post("/experiences", json={**EXP, "title": "Same"}, headers=auth_headers)
+    edit = client.post("/experiences", json={**EXP, "title": "Edit"}, headers=auth_headers).get_json()
+    gone = client.post("/projects", json={"title": "Gone"}, headers=auth_headers).get_json()
+    client.post(
+        "/profile/photos",
+        data={"photo": (io.BytesIO(os.urandom(4096)), "me.png")},
+        headers=auth_headers,
+        content_type="multipart/form-data",
+    )
+    archive, full, _ = _export(client, auth_headers)
+    assert _import(r_client, r_headers, archive, "replace").status_code == 200
+    assert _contents(r_app, r_uid) == _contents(app, user_id)
+    remote_photos = sorted(os.listdir(r_app.config["PHOTOS_DIR"]))
+
+    client.put(f"/experiences/{edit['id']}", json={**EXP, "title": "Edited"}, headers=auth_headers)
+    client.delete(f"/projects/{gone['id']}", headers=auth_headers)
+    client.post("/projects", json={"title": "Added"}, headers=auth_headers)
+    archive, delta, names = _export(client, auth_headers, since=full["cursor"])
+    assert names == ["data.json"]
+
+    res = _import(r_client, r_headers, archive, "merge")
+    assert res.status_code == 200, res.get_json()
+    body = res.get_json()
+    assert body["mode"] == "merge"
+    assert body["changed"] == {
+        "photos": 0, "experiences": 1, "projects": 1, "job_descriptions": 0, "blurbs": 0,
+    }
+    assert body["deleted"]["projects"] == 1
+    assert _contents(r_app, r_uid) == _contents(app, user_id)
+    # The photo was neither in the delta nor touched on the remote side.
+    assert sorted(os.listdir(r_app.config["PHOTOS_DIR"])) == remote_photos
+
+
+def test_merge_import_skips_unchanged_rows_and_photos(client, auth_headers, remote):
+    r_app, r_client, r_headers, _ = remote
+    client.post("/experiences", json={**EXP, "title": "A"}, headers=auth_headers)
+    client.post(
+        "/profile/photos",
+        data={"photo": (io.BytesIO(os.urandom(4096)), "me.jpg")},
+        headers=auth_headers,
+        content_type="multipart/form-data",
+    )
+    archive, full, _ = _export(client, auth_headers)
+    assert full["photos"][0]["sha256"]
+    _import(r_client, r_headers, archive, "replace")
+    photos_dir = Path(r_app.config["PHOTOS_DIR"])
+    [photo] = photos_dir.iterdir()
+    mtime = photo.stat().st_mtime_ns
+    with r_app.app_context():
+        cursor = sync.current_cursor(get_db())
+
+    res = _import(r_client, r_headers, archive, "merge")
+    assert res.status_code == 200
+    assert set(res.get_json()["changed"].values()) == {0}
+    assert list(photos_dir.iterdir()) == [photo]
+    assert photo.stat().st_mtime_ns == mtime
+    with r_app.app_context():
+        assert sync.current_cursor(get_db()) == cursor
+
+
+def test_photo_checksum_mismatch_is_rejected(client, auth_headers):
+    data = b"not what was declared"
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as zf:
+        zf.writestr("data.json", json.dumps({
+            "photos": [{"id": "p", "filename": "a.png", "sha256": hashlib.sha256(b"x").hexdigest()}],
+        }))
+        zf.writestr("photos/a.png", data)
+    res = _import(client, auth_headers, buf.getvalue(), "merge")
+    assert res.status_code == 400
+    assert res.get_json()["error"]["code"] == "CHECKSUM_MISMATCH"
+    assert _import(client, auth_headers, buf.getvalue(), "sideways").status_code == 400
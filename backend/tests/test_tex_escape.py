@@ -0,0 +1,86 @@
+"""Property and fuzz tests for app/tex_escape.py (seeded, so failures reproduce)."""
+import json
+import random
+import re
+from urllib.parse import unquote
+
+import pytest
+
+from app import tex_escape
+
+SPECIALS = "&%$#_{}~^\\"
+ALPHABET = SPECIALS + "abc XYZ019.,;:/-\n\téüß—数据😀"
+
+# The pre-tex_escape implementation, kept as the reference behaviour.
+REFERENCE = str.maketrans({
+    "&": r"\&",
+    "%": r"\%",
+    "$": r"\$",
+    "#": r"\#",
+    "_": r"\_",
+    "{": r"\{",
+    "}": r"\}",
+    "~": r"\textasciitilde{}",
+    "^": r"\textasciicircum{}",
+    "\\": r"\textbackslash{}",
+})
+
+_TOKEN = re.compile(r"\\textasciitilde\{\}|\\textasciicircum\{\}|\\textbackslash\{\}|\\[&%$#_{}]")
+_DECODE = {r"\textasciitilde{}": "~", r"\textasciicircum{}": "^", r"\textbackslash{}": "\\"}
+
+
+def unescape(tex: str) -> str:
+    return _TOKEN.sub(lambda m: _DECODE.get(m.group(), m.group()[1:]), tex)
+
+
+def samples(seed: int, count: int = 500, max_len: int = 80):
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield "".join(rng.choice(ALPHABET) for _ in range(rng.randrange(max_len)))
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_text_matches_reference_and_round_trips(seed):
+    for value in samples(seed):
+        escaped = tex_escape.text(value)
+        assert escaped == value.translate(REFERENCE)
+        assert unescape(escaped) == value
+        # No special character survives outside an escape sequence.
+        assert not set(_TOKEN.sub("", escaped)) & set(SPECIALS)
+
+
+def test_long_text_bypasses_cache_with_same_result():
+    for value in samples(7, count=20, max_len=5000):
+        assert tex_escape.text(value) == value.translate(REFERENCE)
+    assert tex_escape.text(None) == ""
+
+
+def test_nul_characters_are_dropped():
+    assert tex_escape.text("a\x00\\b") == r"a\textbackslash{}b"
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_url_keeps_links_intact(seed):
+    rng = random.Random(seed)
+    chars = "abc019/-._~:?=&+#@!$'()*,; {}\\^|\"<>é"
+    for _ in range(500):
+        value = "https://example.com/" + "".join(
+            rng.choice(chars) for _ in range(rng.randrange(40))
+        )
+        escaped = tex_escape.url(value)
+        unescaped = escaped.replace(r"\%", "%").replace(r"\#", "#")
+        assert unquote(unescaped) == value
+        # Only \% and \# may use a backslash; braces never appear raw.
+        assert not re.search(r"\\(?![%#])|[{}\s]|(?<!\\)[%#]", escaped)
+
+
+def test_url_escapes_only_what_hyperref_needs():
+    assert tex_escape.url("https://x.io/~ada/a_b?q=1&r=2#top") == r"https://x.io/~ada/a_b?q=1&r=2\#top"
+    assert tex_escape.url("https://x.io/50%25") == r"https://x.io/50\%25"
+    assert tex_escape.href("https://x.io/~a") == r"\href{https://x.io/~a}{https://x.io/\textasciitilde{}a}"
+
+
+def test_keywords_join_then_escape():
+    assert tex_escape.keywords(json.dumps(["C#", "R&D", "a_b"])) == r"C\#, R\&D, a\_b"
+    assert tex_escape.keywords(None) == ""
+    assert tex_escape.keywords("[]") == ""
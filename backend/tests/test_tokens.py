@@ -0,0 +1,137 @@
+"""Access/refresh tokens, the verified-token cache and revocation."""
+import time
+
+import pytest
+
+from app import create_app, tokens
+from app.auth_utils import generate_token
+from app.cache import BloomFilter
+from app.db import get_db, get_pool
+
+
+def _login(client, email="t@example.com"):
+    password = client.post("/auth/register", json={"email": email}).get_json()["generatedPassword"]
+    res = client.post("/auth/login", json={"email": email, "password": password})
+    assert res.status_code == 200
+    return res.get_json()
+
+
+def _bearer(token):
+    return {"Authorization": f"Bearer {token}"}
+
+
+def test_login_issues_access_and_refresh_tokens(app, client):
+    body = _login(client)
+    assert body["expiresIn"] == app.config["ACCESS_TOKEN_TTL"]
+    assert client.get("/experiences", headers=_bearer(body["token"])).status_code == 200
+    # A refresh token is not an access token, and vice versa.
+    assert client.get("/experiences", headers=_bearer(body["refreshToken"])).status_code == 401
+    assert client.post("/auth/refresh", json={"refreshToken": body["token"]}).status_code == 401
+
+
+def test_verified_tokens_are_cached_and_skip_the_revocation_table(
+    client, auth_headers, monkeypatch, health_stats
+):
+    assert client.get("/experiences", headers=auth_headers).status_code == 200
+
+    def no_decode(*args):
+        raise AssertionError("cached token decoded again")
+
+    monkeypatch.setattr(tokens, "decode", no_decode)
+    for _ in range(3):
+        assert client.get("/experiences", headers=auth_headers).status_code == 200
+    stats = health_stats()
+    assert stats["tokenCache"]["cache"]["hits"] >= 3
+    assert stats["tokens"]["revocationLookups"] == 0
+
+
+def test_expired_token_is_rejected(app, client, user_id):
+    app.config["ACCESS_TOKEN_TTL"] = -1
+    with app.app_context():
+        token = generate_token(user_id)
+    res = client.get("/experiences", headers=_bearer(token))
+    assert res.status_code == 401
+    assert res.get_json()["error"] == "Token expired"
+
+
+def test_logout_revokes_both_tokens(client):
+    body = _login(client)
+    headers = _bearer(body["token"])
+    assert client.get("/experiences", headers=headers).status_code == 200
+
+    res = client.post("/auth/logout", json={"refreshToken": body["refreshToken"]}, headers=headers)
+    assert res.status_code == 200
+    res = client.get("/experiences", headers=headers)
+    assert res.status_code == 401
+    assert res.get_json()["error"] == "Token revoked"
+    assert client.post("/auth/refresh", json={"refreshToken": body["refreshToken"]}).status_code == 401
+    # Logging out again, or with garbage, still succeeds.
+    assert client.post("/auth/logout", headers=_bearer("garbage")).status_code == 200
+
+
+def test_refresh_rotates_the_refresh_token(client):
+    body = _login(client)
+    res = client.post("/auth/refresh", json={"refreshToken": body["refreshToken"]})
+    assert res.status_code == 200
+    pair = res.get_json()
+    assert pair["token"] != body["token"]
+    assert client.get("/experiences", headers=_bearer(pair["token"])).status_code == 200
+
+    reused = client.post("/auth/refresh", json={"refreshToken": body["refreshToken"]})
+    assert reused.status_code == 401
+    assert client.post("/auth/refresh", json={"refreshToken": pair["refreshToken"]}).status_code == 200
+    assert client.post("/auth/refresh", json={}).status_code == 400
+
+
+def test_other_processes_see_revocations(app, client):
+    other = create_app({"TESTING": True, "DATABASE": app.config["DATABASE"], "TOKEN_REVOCATION_SYNC": 0})
+    try:
+        body = _login(client)
+        headers = _bearer(body["token"])
+        other_client = other.test_client()
+        assert other_client.get("/experiences", headers=headers).status_code == 200
+
+        client.post("/auth/logout", headers=headers)
+        assert other_client.get("/experiences", headers=headers).status_code == 401
+    finally:
+        get_pool(other).close()
+
+
+def test_prune_forgets_expired_revocations(app, client):
+    body = _login(client)
+    client.post("/auth/logout", json={"refreshToken": body["refreshToken"]}, headers=_bearer(body["token"]))
+    with app.app_context():
+        db = get_db()
+        db.execute("UPDATE revoked_tokens SET expires_at = ?", (time.time() - 1,))
+        db.commit()
+        assert tokens.prune(app, db) == 2
+        assert db.execute("SELECT COUNT(*) FROM revoked_tokens").fetchone()[0] == 0
+
+
+@pytest.mark.parametrize("capacity", [100, 10000])
+def test_bloom_filter_has_no_false_negatives(capacity):
+    bloom = BloomFilter(capacity)
+    added = [f"jti-{i}" for i in range(capacity)]
+    for key in added:
+        bloom.add(key)
+    assert all(key in bloom for key in added)
+    false_positives = sum(f"other-{i}" in bloom for i in range(capacity))
+    assert false_positives < capacity * 0.05
+
+
+def test_bloom_filter_counts_each_key_once():
+    bloom = BloomFilter(100)
+    assert bloom.add("jti-1")
+    assert not bloom.add("jti-1")
+    assert bloom.count == 1
+
+
+def test_sync_does_not_recount_local_revocations(app, client):
+    app.config["TOKEN_REVOCATION_SYNC"] = 0
+    body = _login(client)
+    client.post("/auth/logout", json={"refreshToken": body["refreshToken"]}, headers=_bearer(body["token"]))
+    with app.app_context():
+        state = tokens.get_tokens(app)
+        state.sync_interval = 0
+        state._sync()
+        assert state.stats()["bloom"]["count"] == 2
@@ -0,0 +1,71 @@
+"""GET /workspace returns every list in one consistent snapshot."""
+import sqlite3
+
+from app import pagination
+from app.blueprints import workspace
+
+EXP = {"category": "work", "title": "Dev", "organization": "Org", "startDate": "2020-01-01"}
+
+
+def test_workspace_matches_the_list_endpoints(client, auth_headers):
+    client.put("/profile", json={"firstName": "Ada"}, headers=auth_headers)
+    client.post("/experiences", json=EXP, headers=auth_headers)
+    client.post("/projects", json={"title": "P"}, headers=auth_headers)
+    jd = client.post(
+        "/job-descriptions", json={"title": "JD", "company": "Co", "description": "x"}, headers=auth_headers
+    ).get_json()
+    client.post("/blurbs", json={"type": "summary", "content": "Hi", "jobDescriptionId": jd["id"]},
+                headers=auth_headers)
+
+    res = client.get("/workspace", headers=auth_headers)
+    assert res.status_code == 200
+    body = res.get_json()
+    assert set(body) == {"cursor", *workspace.SECTIONS}
+    for section, url in [
+        ("profile", "/profile"),
+        ("photos", "/profile/photos"),
+        ("experiences", "/experiences"),
+        ("projects", "/projects"),
+        ("blurbs", "/blurbs"),
+        ("jobDescriptions", "/job-descriptions"),
+    ]:
+        assert body[section] == client.get(url, headers=auth_headers).get_json(), section
+    assert body["profile"]["firstName"] == "Ada"
+
+
+def test_include_selects_sections(client, auth_headers):
+    client.post("/experiences", json=EXP, headers=auth_headers)
+    body = client.get("/workspace?include=experiences,projects", headers=auth_headers).get_json()
+    assert set(body) == {"cursor", "experiences", "projects"}
+    assert len(body["experiences"]) == 1
+
+    res = client.get("/workspace?include=experiences,secrets", headers=auth_headers)
+    assert res.status_code == 400
+    assert res.get_json()["error"]["code"] == "INVALID_INCLUDE"
+    assert client.get("/workspace").status_code == 401
+
+
+def test_sections_share_one_snapshot(app, client, auth_headers, user_id, monkeypatch):
+    """A write committed between two sections is in neither."""
+    real_page = pagination.page
+    other = sqlite3.connect(app.config["DATABASE"])
+
+    def page_then_write(db, listing, *args):
+        result = real_page(db, listing, *args)
+        if listing.table == "experiences":
+            other.execute(
+                "INSERT INTO projects (id, user_id, title) VALUES ('late', ?, 'Late')", (user_id,)
+            )
+            other.commit()
+        return result
+
+    monkeypatch.setattr(pagination, "page", page_then_write)
+    try:
+        body = client.get("/workspace?include=experiences,projects", headers=auth_headers).get_json()
+    finally:
+        other.close()
+    assert body["projects"] == []
+    monkeypatch.undo()
+    after = client.get("/workspace?include=projects", headers=auth_headers).get_json()
+    assert [p["id"] for p in after["projects"]] == ["late"]
+    assert after["cursor"] > body["cursor"]
@@ -1,10 +1,22 @@
 import { post } from "@/lib/fetchClient"
-import type { GenerateBlurbRequest, GenerateBlurbResponse, JobAnalysis } from "@/types"
+import type {
+  GenerateBlurbRequest,
+  GenerateBlurbResponse,
+  GenerateBlurbsBatchRequest,
+  GenerateBlurbsBatchResponse,
+  JobAnalysis,
+} from "@/types"
 
 export function generateBlurb(data: GenerateBlurbRequest): Promise<GenerateBlurbResponse> {
   return post<GenerateBlurbResponse>("/agent/generate-blurb", data)
 }
 
+export function generateBlurbsBatch(
+  data: GenerateBlurbsBatchRequest
+): Promise<GenerateBlurbsBatchResponse> {
+  return post<GenerateBlurbsBatchResponse>("/agent/generate-blurbs/batch", data)
+}
+
 export function analyzeJob(jobDescriptionId: string): Promise<JobAnalysis> {
   return post<JobAnalysis>("/agent/analyze-job", { jobDescriptionId })
 }
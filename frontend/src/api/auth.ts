@@ -1,4 +1,4 @@
-import { post } from "@/lib/fetchClient"
+import { post, REFRESH_TOKEN_KEY } from "@/lib/fetchClient"
 import type { LoginResponse, RegisterResponse } from "@/types"
 
 export function login(email: string, password: string): Promise<LoginResponse> {
@@ -9,8 +9,10 @@ export function register(email: string): Promise<RegisterResponse> {
   return post<RegisterResponse>("/auth/register", { email })
 }
 
+/** Revoke the current access token and the refresh token on the server. */
 export function logout(): Promise<void> {
-  return post<void>("/auth/logout")
+  const refreshToken = localStorage.getItem(REFRESH_TOKEN_KEY)
+  return post<void>("/auth/logout", refreshToken ? { refreshToken } : undefined)
 }
 
 export function requestPasswordReset(email: string): Promise<void> {
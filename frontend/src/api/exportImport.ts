@@ -1,13 +1,24 @@
-const BASE_URL = import.meta.env.VITE_API_URL ?? "http://localhost:5000"
+import { authFetch, get, post } from "@/lib/fetchClient"
+import type { ExportJob, ImportMode, ImportResult } from "@/types"
 
-function authHeader(): Record<string, string> {
-  const token = localStorage.getItem("cv_token")
-  return token ? { Authorization: `Bearer ${token}` } : {}
-}
+const POLL_INTERVAL_MS = 500
 
-export async function exportData(): Promise<void> {
-  const res = await fetch(`${BASE_URL}/export`, { headers: authHeader() })
-  if (!res.ok) throw new Error("Export failed")
+/**
+ * Export in the background, then download the archive and return its cursor.
+ * Pass a previous cursor as `since` to get only what changed after it
+ * (import that with mode "merge").
+ */
+export async function exportData(since?: number): Promise<number> {
+  let job = await post<ExportJob>("/export/jobs", since === undefined ? {} : { since })
+  while (job.status === "queued" || job.status === "running") {
+    await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS))
+    job = await get<ExportJob>(`/export/jobs/${job.jobId}`)
+  }
+  if (job.status === "failed" || !job.downloadUrl) {
+    throw new Error(job.error ?? "Export failed")
+  }
+  const res = await authFetch(job.downloadUrl)
+  if (!res.ok) throw new Error("Export download failed")
   const blob = await res.blob()
   const url = URL.createObjectURL(blob)
   const a = document.createElement("a")
@@ -17,18 +28,17 @@ export async function exportData(): Promise<void> {
   a.click()
   document.body.removeChild(a)
   URL.revokeObjectURL(url)
+  return job.cursor ?? 0
 }
 
-export async function importData(file: File): Promise<void> {
+export async function importData(file: File, mode: ImportMode = "replace"): Promise<ImportResult> {
   const fd = new FormData()
   fd.append("file", file)
-  const res = await fetch(`${BASE_URL}/import`, {
-    method: "POST",
-    headers: authHeader(),
-    body: fd,
-  })
+  fd.append("mode", mode)
+  const res = await authFetch("/import", { method: "POST", body: fd }, true)
   if (!res.ok) {
     const data = await res.json().catch(() => ({}))
     throw new Error(data?.error?.message ?? "Import failed")
   }
+  return res.json()
 }
@@ -1,18 +1,24 @@
-import { post } from "@/lib/fetchClient"
-import type { CompileRequest, CompileResponse } from "@/types"
+import { authFetch, get, post } from "@/lib/fetchClient"
+import type { CompileJob, CompileRequest, CompileResponse } from "@/types"
 
-const BASE_URL = import.meta.env.VITE_API_URL ?? "http://localhost:5000"
+const POLL_INTERVAL_MS = 500
 
-export function compileCV(data: CompileRequest): Promise<CompileResponse> {
-  return post<CompileResponse>("/latex/compile", data)
+/** Queue a compile and poll the job until the PDF is ready (cached PDFs return at once). */
+export async function compileCV(data: CompileRequest): Promise<CompileResponse> {
+  let job = await post<CompileJob>("/latex/compile", data)
+  while (job.status === "queued" || job.status === "running") {
+    await new Promise((resolve) => setTimeout(resolve, POLL_INTERVAL_MS))
+    job = await get<CompileJob>(`/latex/jobs/${job.jobId}`)
+  }
+  if (job.status === "failed" || !job.pdfUrl) {
+    throw new Error(job.error ?? "LaTeX compilation failed")
+  }
+  return { pdfUrl: job.pdfUrl }
 }
 
 /** Fetch the PDF with auth and return a local blob URL safe for <a> and <iframe>. */
 export async function fetchPdfBlobUrl(pdfPath: string): Promise<string> {
-  const token = localStorage.getItem("cv_token")
-  const res = await fetch(`${BASE_URL}${pdfPath}`, {
-    headers: token ? { Authorization: `Bearer ${token}` } : {},
-  })
+  const res = await authFetch(pdfPath)
   if (!res.ok) throw new Error("Failed to download PDF")
   const blob = await res.blob()
   return URL.createObjectURL(blob)
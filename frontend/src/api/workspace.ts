@@ -0,0 +1,7 @@
+import { get } from "@/lib/fetchClient"
+import type { Workspace, WorkspaceSection } from "@/types"
+
+/** Load several lists in one request; omit `include` to get every section. */
+export function getWorkspace(include?: WorkspaceSection[]): Promise<Workspace> {
+  return get<Workspace>(include ? `/workspace?include=${include.join(",")}` : "/workspace")
+}
@@ -1,8 +1,9 @@
 import { createContext, useContext, useState, useCallback, type ReactNode } from "react"
+import { REFRESH_TOKEN_KEY, TOKEN_KEY } from "@/lib/fetchClient"
 
 interface AuthContextValue {
   token: string | null
-  login: (token: string) => void
+  login: (token: string, refreshToken: string) => void
   logout: () => void
   isAuthenticated: boolean
 }
@@ -10,15 +11,17 @@ interface AuthContextValue {
 const AuthContext = createContext<AuthContextValue | null>(null)
 
 export function AuthProvider({ children }: { children: ReactNode }) {
-  const [token, setToken] = useState<string | null>(() => localStorage.getItem("cv_token"))
+  const [token, setToken] = useState<string | null>(() => localStorage.getItem(TOKEN_KEY))
 
-  const login = useCallback((newToken: string) => {
-    localStorage.setItem("cv_token", newToken)
+  const login = useCallback((newToken: string, refreshToken: string) => {
+    localStorage.setItem(TOKEN_KEY, newToken)
+    localStorage.setItem(REFRESH_TOKEN_KEY, refreshToken)
     setToken(newToken)
   }, [])
 
   const logout = useCallback(() => {
-    localStorage.removeItem("cv_token")
+    localStorage.removeItem(TOKEN_KEY)
+    localStorage.removeItem(REFRESH_TOKEN_KEY)
     setToken(null)
   }, [])
 
@@ -1,13 +1,63 @@
 const BASE_URL = import.meta.env.VITE_API_URL ?? "http://localhost:5000"
 
-function getHeaders(isFormData = false): HeadersInit {
+export const TOKEN_KEY = "cv_token"
+export const REFRESH_TOKEN_KEY = "cv_refresh_token"
+
+function getHeaders(isFormData = false): Record<string, string> {
   const headers: Record<string, string> = {}
-  const token = localStorage.getItem("cv_token")
+  const token = localStorage.getItem(TOKEN_KEY)
   if (token) headers["Authorization"] = `Bearer ${token}`
   if (!isFormData) headers["Content-Type"] = "application/json"
   return headers
 }
 
+let refreshing: Promise<boolean> | null = null
+
+/**
+ * Trade the stored refresh token for a new token pair. Concurrent callers
+ * share one request, since each refresh token can only be used once.
+ */
+function refreshTokens(): Promise<boolean> {
+  const refreshToken = localStorage.getItem(REFRESH_TOKEN_KEY)
+  if (!refreshToken) return Promise.resolve(false)
+  refreshing ??= fetch(`${BASE_URL}/auth/refresh`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({ refreshToken }),
+  })
+    .then(async (res) => {
+      if (!res.ok) {
+        localStorage.removeItem(TOKEN_KEY)
+        localStorage.removeItem(REFRESH_TOKEN_KEY)
+        return false
+      }
+      const pair = (await res.json()) as { token: string; refreshToken: string }
+      localStorage.setItem(TOKEN_KEY, pair.token)
+      localStorage.setItem(REFRESH_TOKEN_KEY, pair.refreshToken)
+      return true
+    })
+    .catch(() => false)
+    .finally(() => {
+      refreshing = null
+    })
+  return refreshing
+}
+
+/**
+ * fetch() with the stored access token. Access tokens are short-lived: on a
+ * 401 the token pair is refreshed once and the request retried.
+ */
+export async function authFetch(path: string, init: RequestInit = {}, isFormData = false): Promise<Response> {
+  const send = () =>
+    fetch(`${BASE_URL}${path}`, {
+      ...init,
+      headers: { ...getHeaders(isFormData), ...(init.headers as Record<string, string> | undefined) },
+    })
+  const res = await send()
+  if (res.status === 401 && (await refreshTokens())) return send()
+  return res
+}
+
 async function handleResponse<T>(res: Response): Promise<T> {
   if (!res.ok) {
     const text = await res.text()
@@ -30,39 +80,29 @@ async function handleResponse<T>(res: Response): Promise<T> {
 }
 
 export function get<T>(path: string): Promise<T> {
-  return fetch(`${BASE_URL}${path}`, {
-    method: "GET",
-    headers: getHeaders(),
-  }).then((res) => handleResponse<T>(res))
+  return authFetch(path, { method: "GET" }).then((res) => handleResponse<T>(res))
 }
 
 export function post<T>(path: string, body?: unknown): Promise<T> {
-  return fetch(`${BASE_URL}${path}`, {
+  return authFetch(path, {
     method: "POST",
-    headers: getHeaders(),
     body: body !== undefined ? JSON.stringify(body) : undefined,
   }).then((res) => handleResponse<T>(res))
 }
 
 export function put<T>(path: string, body?: unknown): Promise<T> {
-  return fetch(`${BASE_URL}${path}`, {
+  return authFetch(path, {
     method: "PUT",
-    headers: getHeaders(),
     body: body !== undefined ? JSON.stringify(body) : undefined,
   }).then((res) => handleResponse<T>(res))
 }
 
 export function del<T>(path: string): Promise<T> {
-  return fetch(`${BASE_URL}${path}`, {
-    method: "DELETE",
-    headers: getHeaders(),
-  }).then((res) => handleResponse<T>(res))
+  return authFetch(path, { method: "DELETE" }).then((res) => handleResponse<T>(res))
 }
 
 export function postFormData<T>(path: string, formData: FormData): Promise<T> {
-  return fetch(`${BASE_URL}${path}`, {
-    method: "POST",
-    headers: getHeaders(true),
-    body: formData,
-  }).then((res) => handleResponse<T>(res))
+  return authFetch(path, { method: "POST", body: formData }, true).then((res) =>
+    handleResponse<T>(res)
+  )
 }
@@ -10,15 +10,16 @@ import {
   SelectItem,
 } from "@/components/ui/select"
 import { LoadingSpinner } from "@/components/LoadingSpinner"
-import { listExperiences } from "@/api/experiences"
-import { listProjects } from "@/api/projects"
-import { listBlurbs } from "@/api/blurbs"
+import { getWorkspace } from "@/api/workspace"
 import { compileCV } from "@/api/latex"
 import type { Experience, Project, Blurb } from "@/types"
 import { Download, FileText } from "lucide-react"
 
 const FONT_SIZES = [10, 11, 12]
-const TEMPLATES = [{ value: "modern-1", label: "Modern (default)" }]
+const TEMPLATES = [
+  { value: "modern-1", label: "Modern (default)" },
+  { value: "classic-1", label: "Classic" },
+]
 
 export function CompilePage() {
   const [experiences, setExperiences] = useState<Experience[]>([])
@@ -35,8 +36,8 @@ export function CompilePage() {
   const [backendDown, setBackendDown] = useState(false)
 
   useEffect(() => {
-    Promise.all([listExperiences(), listProjects(), listBlurbs()])
-      .then(([exps, projs, blrbs]) => {
+    getWorkspace(["experiences", "projects", "blurbs"])
+      .then(({ experiences: exps = [], projects: projs = [], blurbs: blrbs = [] }) => {
         setExperiences(exps)
         setProjects(projs)
         setBlurbs(blrbs)
@@ -61,7 +62,7 @@ export function CompilePage() {
     setPdfUrl(null)
     try {
       const res = await compileCV({
-        template: selectedTemplate,
+        templateId: selectedTemplate,
         fontSize,
         blurbIds: [...selectedBlurbIds],
         experienceIds: [...selectedExpIds],
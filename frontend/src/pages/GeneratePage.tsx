@@ -19,11 +19,10 @@ import {
 } from "@/components/ui/dialog"
 import { LoadingSpinner } from "@/components/LoadingSpinner"
 import { listJobDescriptions } from "@/api/jobDescriptions"
-import { generateBlurb } from "@/api/agent"
+import { generateBlurb, generateBlurbsBatch } from "@/api/agent"
 import { listBlurbs, saveBlurb } from "@/api/blurbs"
 import { compileCV, fetchPdfBlobUrl } from "@/api/latex"
-import { listExperiences } from "@/api/experiences"
-import { listProjects } from "@/api/projects"
+import { getWorkspace } from "@/api/workspace"
 import type { JobDescription, BlurbType, BlurbMode, Blurb } from "@/types"
 import { Wand2, Download, FolderOpen, Save } from "lucide-react"
 
@@ -99,25 +98,28 @@ export function GeneratePage() {
   async function handleGenerateAll() {
     setGeneratingAll(true)
     setError(null)
-    const results = await Promise.allSettled(
-      BLURB_TYPES.map(({ type }) =>
-        generateBlurb({
+    try {
+      const { results } = await generateBlurbsBatch({
+        items: BLURB_TYPES.map(({ type }) => ({
           type,
           mode: modes[type],
           previousBlurb: blurbs[type] || undefined,
           jobDescriptionId: selectedJobId !== "none" ? selectedJobId : undefined,
-        }).then((res) => ({ type, text: res.generatedBlurb }))
-      )
-    )
-    results.forEach((r) => {
-      if (r.status === "fulfilled") {
-        setBlurbs((prev) => ({ ...prev, [r.value.type]: r.value.text }))
-        setSavedMap((prev) => ({ ...prev, [r.value.type]: false }))
-      }
-    })
-    const failed = results.filter((r) => r.status === "rejected")
-    if (failed.length > 0) setError("Some blurbs failed to generate.")
-    setGeneratingAll(false)
+        })),
+      })
+      results.forEach((r) => {
+        if (r.error === null && r.generatedBlurb !== null) {
+          const text = r.generatedBlurb
+          setBlurbs((prev) => ({ ...prev, [r.type]: text }))
+          setSavedMap((prev) => ({ ...prev, [r.type]: false }))
+        }
+      })
+      if (results.some((r) => r.error !== null)) setError("Some blurbs failed to generate.")
+    } catch (err) {
+      setError(err instanceof Error ? err.message : "Generation failed")
+    } finally {
+      setGeneratingAll(false)
+    }
   }
 
   async function handleOpenLoadDialog(type: BlurbType) {
@@ -161,13 +163,13 @@ export function GeneratePage() {
     setError(null)
     setPdfBlobUrl(null)
     try {
-      const [experiences, projects, savedBlurbs] = await Promise.all([
-        listExperiences(),
-        listProjects(),
-        listBlurbs(),
-      ])
+      const {
+        experiences = [],
+        projects = [],
+        blurbs: savedBlurbs = [],
+      } = await getWorkspace(["experiences", "projects", "blurbs"])
       const res = await compileCV({
-        template: "modern-1",
+        templateId: "modern-1",
         fontSize: 11,
         blurbIds: savedBlurbs.map((b) => b.id),
         experienceIds: experiences.map((e) => e.id),
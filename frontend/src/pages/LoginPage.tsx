@@ -21,7 +21,7 @@ export function LoginPage() {
     setLoading(true)
     try {
       const res = await login(email, password)
-      loginCtx(res.token)
+      loginCtx(res.token, res.refreshToken)
       navigate({ to: "/" })
     } catch (err) {
       setError(err instanceof Error ? err.message : "Login failed")
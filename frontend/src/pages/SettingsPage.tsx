@@ -13,9 +13,7 @@ import {
 } from "@/components/ui/select"
 import { LoadingSpinner, PageLoader } from "@/components/LoadingSpinner"
 import { listApiKeys, addApiKey, deleteApiKey } from "@/api/apiKeys"
-import { listExperiences } from "@/api/experiences"
-import { listProjects } from "@/api/projects"
-import { listBlurbs } from "@/api/blurbs"
+import { getWorkspace } from "@/api/workspace"
 import { compileCV, fetchPdfBlobUrl } from "@/api/latex"
 import type { ApiKey, Experience, Project, Blurb } from "@/types"
 import { Plus, Trash2, Key, FileText, Download, Upload, PackageOpen } from "lucide-react"
@@ -23,7 +21,10 @@ import { exportData, importData } from "@/api/exportImport"
 
 const PROVIDERS = ["openai"]
 const FONT_SIZES = [10, 11, 12]
-const TEMPLATES = [{ value: "modern-1", label: "Modern (default)" }]
+const TEMPLATES = [
+  { value: "modern-1", label: "Modern (default)" },
+  { value: "classic-1", label: "Classic" },
+]
 
 export function SettingsPage() {
   // API keys
@@ -62,8 +63,8 @@ export function SettingsPage() {
   }, [])
 
   useEffect(() => {
-    Promise.all([listExperiences(), listProjects(), listBlurbs()])
-      .then(([exps, projs, blrbs]) => {
+    getWorkspace(["experiences", "projects", "blurbs"])
+      .then(({ experiences: exps = [], projects: projs = [], blurbs: blrbs = [] }) => {
         setExperiences(exps)
         setProjects(projs)
         setBlurbs(blrbs)
@@ -113,7 +114,7 @@ export function SettingsPage() {
     setPdfBlobUrl(null)
     try {
       const res = await compileCV({
-        template: selectedTemplate,
+        templateId: selectedTemplate,
         fontSize,
         blurbIds: [...selectedBlurbIds],
         experienceIds: [...selectedExpIds],
@@ -1,6 +1,9 @@
 // Auth
 export interface LoginResponse {
+  // Short-lived access token; trade refreshToken at /auth/refresh for a new pair
   token: string
+  refreshToken: string
+  expiresIn: number
   userId: string
 }
 
@@ -89,6 +92,25 @@ export interface GenerateBlurbResponse {
   generatedBlurb: string
 }
 
+export interface GenerateBlurbsBatchRequest {
+  items: GenerateBlurbRequest[]
+  save?: boolean
+}
+
+export interface GenerateBlurbsBatchResult {
+  type: BlurbType
+  jobDescriptionId: string | null
+  generatedBlurb: string | null
+  blurbId?: string
+  error: string | null
+  elapsedMs: number
+}
+
+export interface GenerateBlurbsBatchResponse {
+  results: GenerateBlurbsBatchResult[]
+  elapsedMs: number
+}
+
 // API Keys
 export interface ApiKey {
   id: string
@@ -99,7 +121,7 @@ export interface ApiKey {
 
 // Compile
 export interface CompileRequest {
-  template: string
+  templateId: string
   fontSize: number
   blurbIds: string[]
   experienceIds: string[]
@@ -109,3 +131,59 @@ export interface CompileRequest {
 export interface CompileResponse {
   pdfUrl: string
 }
+
+export interface CompileJob {
+  // Absent when an identical document was already compiled (cached: true)
+  jobId?: string
+  status: "queued" | "running" | "done" | "failed"
+  cached?: boolean
+  progress?: number
+  statusUrl?: string
+  pdfUrl?: string
+  error?: string
+  details?: string
+}
+
+// Export / import
+export interface ExportJob {
+  jobId: string
+  status: "queued" | "running" | "done" | "failed"
+  statusUrl?: string
+  downloadUrl?: string
+  // Set once done: archive size, SHA-256 (its ETag), cursor and expiry (unix seconds)
+  bytes?: number
+  sha256?: string
+  cursor?: number
+  expiresAt?: number
+  error?: string
+}
+
+export type ImportMode = "replace" | "merge"
+
+export interface ImportResult {
+  message: string
+  mode: ImportMode
+  // Rows written and deleted per table
+  changed: Record<string, number>
+  deleted: Record<string, number>
+}
+
+// Workspace: the CV builder's lists in one consistent snapshot
+export type WorkspaceSection =
+  | "profile"
+  | "photos"
+  | "experiences"
+  | "projects"
+  | "blurbs"
+  | "jobDescriptions"
+
+export interface Workspace {
+  // Change sequence the snapshot was read at
+  cursor: number
+  profile?: Profile
+  photos?: Photo[]
+  experiences?: Experience[]
+  projects?: Project[]
+  blurbs?: Blurb[]
+  jobDescriptions?: JobDescription[]
+}